@@ -1,15 +1,65 @@
 """Module for features to load in during FastAPI lifespan"""
 
+import asyncio
+from dataclasses import dataclass, field
+from typing import List
 from pydantic import HttpUrl
 from app.models.schemas import IngestRequest, DocumentType
 from app.core.logging import logger
-from app.core.ingest.ingest import document_from_content_or_url_and_trace
+from app.config.pydantic_settings import settings
+from app.core.container import container
+from app.core.vector_store.identifier_index import identifier_index
 from app.exceptions.exceptions import DuplicateDocumentException
 
+
+@dataclass
+class AutoIngestStatus:
+    """Progress of base document auto ingestion, reported by the readiness endpoint"""
+    finished: bool = False
+    loaded: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+
+
+auto_ingest_status = AutoIngestStatus()
+
+
+async def build_identifier_index():
+    """
+    Build the identifier index from the vector store in a worker thread.
+    If it fails, duplicate checks keep querying the vector store
+    """
+    try:
+        await asyncio.to_thread(identifier_index.build, container.vector_store)
+    except Exception as e:
+        logger.error("identifier_index_build_failed", error=str(e))
+
+
+async def initialize_dependencies():
+    """
+    Build the clients of the dependency container in a worker thread, so the first
+    requests don't pay for it. If it fails, each dependency is retried on first use
+    """
+    try:
+        await asyncio.to_thread(container.initialize)
+    except Exception as e:
+        logger.error("dependencies_initialization_failed", error=str(e))
+
+
+async def warm_up():
+    """Startup work run in the background: dependencies, identifier index,
+    then base documents"""
+    await initialize_dependencies()
+    await build_identifier_index()
+    await auto_ingest_base_documents()
+
+
 async def auto_ingest_base_documents():
     """
-    Auto ingest base documents
+    Auto ingest base documents concurrently, each one bounded by a timeout.
+    Meant to run as a background task so startup doesn't wait on remote fetches
     """
+    # pylint: disable=import-outside-toplevel
+    from app.core.ingest.ingest import INGEST_DEPENDENCIES, document_from_content_or_url_and_trace
     doc_1 = IngestRequest(content = None,
                           url = HttpUrl("https://allendowney.github.io/ThinkPython/index.html"),
                           document_type = DocumentType("html"))
@@ -19,16 +69,40 @@ async def auto_ingest_base_documents():
                           document_type = DocumentType("html"))
 
     docs = [doc_1, doc_2]
+    semaphore = asyncio.Semaphore(settings.auto_ingest_concurrency)
+
+    async def ingest_base_document(i: int, doc: IngestRequest):
+        async with semaphore:
+            try:
+                await container.require(*INGEST_DEPENDENCIES)
+                chunks_created = await asyncio.wait_for(document_from_content_or_url_and_trace(doc),
+                                                timeout=settings.auto_ingest_timeout_seconds)
+                auto_ingest_status.loaded.append(str(doc.url))
+                logger.info("auto_ingest_completed",
+                            document_url = doc.url,
+                            chunks_created=chunks_created
+                            )
+            except DuplicateDocumentException:
+                auto_ingest_status.loaded.append(str(doc.url))
+                logger.warning("auto_ingest_found_duplicate",
+                               auto_ingest_doc_id = i,
+                               document_url = doc.url)
+            except asyncio.TimeoutError:
+                auto_ingest_status.failed.append(str(doc.url))
+                logger.error("auto_ingest_timeout",
+                             auto_ingest_doc_id = i,
+                             document_url = doc.url,
+                             timeout_seconds=settings.auto_ingest_timeout_seconds)
+            except Exception as e:
+                auto_ingest_status.failed.append(str(doc.url))
+                logger.error("auto_ingest_failed",
+                             auto_ingest_doc_id = i,
+                             document_url = doc.url,
+                             error=str(e))
 
     logger.info("auto_ingest_started")
-    for i, doc in enumerate(docs):
-        try:
-            chunks = await document_from_content_or_url_and_trace(doc)
-            logger.info("auto_ingest_completed",
-                        document_url = doc.url,
-                        chunks_created=(len(chunks))
-                        )
-        except DuplicateDocumentException:
-            logger.warning("auto_ingest_found_duplicate",
-                           auto_ingest_doc_id = i,
-                           document_url = doc.url)
+    await asyncio.gather(*(ingest_base_document(i, doc) for i, doc in enumerate(docs)))
+    auto_ingest_status.finished = True
+    logger.info("auto_ingest_finished",
+                loaded=len(auto_ingest_status.loaded),
+                failed=len(auto_ingest_status.failed))
@@ -1,7 +1,10 @@
-"""Health endpoint"""
+"""Health and readiness endpoints"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
 from app.core.logging import logger
+from app.api.lifespan_setup import auto_ingest_status
+from app.core.vector_store.identifier_index import identifier_index
+from app.core.container import container
 
 router = APIRouter()
 
@@ -12,3 +15,18 @@ def read_root():
     """
     logger.debug("health_check_request")
     return {"status": "ok"}
+
+
+@router.get("/ready", tags=["health"])
+def read_readiness(response: Response):
+    """
+    Readiness endpoint, returns 503 until base document auto ingestion has finished
+    """
+    logger.debug("readiness_check_request", ready=auto_ingest_status.finished)
+    if not auto_ingest_status.finished:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if auto_ingest_status.finished else "loading",
+            "base_documents_loaded": auto_ingest_status.loaded,
+            "base_documents_failed": auto_ingest_status.failed,
+            "identifier_index_ready": identifier_index.ready,
+            "dependencies_ready": container.ready}
@@ -1,27 +1,54 @@
 """Ingest endpoint"""
 
-from fastapi import APIRouter#, status
+from fastapi import APIRouter, status
 from app.core.logging import logger
-from app.exceptions.exceptions import DuplicateDocumentException
-from app.models.schemas import IngestRequest, IngestResponse
-from app.core.ingest.ingest import document_from_content_or_url_and_trace
-#from app.exceptions.http_exceptions import IngestionException
+from app.exceptions.exceptions import DuplicateDocumentException, JobQueueFullException
+from app.models.schemas import (IngestRequest, IngestResponse,
+                                BatchIngestRequest, BatchIngestResponse,
+                                IngestJobResponse)
+from app.core.ingest.jobs import IngestionJob, ingestion_jobs
+from app.core.container import container
+from app.config.pydantic_settings import settings
+from app.exceptions.http_exceptions import IngestionException
 
 router = APIRouter()
 
+# the ingestion stack (loaders, splitter, Langfuse) is imported by the first
+# ingest request instead of at startup
+# pylint: disable=import-outside-toplevel
+
 @router.post("/ingest", response_model=IngestResponse, tags=["ingest"])
 async def ingest_endpoint(request: IngestRequest):
     """
-    Document Ingestion endpoint
+    Document Ingestion endpoint.
+    With refresh set, an already ingested url is updated with its changed chunks only
     """
-    logger.info("request_ingest_started", document_type=request.document_type)
+    logger.info("request_ingest_started",
+                document_type=request.document_type,
+                refresh=request.refresh)
+    from app.core.ingest.ingest import INGEST_DEPENDENCIES, document_from_content_or_url_and_trace
+    from app.core.ingest.refresh import refresh_document_from_url_and_trace
     try:
-        chunks = await document_from_content_or_url_and_trace(request)
-        logger.info("request_ingest_completed", chunks_created=len(chunks))
+        await container.require(*INGEST_DEPENDENCIES)
+        if request.refresh:
+            result = await refresh_document_from_url_and_trace(request)
+            logger.info("request_ingest_refreshed",
+                        refresh_status=result.status,
+                        chunks_created=result.chunks_added,
+                        chunks_deleted=result.chunks_deleted)
+            return IngestResponse(
+                status="success",
+                message=("Document unchanged." if result.status == "unchanged"
+                         else f"Successfully {result.status} document."),
+                chunks_created=result.chunks_added,
+                chunks_deleted=result.chunks_deleted
+            )
+        chunks_created = await document_from_content_or_url_and_trace(request)
+        logger.info("request_ingest_completed", chunks_created=chunks_created)
         return IngestResponse(
             status="success",
             message="Successfully ingested document.",
-            chunks_created=len(chunks)
+            chunks_created=chunks_created
         )
     except DuplicateDocumentException as e:
         logger.warning("ingest_request_duplicate", error=str(e))
@@ -39,3 +66,72 @@ async def ingest_endpoint(request: IngestRequest):
         )
         #raise IngestionException(status.HTTP_500_INTERNAL_SERVER_ERROR,
         #                         "Query failed: Internal Server Error") from e
+
+
+@router.post("/ingest/batch", response_model=BatchIngestResponse, tags=["ingest"])
+async def batch_ingest_endpoint(request: BatchIngestRequest):
+    """
+    Batch Document Ingestion endpoint.
+    Returns one result per document in request order
+    """
+    if len(request.documents) > settings.ingest_batch_max_documents:
+        raise IngestionException(status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                 f"At most {settings.ingest_batch_max_documents} documents per batch")
+    from app.core.ingest.ingest import INGEST_DEPENDENCIES, documents_from_batch_and_trace
+    logger.info("request_batch_ingest_started", documents_count=len(request.documents))
+    await container.require(*INGEST_DEPENDENCIES)
+    results = await documents_from_batch_and_trace(request.documents)
+    failed = sum(1 for result in results if result.status == "error")
+    if failed == 0:
+        batch_status = "success"
+    elif failed == len(results):
+        batch_status = "error"
+    else:
+        batch_status = "partial"
+    chunks_created = sum(result.chunks_created for result in results)
+    logger.info("request_batch_ingest_completed",
+                status=batch_status,
+                failed_documents=failed,
+                chunks_created=chunks_created)
+    return BatchIngestResponse(status=batch_status,
+                               chunks_created=chunks_created,
+                               results=results)
+
+
+def job_to_response(job: IngestionJob) -> IngestJobResponse:
+    """Format an ingestion job for the API"""
+    return IngestJobResponse(job_id=job.job_id,
+                             stage=job.stage, # type: ignore
+                             chunks_embedded=job.chunks_embedded,
+                             chunks_total=job.chunks_total,
+                             error=job.error,
+                             created_at=job.created_at,
+                             started_at=job.started_at,
+                             finished_at=job.finished_at)
+
+
+@router.post("/ingest/jobs",
+             response_model=IngestJobResponse,
+             status_code=status.HTTP_202_ACCEPTED,
+             tags=["ingest"])
+async def ingest_job_endpoint(request: IngestRequest):
+    """
+    Queue a document for background ingestion and return its job immediately
+    """
+    try:
+        job = ingestion_jobs.submit(request)
+    except JobQueueFullException as e:
+        raise IngestionException(status.HTTP_503_SERVICE_UNAVAILABLE,
+                                 "Ingestion queue is full, retry later") from e
+    return job_to_response(job)
+
+
+@router.get("/ingest/jobs/{job_id}", response_model=IngestJobResponse, tags=["ingest"])
+async def ingest_job_status_endpoint(job_id: str):
+    """
+    Report stage, progress and errors of a background ingestion job
+    """
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise IngestionException(status.HTTP_404_NOT_FOUND, "Job not found")
+    return job_to_response(job)
@@ -1,15 +1,13 @@
 """Metrics endpoint"""
 
-import psutil
 from fastapi import APIRouter, Response
-from prometheus_client import generate_latest
-from app.core.metrics import CPU_USAGE, MEMORY_USAGE
+from prometheus_client import CONTENT_TYPE_LATEST
+from app.core.metrics import render_metrics
 
 router = APIRouter()
 
 @router.get("/metrics", tags=["metrics"])
 def metrics():
-    """Metrics endpoint declaration. For use with Prometheus"""
-    CPU_USAGE.set(psutil.cpu_percent())
-    MEMORY_USAGE.set(psutil.virtual_memory().percent)
-    return Response(generate_latest(), media_type="text/plain")
+    """Metrics endpoint declaration. For use with Prometheus.
+    Aggregates all worker processes when PROMETHEUS_MULTIPROC_DIR is set"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
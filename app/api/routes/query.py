@@ -1,14 +1,96 @@
 """Query endpoint"""
 
+import asyncio
+import json
+import time
+from typing import List, Optional
 from fastapi import APIRouter, status
+from fastapi.responses import StreamingResponse
+from langchain_core.documents import Document
 from app.exceptions.http_exceptions import QueryException
 from app.core.logging import logger
-from app.models.schemas import QueryRequest, QueryResponse, Source
-from app.core.langgraph.langgraph import graph
-from app.core.observability.langfuse import langfuse_callback_handler
+from app.models.schemas import (QueryRequest, QueryResponse, Source,
+                                QueryBatchRequest, QueryBatchResponse, QueryBatchItemResult)
+from app.core.container import container
+from app.core.cache.answer_cache import answer_cache
+from app.core.vector_store.vectorstore import similarity_search_by_vectors
+from app.config.pydantic_settings import settings
+from app.core.metrics import record_stage
 
 router = APIRouter()
 
+# required before answering, so their build doesn't hold the event loop
+QUERY_DEPENDENCIES = ("embeddings", "vector_store", "llm", "graph", "langfuse_callback_handler")
+
+
+def format_sources(sources: List[Document]) -> List[Source]:
+    """Format retrieved chunks as Source models based on their source_type metadata"""
+    formatted_sources = []
+    for doc in sources:
+        match doc.metadata.get("source_type"):
+            case "url":
+                source_doc = doc.metadata.get("source_url")
+                formatted_sources.append(
+                    Source(
+                        page=doc.metadata.get("page"),
+                        text=doc.page_content,
+                        source=source_doc
+                    )
+                )
+            case "content":
+                formatted_sources.append(
+                    Source(
+                        text=doc.page_content,
+                        source="user_input"
+                    )
+                )
+            case _:
+                formatted_sources.append(
+                    Source(
+                        text=doc.page_content,
+                        source="unknown"
+                    )
+                )
+    return formatted_sources
+
+
+def format_sse_event(event: str, data) -> str:
+    """Serialize data as a Server-Sent Event with a named event type"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def embed_question(question: str) -> Optional[List[float]]:
+    """Embed the question for the answer cache lookup.
+    The same embedding is passed to the retrieve node so it is only computed once"""
+    if not answer_cache.enabled:
+        return None
+    return await container.embeddings.aembed_query(question)
+
+
+async def embed_questions(questions: List[str]) -> List[List[float]]:
+    """Embed the questions of a batch query in batched provider calls when supported"""
+    embeddings = container.embeddings
+    if hasattr(embeddings, "aembed_queries"):
+        return await embeddings.aembed_queries(questions) # type: ignore
+    return list(await asyncio.gather(*(embeddings.aembed_query(question)
+                                       for question in questions)))
+
+
+def graph_run_config() -> dict:
+    """LangGraph run config, tracing to Langfuse unless tracing is disabled"""
+    if not settings.langfuse_tracing_enabled:
+        return {}
+    return {"callbacks": [container.langfuse_callback_handler]}
+
+
+def build_graph_input(question: str, question_embedding: Optional[List[float]]) -> dict:
+    """Build the LangGraph input state for a question"""
+    graph_input: dict = {"question": question}
+    if question_embedding is not None:
+        graph_input["question_embedding"] = question_embedding
+    return graph_input
+
+
 @router.post("/query", response_model=QueryResponse, tags=["query"])
 async def query_document(request: QueryRequest):
     """
@@ -17,41 +99,22 @@ async def query_document(request: QueryRequest):
     try:
         logger.info("query_received", question_length=len(request.question))
 
+        await container.require(*QUERY_DEPENDENCIES)
+        question_embedding = await embed_question(request.question)
+        cached = answer_cache.lookup(question_embedding)
+        if cached is not None:
+            logger.info("query_cache_hit")
+            answer, sources = cached.answer, cached.context
+        else:
+            logger.debug("generating_answer")
+            cache_generation = answer_cache.generation
+            response = await container.graph.ainvoke(
+                build_graph_input(request.question, question_embedding), # type: ignore
+                config=graph_run_config())
+            answer, sources = response["answer"], response["context"]
+            answer_cache.store(question_embedding, answer, sources, cache_generation)
 
-        logger.debug("generating_answer")
-
-        response = await graph.ainvoke({"question": request.question}, # type: ignore
-                                       config={"callbacks": [langfuse_callback_handler]})
-
-        answer = response["answer"]
-        sources = response["context"]
-
-        formatted_sources = []
-        for doc in sources:
-            match doc.metadata.get("source_type"):
-                case "url":
-                    source_doc = doc.metadata.get("source_url")
-                    formatted_sources.append(
-                        Source(
-                            page=doc.metadata.get("page"),
-                            text=doc.page_content,
-                            source=source_doc
-                        )
-                    )
-                case "content":
-                    formatted_sources.append(
-                        Source(
-                            text=doc.page_content,
-                            source="user_input"
-                        )
-                    )
-                case _:
-                    formatted_sources.append(
-                        Source(
-                            text=doc.page_content,
-                            source="unknown"
-                        )
-                    )
+        formatted_sources = format_sources(sources)
 
         logger.debug("answer_generated", answer_length=len(answer))
 
@@ -63,3 +126,165 @@ async def query_document(request: QueryRequest):
         logger.error("query_failed", error=str(e))
         raise QueryException(status.HTTP_500_INTERNAL_SERVER_ERROR,
                                  "Query failed: Internal Server Error") from e
+
+
+async def stream_query_events(question: str):
+    """
+    Run the RAG graph in streaming mode and yield SSE events:
+    sources once retrieve finishes, answer tokens as the chat model produces them,
+    and a final summary event (or an error event if the graph run fails)
+    """
+    answer_parts: List[str] = []
+    sources: List[Document] = []
+    sources_count = 0
+    try:
+        await container.require(*QUERY_DEPENDENCIES)
+        question_embedding = await embed_question(question)
+        cached = answer_cache.lookup(question_embedding)
+        if cached is not None:
+            logger.info("query_stream_cache_hit")
+            formatted_sources = format_sources(cached.context)
+            yield format_sse_event("sources",
+                                   [source.model_dump() for source in formatted_sources])
+            yield format_sse_event("token", {"text": cached.answer})
+            yield format_sse_event("end", {"answer": cached.answer,
+                                           "sources_count": len(formatted_sources)})
+            return
+
+        cache_generation = answer_cache.generation
+        async for mode, chunk in container.graph.astream(
+                build_graph_input(question, question_embedding), # type: ignore
+                config=graph_run_config(),
+                stream_mode=["updates", "messages"]):
+            if mode == "updates" and "retrieve" in chunk:
+                sources = chunk["retrieve"]["context"]
+                formatted_sources = format_sources(sources)
+                sources_count = len(formatted_sources)
+                logger.debug("query_stream_sources_sent", sources_count=sources_count)
+                yield format_sse_event("sources",
+                                       [source.model_dump() for source in formatted_sources])
+            elif mode == "messages":
+                message_chunk, metadata = chunk
+                if metadata.get("langgraph_node") != "generate":
+                    continue
+                token = message_chunk.content
+                if isinstance(token, str) and token:
+                    answer_parts.append(token)
+                    yield format_sse_event("token", {"text": token})
+
+        answer = "".join(answer_parts)
+        answer_cache.store(question_embedding, answer, sources, cache_generation)
+        logger.info("query_stream_success",
+                    answer_length=len(answer),
+                    sources_count=sources_count)
+        yield format_sse_event("end", {"answer": answer, "sources_count": sources_count})
+    except Exception as e:
+        logger.error("query_stream_failed", error=str(e))
+        yield format_sse_event("error", {"detail": "Query failed: Internal Server Error"})
+
+
+@router.post("/query/stream", tags=["query"])
+async def query_document_stream(request: QueryRequest):
+    """
+    Streaming RAG Query endpoint using Server-Sent Events.
+    Emits `sources`, then `token` events, then a final `end` event
+    """
+    logger.info("query_stream_received", question_length=len(request.question))
+    return StreamingResponse(stream_query_events(request.question),
+                             media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache",
+                                      "X-Accel-Buffering": "no"})
+
+
+@router.post("/query/batch", response_model=QueryBatchResponse, tags=["query"])
+async def query_batch(request: QueryBatchRequest):
+    """
+    Batch RAG Query endpoint.
+    All questions are embedded together and the ones not in the answer cache are
+    searched together, then the graph generates answers with up to
+    settings.query_batch_concurrency questions at a time.
+    Returns one result per question in request order, a failing question doesn't
+    fail the others
+    """
+    questions = request.questions
+    if len(questions) > settings.query_batch_max_questions:
+        raise QueryException(status.HTTP_422_UNPROCESSABLE_ENTITY,
+                             f"At most {settings.query_batch_max_questions} questions per batch")
+    logger.info("query_batch_received", questions_count=len(questions))
+
+    results: List[Optional[QueryBatchItemResult]] = [None] * len(questions)
+
+    def fail_all(indexes: List[int]):
+        for index in indexes:
+            results[index] = QueryBatchItemResult(index=index, status="error",
+                                                  error="Query failed: Internal Server Error")
+
+    misses: List[int] = []
+    cache_hits = 0
+    question_embeddings: List[List[float]] = []
+    try:
+        await container.require(*QUERY_DEPENDENCIES)
+        question_embeddings = await embed_questions(questions)
+        for index, question_embedding in enumerate(question_embeddings):
+            cached = answer_cache.lookup(question_embedding)
+            if cached is None:
+                misses.append(index)
+            else:
+                cache_hits += 1
+                results[index] = QueryBatchItemResult(index=index, status="success",
+                                                      answer=cached.answer,
+                                                      sources=format_sources(cached.context))
+    except Exception as e:
+        logger.error("query_batch_embedding_failed", error=str(e))
+        fail_all(list(range(len(questions))))
+        misses = []
+
+    retrieved: List[List[Document]] = []
+    if misses:
+        try:
+            retrieve_start = time.perf_counter()
+            retrieved = await asyncio.to_thread(similarity_search_by_vectors,
+                                                container.vector_store,
+                                                [question_embeddings[i] for i in misses])
+            record_stage("retrieve", time.perf_counter() - retrieve_start,
+                         sum(len(docs) for docs in retrieved))
+        except Exception as e:
+            logger.error("query_batch_retrieval_failed", error=str(e))
+            fail_all(misses)
+            misses = []
+
+    semaphore = asyncio.Semaphore(settings.query_batch_concurrency)
+    cache_generation = answer_cache.generation
+
+    async def answer(index: int, context: List[Document]):
+        async with semaphore:
+            try:
+                graph_input = build_graph_input(questions[index], question_embeddings[index])
+                graph_input["context"] = context
+                response = await container.graph.ainvoke(
+                    graph_input, # type: ignore
+                    config=graph_run_config())
+                answer_cache.store(question_embeddings[index], response["answer"],
+                                   response["context"], cache_generation)
+                results[index] = QueryBatchItemResult(index=index, status="success",
+                                                      answer=response["answer"],
+                                                      sources=format_sources(response["context"]))
+            except Exception as e:
+                logger.error("query_batch_item_failed", index=index, error=str(e))
+                fail_all([index])
+
+    await asyncio.gather(*(answer(index, context) for index, context in zip(misses, retrieved)))
+
+    failed = sum(1 for result in results if result is None or result.status == "error")
+    if failed == 0:
+        batch_status = "success"
+    elif failed == len(results):
+        batch_status = "error"
+    else:
+        batch_status = "partial"
+    logger.info("query_batch_completed",
+                status=batch_status,
+                questions_count=len(questions),
+                cache_hits=cache_hits,
+                failed_questions=failed)
+    return QueryBatchResponse(status=batch_status, results=results) # type: ignore
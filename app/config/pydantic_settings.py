@@ -17,9 +17,60 @@ class Settings(BaseSettings):
     langfuse_host: str
     langfuse_public_key: str
     langfuse_secret_key: str
+    langfuse_tracing_enabled: bool = Field(
+        default=True,
+        description="false disables Langfuse tracing, graph runs get no callback handler")
+    langfuse_sample_rate: float = Field(
+        default=1.0,
+        description="Share of traces exported, chosen by trace id")
+    langfuse_sample_errors: bool = Field(
+        default=True,
+        description="Also export traces with a failed span when sampling")
+    langfuse_slow_trace_seconds: float = Field(
+        default=0.0,
+        description="Also export traces whose root span took at least this long " \
+            "when sampling, 0 disables")
+    langfuse_max_pending_traces: int = Field(
+        default=1000,
+        description="Unfinished traces held for the tail sampling decision")
+    langfuse_flush_at: int = Field(
+        default=512,
+        description="Spans per export batch")
+    langfuse_flush_interval_seconds: float = Field(
+        default=5.0,
+        description="Seconds between exports of a partial batch")
 
     chroma_host: str = Field(default="localhost")
     chroma_port: int = Field(default=8001)
+    chroma_http_max_connections: int = Field(
+        default=32,
+        description="Pooled connections of each Chroma HTTP client")
+    chroma_http_keepalive_seconds: float = Field(default=40.0)
+    chroma_upsert_batch_size: int = Field(
+        default=1000,
+        description="Chunks per Chroma upsert request, capped by the server's max batch size")
+    chroma_upsert_concurrency: int = Field(
+        default=2,
+        description="Chroma upsert requests in flight at once, shared by all ingestions")
+    chroma_upsert_max_retries: int = Field(
+        default=3,
+        description="Retries of an upsert batch failing with a transient error")
+    chroma_upsert_retry_backoff_seconds: float = Field(
+        default=0.5,
+        description="Wait before the first retry of an upsert batch, doubled for each next one")
+    chroma_upsert_timeout_seconds: float = Field(default=60.0)
+    vector_store_backend: Literal['chroma', 'numpy'] = Field(
+        default='chroma',
+        description="chroma uses ChromaDB as configured by ENV, " \
+    "numpy uses the in-process NumPy vector store persisted under numpy_store_path")
+    numpy_store_path: str = Field(default="./numpy_store")
+    numpy_store_quantization: Literal['none', 'float16', 'int8'] = Field(
+        default='none',
+        description="Precision of the in-memory matrix scanned by the NumPy store, " \
+    "candidates are rescored against the full precision vectors on disk")
+    numpy_store_rescore_factor: int = Field(
+        default=4,
+        description="Candidates rescored per requested result when quantization is enabled")
 
     model_config = SettingsConfigDict(
         env_file = (".env.prod" if os.getenv("ENV") == "prod" else ".env.dev"),
@@ -29,7 +80,126 @@ class Settings(BaseSettings):
     LLM_provider: str
     LLM_model: str
     Google_API_Key: str
-    Embeddings_model: str = Field(default="google")
+    Embeddings_model: str = Field(
+        default="auto",
+        description="Embedding backend: google, hashing (local, CPU only, no network) " \
+    "or auto for the backend of LLM_provider. A vector store only accepts the backend " \
+    "that created it")
+    embedding_hashing_dimension: int = Field(
+        default=768,
+        description="Dimensions of the local hashing embeddings")
+    embedding_output_dimensionality: int = Field(
+        default=0,
+        description="Keep only the leading dimensions of each embedding and renormalize, " \
+    "0 keeps the model's full size. Changing it requires re-ingesting the vector store")
+    embedding_cache_enabled: bool = Field(
+        default=True,
+        description="Cache document embeddings on disk keyed by model and chunk text hash")
+    embedding_cache_path: str = Field(default="./embedding_cache.sqlite3")
+    embeddings_cost_per_million_tokens: float = Field(
+        default=0.15,
+        description="Provider price used to estimate the cost saved by the embedding cache")
+
+    answer_cache_enabled: bool = Field(
+        default=True,
+        description="Serve near-identical questions from the semantic answer cache")
+    answer_cache_similarity_threshold: float = Field(
+        default=0.95,
+        description="Minimum cosine similarity between question embeddings for a cache hit")
+    answer_cache_ttl_seconds: float = Field(default=3600.0)
+    answer_cache_shared_generation_path: str = Field(
+        default="",
+        description="File through which the workers of a host invalidate each other's "
+        "answer caches after an ingest. Empty keeps invalidation per worker, answers cached "
+        "by other workers are then served for up to answer_cache_ttl_seconds")
+    answer_cache_max_entries: int = Field(default=1024)
+    answer_cache_max_bytes: int = Field(default=64 * 1024 * 1024)
+
+    embedding_micro_batch_enabled: bool = Field(
+        default=True,
+        description="Coalesce concurrent query embeddings into batched provider requests")
+    embedding_micro_batch_max_size: int = Field(default=32)
+    embedding_micro_batch_max_wait_ms: float = Field(
+        default=5.0,
+        description="Longest a query waits for other queries to join its batch")
+    query_batch_max_questions: int = Field(
+        default=100,
+        description="Largest number of questions accepted by one batch query request")
+    query_batch_concurrency: int = Field(
+        default=8,
+        description="Questions of a batch query answered by the LLM concurrently")
+    context_token_budget: int = Field(
+        default=3000,
+        description="Estimated tokens of retrieved context sent to the LLM, 0 disables the limit")
+    context_near_duplicate_threshold: float = Field(
+        default=0.9,
+        description="Share of a chunk's word 5-grams found in a better ranked chunk " \
+    "above which it is dropped from the context")
+    ingest_batch_max_documents: int = Field(
+        default=100,
+        description="Largest number of documents accepted by one batch ingestion request")
+    ingest_batch_concurrency: int = Field(
+        default=8,
+        description="Documents fetched and parsed concurrently by batch ingestion")
+    ingest_embedding_batch_size: int = Field(
+        default=256,
+        description="Chunks per embedding and vector store call, grouped across documents")
+    ingest_pipeline_queue_size: int = Field(
+        default=2,
+        description="Chunk batches buffered between ingestion pipeline stages")
+    ingest_job_workers: int = Field(
+        default=2,
+        description="Background workers processing queued ingestion jobs")
+    ingest_job_queue_size: int = Field(
+        default=100,
+        description="Maximum queued ingestion jobs before new submissions are rejected")
+    ingest_job_retention: int = Field(
+        default=1000,
+        description="Finished ingestion jobs kept for status polling")
+    auto_ingest_concurrency: int = Field(
+        default=2,
+        description="Base documents ingested concurrently at startup")
+    auto_ingest_timeout_seconds: float = Field(
+        default=60.0,
+        description="Timeout for each base document ingested at startup")
+    http_max_connections: int = Field(default=100)
+    http_max_keepalive_connections: int = Field(default=20)
+    http_keepalive_expiry_seconds: float = Field(default=30.0)
+    http_per_host_concurrency: int = Field(
+        default=4,
+        description="Concurrent downloads allowed against a single host")
+    http_connect_timeout_seconds: float = Field(default=10.0)
+    http_timeout_seconds: float = Field(
+        default=30.0,
+        description="Read, write and pool timeout for document downloads")
+    http_max_download_bytes: int = Field(
+        default=50 * 1024 * 1024,
+        description="Downloads larger than this are aborted")
+    http2_enabled: bool = Field(
+        default=True,
+        description="Negotiate HTTP/2 when the h2 package is installed")
+    pdf_parse_workers: int = Field(
+        default=0,
+        description="Processes used to extract PDF pages, 0 means one per CPU core")
+    pdf_parallel_min_pages: int = Field(
+        default=32,
+        description="PDFs with fewer pages are parsed in a single thread")
+    pdf_tasks_per_worker: int = Field(
+        default=2,
+        description="Page ranges per worker process, more ranges stream pages sooner")
+    log_async_enabled: bool = Field(
+        default=True,
+        description="Write log lines from a background thread instead of the caller")
+    log_queue_size: int = Field(
+        default=10000,
+        description="Log lines waiting for the writer thread, further lines are dropped")
+    log_sample_max_events_per_second: float = Field(
+        default=100.0,
+        description="Debug and info events of one name beyond this rate are dropped, " \
+            "0 keeps every event")
+    system_metrics_interval_seconds: float = Field(
+        default=15.0,
+        description="Seconds between CPU and memory usage samples exported to Prometheus")
 
     Project_name: str = "RAG-Api"
     Version: str = "0.2.0"
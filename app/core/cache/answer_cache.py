@@ -0,0 +1,221 @@
+"""Module for the semantic answer cache placed in front of the RAG graph.
+Answers are keyed by question embedding, so near-identical questions skip
+the vector search and the LLM call. Every worker process has its own cache,
+invalidations reach the other workers of the host through a shared generation file"""
+
+import fcntl
+import os
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+import numpy as np
+from langchain_core.documents import Document
+from app.core.logging import logger
+from app.core.metrics import (ANSWER_CACHE_HITS, ANSWER_CACHE_MISSES,
+                              ANSWER_CACHE_EVICTIONS, ANSWER_CACHE_ENTRIES,
+                              ANSWER_CACHE_BYTES)
+from app.config.pydantic_settings import settings
+
+
+@dataclass
+class CachedAnswer:
+    """Answer and retrieved context stored for a question embedding"""
+    answer: str
+    context: List[Document]
+    embedding: np.ndarray
+    created_at: float
+    size_bytes: int
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def _estimate_size(answer: str, context: List[Document], vector: np.ndarray) -> int:
+    size = vector.nbytes + sys.getsizeof(answer)
+    for doc in context:
+        size += sys.getsizeof(doc.page_content) + sys.getsizeof(doc.metadata)
+    return size
+
+
+class SemanticAnswerCache:
+    """
+    LRU cache of answers with TTL expiry and a memory cap.
+    Lookups return the most similar cached question above the similarity threshold.
+    Every method runs synchronously on the event loop, so no locking is needed.
+    With shared_generation_path, invalidate also bumps a counter in that file, and a
+    worker seeing it changed drops its own answers before its next lookup or store
+    """
+
+    def __init__(self,
+                 enabled: bool,
+                 similarity_threshold: float,
+                 ttl_seconds: float,
+                 max_entries: int,
+                 max_bytes: int,
+                 shared_generation_path: str = ""):
+        self.enabled = enabled
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self.shared_generation_path = shared_generation_path
+        self._shared_generation = self._read_shared_generation()
+        self._entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._next_key = 0
+        self._size_bytes = 0
+        self._keys: List[int] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def lookup(self, question_embedding: Optional[List[float]]) -> Optional[CachedAnswer]:
+        """Return the cached answer for the most similar question, if any"""
+        if not self.enabled or question_embedding is None:
+            return None
+
+        self._sync_shared_generation()
+        self._expire()
+        if not self._entries:
+            ANSWER_CACHE_MISSES.inc()
+            return None
+
+        if self._matrix is None:
+            self._keys = list(self._entries.keys())
+            self._matrix = np.stack([self._entries[key].embedding for key in self._keys])
+
+        similarities = self._matrix @ _normalize(question_embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            ANSWER_CACHE_MISSES.inc()
+            return None
+
+        key = self._keys[best]
+        self._entries.move_to_end(key)
+        ANSWER_CACHE_HITS.inc()
+        logger.debug("answer_cache_hit", similarity=float(similarities[best]))
+        return self._entries[key]
+
+    def store(self,
+              question_embedding: Optional[List[float]],
+              answer: str,
+              context: List[Document],
+              generation: int):
+        """
+        Cache an answer. generation is the value of self.generation read before
+        running the graph, so answers computed across an invalidation are dropped
+        """
+        if not self.enabled or question_embedding is None:
+            return
+        self._sync_shared_generation()
+        if generation != self.generation:
+            return
+
+        vector = _normalize(question_embedding)
+        entry = CachedAnswer(answer=answer,
+                             context=context,
+                             embedding=vector,
+                             created_at=time.monotonic(),
+                             size_bytes=_estimate_size(answer, context, vector))
+        if entry.size_bytes > self.max_bytes:
+            return
+
+        self._entries[self._next_key] = entry
+        self._next_key += 1
+        self._size_bytes += entry.size_bytes
+        while len(self._entries) > self.max_entries:
+            self._evict_oldest("lru")
+        while self._size_bytes > self.max_bytes:
+            self._evict_oldest("memory")
+        self._changed()
+
+    def invalidate(self):
+        """Drop every cached answer, e.g. after new chunks were added to the vector store,
+        in every worker sharing the generation file"""
+        if self.shared_generation_path:
+            self._shared_generation = self._bump_shared_generation()
+        self._drop_all()
+
+    def _drop_all(self):
+        self.generation += 1
+        if not self._entries:
+            return
+        ANSWER_CACHE_EVICTIONS.labels("invalidation").inc(len(self._entries))
+        logger.info("answer_cache_invalidated", entries_dropped=len(self._entries))
+        self._entries.clear()
+        self._size_bytes = 0
+        self._changed()
+
+    def _read_shared_generation(self) -> int:
+        if not self.shared_generation_path:
+            return 0
+        try:
+            with open(self.shared_generation_path, encoding="utf-8") as generation_file:
+                return int(generation_file.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _bump_shared_generation(self) -> int:
+        with open(self.shared_generation_path + ".lock", "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            generation = self._read_shared_generation() + 1
+            # replaced rather than rewritten, readers never see a partly written value
+            temporary_path = f"{self.shared_generation_path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as generation_file:
+                generation_file.write(str(generation))
+            os.replace(temporary_path, self.shared_generation_path)
+        return generation
+
+    def _sync_shared_generation(self):
+        if not self.shared_generation_path:
+            return
+        shared_generation = self._read_shared_generation()
+        if shared_generation != self._shared_generation:
+            self._shared_generation = shared_generation
+            self._drop_all()
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items()
+                   if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            self._remove(key, "ttl")
+        if expired:
+            self._changed()
+
+    def _evict_oldest(self, reason: str):
+        key = next(iter(self._entries))
+        self._remove(key, reason)
+
+    def _remove(self, key: int, reason: str):
+        entry = self._entries.pop(key)
+        self._size_bytes -= entry.size_bytes
+        ANSWER_CACHE_EVICTIONS.labels(reason).inc()
+
+    def _changed(self):
+        self._matrix = None
+        ANSWER_CACHE_ENTRIES.set(len(self._entries))
+        ANSWER_CACHE_BYTES.set(self._size_bytes)
+
+
+def initialize_answer_cache():
+    """
+    Setup semantic answer cache from settings
+    """
+    logger.debug("initializing_answer_cache",
+                 enabled=settings.answer_cache_enabled,
+                 similarity_threshold=settings.answer_cache_similarity_threshold)
+    cache = SemanticAnswerCache(enabled=settings.answer_cache_enabled,
+                                similarity_threshold=settings.answer_cache_similarity_threshold,
+                                ttl_seconds=settings.answer_cache_ttl_seconds,
+                                max_entries=settings.answer_cache_max_entries,
+                                max_bytes=settings.answer_cache_max_bytes,
+                                shared_generation_path=settings.answer_cache_shared_generation_path)
+    logger.info("answer_cache_initialized")
+    return cache
+
+
+answer_cache = initialize_answer_cache()
@@ -1,6 +1,5 @@
 """Module to setup LLM chat model"""
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from app.core.logging import logger
 from app.config.pydantic_settings import settings
 
@@ -10,6 +9,7 @@ def initialize_chat_model():
     Google's model works best for our use case as it can be tried without 
     setting up billing information
     """
+    from langchain_google_genai import ChatGoogleGenerativeAI # pylint: disable=import-outside-toplevel
     logger.debug("initializing_chat_model", model=settings.LLM_model)
     model = ChatGoogleGenerativeAI(
         model=settings.LLM_model,
@@ -18,6 +18,3 @@ def initialize_chat_model():
         )
     logger.info("chat_model_initialized")
     return model
-
-
-llm = initialize_chat_model()
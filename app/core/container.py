@@ -0,0 +1,158 @@
+"""Module for the application's dependency container.
+Clients are built on first use instead of at import, and the modules that build
+them are imported then too, so importing the app and starting a worker doesn't
+wait for Chroma, the Google clients, LangGraph or Langfuse. The lifespan builds
+everything in a worker thread right after startup"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from app.core.logging import logger
+
+# pylint: disable=import-outside-toplevel
+
+
+def _build_embeddings():
+    from app.core.embeddings.embeddings_model import initialize_embeddings_model
+    return initialize_embeddings_model()
+
+
+# properties backed by an instance stored under another name
+_INSTANCE_NAMES = {"embeddings": "embeddings_and_cache", "embedding_cache": "embeddings_and_cache"}
+
+
+class Container:
+    """
+    Lazily built shared dependencies. Each one is built once, under its own lock, by
+    the first caller, so building one doesn't hold up callers of the others.
+    Async code awaits require first, building happens in a worker thread then.
+    Tests and benchmarks replace dependencies with override before use
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self.ready = False
+
+    def _resolve(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._locks_lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._instances:
+                start_time = time.perf_counter()
+                self._instances[name] = factory()
+                logger.debug("dependency_initialized",
+                             dependency=name,
+                             elapsed_seconds=round(time.perf_counter() - start_time, 3))
+            return self._instances[name]
+
+    def override(self, **instances: Any):
+        """Use the given instances instead of building them (embeddings=..., llm=...)"""
+        with self._locks_lock:
+            self._instances.update(instances)
+
+    def _built(self, name: str) -> bool:
+        return name in self._instances or _INSTANCE_NAMES.get(name) in self._instances
+
+    async def require(self, *names: str):
+        """
+        Build the named dependencies (property names) that don't exist yet in a worker
+        thread, so the event loop isn't held while they are built, by this call or by
+        the startup warm-up
+        """
+        missing = [name for name in names if not self._built(name)]
+        if missing:
+            await asyncio.to_thread(lambda: [getattr(self, name) for name in missing])
+
+    def _embeddings_and_cache(self):
+        return self._resolve("embeddings_and_cache", _build_embeddings)
+
+    @property
+    def embeddings(self):
+        """Embeddings of the configured backend with their cache and batching wrappers"""
+        if "embeddings" in self._instances:
+            return self._instances["embeddings"]
+        return self._embeddings_and_cache()[0]
+
+    @property
+    def embedding_cache(self):
+        """Persistent document embedding cache, or None when disabled"""
+        if "embeddings" in self._instances:
+            return self._instances.get("embedding_cache")
+        return self._embeddings_and_cache()[1]
+
+    @property
+    def vector_store(self):
+        """Vector store of the configured backend, checked against the embedding backend"""
+        def build():
+            from app.core.vector_store.vectorstore import initialize_vectorstore
+            return initialize_vectorstore(self.embeddings)
+        return self._resolve("vector_store", build)
+
+    @property
+    def vector_store_writer(self):
+        """Bulk writer of a Chroma vector store, None for the NumPy store"""
+        def build():
+            from app.core.vector_store.numpy_store import NumpyVectorStore
+            from app.core.vector_store.chroma_writer import initialize_chroma_writer
+            if isinstance(self.vector_store, NumpyVectorStore):
+                return None
+            return initialize_chroma_writer(self.vector_store)
+        return self._resolve("vector_store_writer", build)
+
+    @property
+    def llm(self):
+        """Chat model used by the generate step"""
+        def build():
+            from app.core.chat_model.llm import initialize_chat_model
+            return initialize_chat_model()
+        return self._resolve("llm", build)
+
+    @property
+    def graph(self):
+        """Compiled RAG graph"""
+        def build():
+            from app.core.langgraph.langgraph import build_graph
+            return build_graph()
+        return self._resolve("graph", build)
+
+    @property
+    def langfuse(self):
+        """Langfuse client"""
+        def build():
+            from app.core.observability.langfuse import initialize_langfuse
+            return initialize_langfuse()
+        return self._resolve("langfuse", build)
+
+    @property
+    def langfuse_callback_handler(self):
+        """LangChain callback handler tracing graph runs to Langfuse"""
+        def build():
+            from app.core.observability.langfuse import initialize_langfuse_callback_handler
+            _ = self.langfuse # the handler traces through the client built first
+            return initialize_langfuse_callback_handler()
+        return self._resolve("langfuse_callback_handler", build)
+
+    def initialize(self):
+        """Build every dependency, blocking, run it in a worker thread"""
+        start_time = time.perf_counter()
+        for name in ("langfuse", "langfuse_callback_handler", "vector_store", "vector_store_writer",
+                     "llm", "graph"):
+            getattr(self, name)
+        self.ready = True
+        logger.info("dependencies_initialized",
+                    elapsed_seconds=round(time.perf_counter() - start_time, 3))
+
+    def close(self):
+        """Flush pending traces of a Langfuse client that was built"""
+        langfuse_client: Optional[Any] = self._instances.get("langfuse")
+        if langfuse_client is not None:
+            langfuse_client.flush()
+
+
+container = Container()
@@ -0,0 +1,92 @@
+"""Module for the registry of embedding backends.
+settings.Embeddings_model names the backend, "auto" picks the one registered for
+settings.LLM_provider. The backend signature is recorded with the vector store
+so vectors of different models are never mixed in one collection"""
+
+from dataclasses import dataclass
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from app.config.pydantic_settings import settings
+
+GOOGLE_EMBEDDINGS_MODEL_NAME = "models/gemini-embedding-001"
+
+BatchEmbedFunction = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+@dataclass(frozen=True)
+class EmbeddingBackend:
+    """
+    Named embeddings factory. model_name identifies the vectors it produces,
+    remote backends are wrapped with the embedding cache and the query micro-batcher.
+    query_batch_fn returns the function embedding a batch of queries in one provider
+    request, for providers embedding queries and documents differently. Without it,
+    batched queries are embedded one by one with aembed_query
+    """
+    name: str
+    model_name: str
+    remote: bool
+    factory: Callable[[], Embeddings]
+    query_batch_fn: Optional[Callable[[Embeddings], BatchEmbedFunction]] = None
+
+
+def _google_embeddings() -> Embeddings:
+    # imported here so local backends don't load the provider client
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings # pylint: disable=import-outside-toplevel
+    return GoogleGenerativeAIEmbeddings(model=GOOGLE_EMBEDDINGS_MODEL_NAME,
+                                        google_api_key=settings.Google_API_Key) # type: ignore
+
+
+def _google_query_batch(embeddings: Embeddings) -> BatchEmbedFunction:
+    # the batch endpoint embeds as RETRIEVAL_DOCUMENT unless told otherwise
+    return partial(embeddings.aembed_documents, task_type="RETRIEVAL_QUERY") # type: ignore
+
+
+def _hashing_embeddings() -> Embeddings:
+    from app.core.embeddings.hashing_embeddings import HashingEmbeddings # pylint: disable=import-outside-toplevel
+    return HashingEmbeddings(dimension=settings.embedding_hashing_dimension)
+
+
+EMBEDDING_BACKENDS: Dict[str, EmbeddingBackend] = {}
+# embedding backend used with each LLM provider when Embeddings_model is "auto"
+PROVIDER_EMBEDDING_BACKENDS: Dict[str, str] = {"google": "google"}
+
+
+def register_embedding_backend(backend: EmbeddingBackend):
+    """Add or replace a backend in the registry"""
+    EMBEDDING_BACKENDS[backend.name] = backend
+
+
+register_embedding_backend(EmbeddingBackend(name="google",
+                                            model_name=GOOGLE_EMBEDDINGS_MODEL_NAME,
+                                            remote=True,
+                                            factory=_google_embeddings,
+                                            query_batch_fn=_google_query_batch))
+register_embedding_backend(EmbeddingBackend(name="hashing",
+                                            model_name=("hashing-"
+                                                        f"{settings.embedding_hashing_dimension}"),
+                                            remote=False,
+                                            factory=_hashing_embeddings))
+
+
+def select_embedding_backend(embeddings_model: str, llm_provider: str) -> EmbeddingBackend:
+    """Backend named by embeddings_model, or the llm_provider's backend for "auto" """
+    name = embeddings_model
+    if name == "auto":
+        if llm_provider not in PROVIDER_EMBEDDING_BACKENDS:
+            raise ValueError(f"no embedding backend registered for LLM provider {llm_provider}, "
+                             "set EMBEDDINGS_MODEL to one of "
+                             f"{', '.join(sorted(EMBEDDING_BACKENDS))}")
+        name = PROVIDER_EMBEDDING_BACKENDS[llm_provider]
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"unknown embedding backend {name}, "
+                         f"registered: {', '.join(sorted(EMBEDDING_BACKENDS))}")
+    return EMBEDDING_BACKENDS[name]
+
+
+def embedding_signature(backend: EmbeddingBackend, output_dimensionality: int) -> str:
+    """Identifies the vectors produced by a backend, including their truncation"""
+    signature = f"{backend.name}:{backend.model_name}"
+    if output_dimensionality:
+        signature += f":{output_dimensionality}d"
+    return signature
@@ -1,20 +1,44 @@
 """Module to oversee embedding calculation. 
-This is currently achieved within LangChain's VectorStore implementation"""
+Embeddings are computed with the vector store's embedding function and then
+written to the store with the precomputed vectors"""
 
 from typing import List
 from langfuse import observe
 from langchain_core.documents import Document
-from langchain_core.vectorstores.base import VectorStore
+from langchain_core.vectorstores import VectorStore
+from app.core.container import container
 from app.core.logging import logger
-from app.core.observability.langfuse import langfuse_callback_handler
+from app.core.metrics import track_stage
+from app.core.vector_store.vectorstore import aupsert_embedded_documents
+
+@observe(name="embedding_computation", capture_output=False)
+@track_stage("embed", count_items=len)
+async def compute_embeddings(chunks: List[Document],
+                             vector_store_instance: VectorStore) -> List[List[float]]:
+    """Compute chunk embeddings with the embedding function of the vector store"""
+    logger.debug("computing_embeddings", chunks_count=len(chunks))
+    vectors = await vector_store_instance.embeddings.aembed_documents( # type: ignore
+        [chunk.page_content for chunk in chunks])
+    if container.embedding_cache is not None:
+        logger.debug("embedding_cache_stats", **container.embedding_cache.stats())
+    return vectors
+
+@observe(name="vector_store_upsert", capture_input=False)
+@track_stage("upsert", count_items=len)
+async def add_embeddings_to_store(chunks: List[Document],
+                                  vectors: List[List[float]],
+                                  vector_store_instance: VectorStore) -> List[str]:
+    """Write chunks and their precomputed embeddings to the vector store,
+    in concurrent batches for Chroma"""
+    ids = await aupsert_embedded_documents(vector_store_instance, chunks, vectors,
+                                           container.vector_store_writer)
+    logger.debug("embeddings_stored", chunks_processed=len(chunks))
+    return ids
 
-@observe(name="embedding_computation")
 async def compute_embeddings_and_add_to_store(
         chunks: List[Document],
         vector_store_instance: VectorStore):
-    """The method add_documents already computes embeddings internally which we 
-    trace for using the observe() decorator because it doesn't seem to accept 
-    the langfuse callback handler even if we add a callback argument"""
-    logger.debug("computing_embeddings", chunks_count=len(chunks))
-    await vector_store_instance.aadd_documents(chunks, callbacks=[langfuse_callback_handler])
+    """Compute embeddings for a batch of chunks and add them to the vector store"""
+    vectors = await compute_embeddings(chunks, vector_store_instance)
+    await add_embeddings_to_store(chunks, vectors, vector_store_instance)
     logger.info("embeddings_computed_and_stored", chunks_processed=len(chunks))
@@ -0,0 +1,138 @@
+"""Module for a persistent, content-addressed embedding cache.
+Document embeddings are stored in SQLite as float32 blobs keyed by a hash of
+the embeddings model name and the chunk text, so only unseen chunks reach the provider"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.core.logging import logger
+from app.core.metrics import (EMBEDDING_CACHE_HITS, EMBEDDING_CACHE_MISSES,
+                              EMBEDDING_PROVIDER_CALLS, EMBEDDING_COST_SAVED)
+
+# SQLite limits the number of bound parameters per statement
+_SQLITE_MAX_VARIABLES = 500
+# Rough characters-per-token ratio used to estimate provider cost
+_CHARS_PER_TOKEN = 4
+
+
+class DiskCachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves document embeddings from a SQLite cache.
+    Query embeddings are passed through, as providers may embed queries with a
+    different task type than documents
+    """
+
+    def __init__(self,
+                 underlying: Embeddings,
+                 model_name: str,
+                 path: str,
+                 cost_per_million_tokens: float):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cost_per_million_tokens = cost_per_million_tokens
+        self.hits = 0
+        self.misses = 0
+        self.provider_calls = 0
+        self.cost_saved = 0.0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)")
+        self._connection.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique_keys), _SQLITE_MAX_VARIABLES):
+                batch = unique_keys[start:start + _SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _put_many(self, items: Dict[str, List[float]]):
+        rows = [(key, self.model_name, np.asarray(vector, dtype=np.float32).tobytes())
+                for key, vector in items.items()]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                rows)
+            self._connection.commit()
+
+    def _plan(self, texts: List[str], cached: Dict[str, List[float]], keys: List[str]):
+        """Return the unique texts missing from the cache and record hit stats"""
+        missing: Dict[str, str] = {}
+        saved_chars = 0
+        for key, text in zip(keys, texts):
+            if key in cached:
+                saved_chars += len(text)
+            elif key not in missing:
+                missing[key] = text
+        hits = len(texts) - len(missing)
+        saved_cost = (saved_chars / _CHARS_PER_TOKEN) * self.cost_per_million_tokens / 1_000_000
+        self.hits += hits
+        self.misses += len(missing)
+        self.cost_saved += saved_cost
+        EMBEDDING_CACHE_HITS.inc(hits)
+        EMBEDDING_CACHE_MISSES.inc(len(missing))
+        EMBEDDING_COST_SAVED.inc(saved_cost)
+        return missing
+
+    def _record_provider_call(self):
+        self.provider_calls += 1
+        EMBEDDING_PROVIDER_CALLS.inc()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        cached = self._get_many(keys)
+        missing = self._plan(texts, cached, keys)
+        if missing:
+            self._record_provider_call()
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._put_many(computed)
+            cached.update(computed)
+        return [cached[key] for key in keys]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        cached = await asyncio.to_thread(self._get_many, keys)
+        missing = self._plan(texts, cached, keys)
+        if missing:
+            self._record_provider_call()
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            await asyncio.to_thread(self._put_many, computed)
+            cached.update(computed)
+        logger.debug("embedding_cache_lookup",
+                     texts_count=len(texts),
+                     cache_misses=len(missing))
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.underlying.aembed_query(text)
+
+    def stats(self) -> dict:
+        """Embedding cache statistics since startup"""
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "provider_calls": self.provider_calls,
+            "estimated_cost_saved": round(self.cost_saved, 6),
+        }
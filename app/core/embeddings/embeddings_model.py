@@ -1,21 +1,56 @@
 """Module to setup embeddings model"""
 
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from app.core.embeddings.backends import select_embedding_backend, embedding_signature
+from app.core.embeddings.embedding_cache import DiskCachedEmbeddings
+from app.core.embeddings.micro_batcher import MicroBatchingEmbeddings
+from app.core.embeddings.truncated_embeddings import TruncatedEmbeddings
 from app.core.logging import logger
 from app.config.pydantic_settings import settings
 
+embedding_backend = select_embedding_backend(settings.Embeddings_model, settings.LLM_provider)
+# recorded with the vector store, which refuses vectors of another backend
+embedding_backend_signature = embedding_signature(embedding_backend,
+                                                  settings.embedding_output_dimensionality)
+
 def initialize_embeddings_model():
     """
-    Setup embeddings models here, add more models, etc
-    For our use case we don't really need more than HuggingFaceEmbeddings
+    Setup embeddings models here, backends are registered in backends.py
+    Document embeddings of remote backends are wrapped with the persistent embedding
+    cache and query embeddings with the micro-batcher when enabled, local backends
+    are cheaper to run than both. They see full-size vectors,
+    truncation to settings.embedding_output_dimensionality is applied last
+    return: (embeddings, embedding cache or None)
     """
     logger.debug("initializing_embeddings_model",
-                 model_name="sentence-transformers/all-MiniLM-L6-v2")
-    embeddings_model_instance = GoogleGenerativeAIEmbeddings(
-                                    model="models/gemini-embedding-001",
-                                    google_api_key=settings.Google_API_Key # type: ignore
-                                    )
+                 backend=embedding_backend.name,
+                 model_name=embedding_backend.model_name,
+                 embedding_cache_enabled=settings.embedding_cache_enabled,
+                 micro_batch_enabled=settings.embedding_micro_batch_enabled,
+                 output_dimensionality=settings.embedding_output_dimensionality or None)
+    provider_embeddings = embedding_backend.factory()
+    embeddings_model_instance = provider_embeddings
+    cache = None
+    if settings.embedding_cache_enabled and embedding_backend.remote:
+        cache = DiskCachedEmbeddings(
+            embeddings_model_instance,
+            model_name=embedding_backend.model_name,
+            path=settings.embedding_cache_path,
+            cost_per_million_tokens=settings.embeddings_cost_per_million_tokens)
+        embeddings_model_instance = cache
+    if settings.embedding_micro_batch_enabled and embedding_backend.remote:
+        # batches go straight to the provider so queries don't fill the document cache,
+        # embedded as queries since providers may embed queries and documents differently
+        query_batch_fn = None
+        if embedding_backend.query_batch_fn is not None:
+            query_batch_fn = embedding_backend.query_batch_fn(provider_embeddings)
+        embeddings_model_instance = MicroBatchingEmbeddings(
+            embeddings_model_instance,
+            max_batch_size=settings.embedding_micro_batch_max_size,
+            max_wait_seconds=settings.embedding_micro_batch_max_wait_ms / 1000,
+            batch_fn=query_batch_fn)
+    if settings.embedding_output_dimensionality:
+        embeddings_model_instance = TruncatedEmbeddings(
+            embeddings_model_instance,
+            dimensions=settings.embedding_output_dimensionality)
     logger.info("embeddings_model_initialized")
-    return embeddings_model_instance
-
-embeddings = initialize_embeddings_model()
+    return embeddings_model_instance, cache
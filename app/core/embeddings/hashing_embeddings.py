@@ -0,0 +1,73 @@
+"""Module for the local hashing embedder.
+Words and word pairs are hashed into a fixed number of signed buckets, so
+embedding needs no model download and no network, and a short question is
+embedded in microseconds instead of a provider round trip. Similarity is lexical:
+texts sharing words are close, synonyms are not"""
+
+import asyncio
+import hashlib
+import re
+from functools import lru_cache
+from typing import List, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+WORD_PATTERN = re.compile(r"\w+")
+HASHED_TOKENS_CACHE_SIZE = 1 << 18
+
+
+@lru_cache(maxsize=HASHED_TOKENS_CACHE_SIZE)
+def _hashed_token(token: str, dimension: int) -> Tuple[int, float]:
+    """Bucket and sign of a token, stable across processes unlike hash()"""
+    digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(),
+                            "little")
+    return digest % dimension, 1.0 if digest >> 63 else -1.0
+
+
+def _tokens(text: str) -> List[str]:
+    words = WORD_PATTERN.findall(text.lower())
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Feature hashing embeddings of word unigrams and bigrams with sublinear term
+    frequency, unit length. A batch is scattered into one matrix with NumPy, async
+    calls run in a worker thread to keep the event loop free
+    """
+
+    def __init__(self, dimension: int = 768):
+        self.dimension = dimension
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        rows: List[int] = []
+        columns: List[int] = []
+        signs: List[float] = []
+        for row, text in enumerate(texts):
+            for token in _tokens(text):
+                column, sign = _hashed_token(token, self.dimension)
+                rows.append(row)
+                columns.append(column)
+                signs.append(sign)
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)),
+                  np.asarray(signs, dtype=np.float32))
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed the questions of a batch query in one pass"""
+        return await self.aembed_documents(texts)
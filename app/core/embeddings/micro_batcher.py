@@ -0,0 +1,99 @@
+"""Module for micro-batching concurrent query embeddings.
+Queries embedded at the same time are collected for a short window and sent
+to the provider as one batched request"""
+
+import asyncio
+import time
+from typing import List, Optional, Set, Tuple
+from langchain_core.embeddings import Embeddings
+from app.core.embeddings.backends import BatchEmbedFunction
+from app.core.logging import logger
+from app.core.metrics import EMBEDDING_QUERY_BATCH_SIZE, EMBEDDING_QUERY_BATCH_WAIT_SECONDS
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that coalesces concurrent aembed_query calls.
+    A batch is sent when max_batch_size queries are waiting or max_wait_seconds after
+    the first one arrived, whichever comes first, and results are fanned back out.
+    batch_fn must embed the texts as queries, without it each query of a batch is
+    embedded with the underlying aembed_query.
+    Document embeddings and sync calls are passed through to the underlying embeddings
+    """
+
+    def __init__(self,
+                 underlying: Embeddings,
+                 max_batch_size: int,
+                 max_wait_seconds: float,
+                 batch_fn: Optional[BatchEmbedFunction] = None):
+        self.underlying = underlying
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.batch_fn = batch_fn or self._embed_queries_one_by_one
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        return await future
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in batched requests without waiting for a window"""
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.max_batch_size):
+            batch = texts[start:start + self.max_batch_size]
+            EMBEDDING_QUERY_BATCH_SIZE.observe(len(batch))
+            vectors.extend(await self.batch_fn(batch))
+        return vectors
+
+    async def _embed_queries_one_by_one(self, texts: List[str]) -> List[List[float]]:
+        return list(await asyncio.gather(*(self.underlying.aembed_query(text) for text in texts)))
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._embed_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        sent_at = time.perf_counter()
+        EMBEDDING_QUERY_BATCH_SIZE.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            EMBEDDING_QUERY_BATCH_WAIT_SECONDS.observe(sent_at - enqueued_at)
+        try:
+            vectors = await self.batch_fn([text for text, _, _ in batch])
+        except Exception as e:
+            logger.error("query_embedding_batch_failed", batch_size=len(batch), error=str(e))
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.underlying.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.underlying.aembed_documents(texts)
@@ -0,0 +1,52 @@
+"""Module for reduced-dimension embeddings.
+gemini-embedding-001 is trained Matryoshka-style, so the leading dimensions of
+a vector carry most of its meaning and can be used on their own once renormalized"""
+
+import asyncio
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def truncate_and_normalize(vectors: List[List[float]], dimensions: int) -> List[List[float]]:
+    """Keep the first `dimensions` values of each vector and rescale it to unit length"""
+    if len(vectors) == 0:
+        return []
+    matrix = np.asarray(vectors, dtype=np.float32)[:, :dimensions]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).tolist()
+
+
+class TruncatedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that truncates every vector to `dimensions` and renormalizes it.
+    Truncation happens after the wrapped embeddings, so the embedding cache keeps
+    full-size vectors and stays valid when the configured dimensionality changes
+    """
+
+    def __init__(self, underlying: Embeddings, dimensions: int):
+        self.underlying = underlying
+        self.dimensions = dimensions
+
+    def embed_query(self, text: str) -> List[float]:
+        return truncate_and_normalize([self.underlying.embed_query(text)], self.dimensions)[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return truncate_and_normalize(self.underlying.embed_documents(texts), self.dimensions)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = await self.underlying.aembed_query(text)
+        return truncate_and_normalize([vector], self.dimensions)[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = await self.underlying.aembed_documents(texts)
+        return truncate_and_normalize(vectors, self.dimensions)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, batched when the wrapped embeddings support it"""
+        if hasattr(self.underlying, "aembed_queries"):
+            vectors = await self.underlying.aembed_queries(texts) # type: ignore
+        else:
+            vectors = await asyncio.gather(*(self.underlying.aembed_query(text) for text in texts))
+        return truncate_and_normalize(list(vectors), self.dimensions)
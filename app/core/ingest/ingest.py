@@ -1,49 +1,205 @@
 """Module for document ingestion"""
 
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
 from langfuse import observe
+from langchain_core.documents import Document
 from app.exceptions.exceptions import DuplicateDocumentException
 from app.core.logging import logger
-from app.models.schemas import IngestRequest
-from app.core.loader.url_loader import load_document_from_url
+from app.config.pydantic_settings import settings
+from app.models.schemas import IngestRequest, BatchIngestItemResult
+from app.core.loader.url_loader import stream_document_from_url
 from app.core.loader.content_loader import load_document_from_content
-from app.core.loader.text_splitter import split_documents_with_tracing
+from app.core.loader.text_splitter import split_document_stream_with_tracing
 from app.core.embeddings.compute_embeddings import compute_embeddings_and_add_to_store
-from app.core.vector_store.vectorstore import is_already_ingested
-from app.core.vector_store.vectorstore import vector_store
+from app.core.vector_store.vectorstore import (is_already_ingested, source_identifier,
+                                               delete_documents_by_identifier)
+from app.core.container import container
+from app.core.cache.answer_cache import answer_cache
+from app.core.ingest.pipeline import IngestPipeline, ProgressCallback
+from app.core.ingest.refresh import RefreshResult, refresh_document_from_url_and_trace
 
-@observe(name="document_ingestion")    
-async def document_from_content_or_url_and_trace(request: IngestRequest):
-    """
-    Load document from URL if url is detected, otherwise load from content
-    Nest both chunk documents and embedding computations
-    return: List[Document] chunks
-    """
+# required by callers before ingesting. Traced functions only report once the
+# Langfuse client exists, it must be built before the first ingestion
+INGEST_DEPENDENCIES = ("langfuse", "embeddings", "vector_store", "vector_store_writer")
 
-    is_duplicate, source_check_value = is_already_ingested(request, vector_store)
-
-    if is_duplicate:
-        logger.warning("duplicate_document_rejected", source_check=source_check_value)
-        raise DuplicateDocumentException(
-            f"document already exists in vector store: {source_check_value}")
 
+async def stream_documents(request: IngestRequest,
+                           source_check: Optional[str] = None) -> AsyncIterator[Document]:
+    """
+    Load document from URL if url is detected, otherwise load from content.
+    Documents are yielded as they are parsed so splitting can start early.
+    source_check is the request's source_identifier when already computed
+    """
     if request.url:
         logger.info("loading_document_from_url",
                     url=str(request.url),
                     document_type=request.document_type)
-        docs = await load_document_from_url(request.url,
-                                            request.document_type)
+        documents_count = 0
+        async for doc in stream_document_from_url(request.url, request.document_type):
+            documents_count += 1
+            yield doc
         logger.info("url_documents_loaded",
-                    documents_count=len(docs))
+                    documents_count=documents_count)
     elif request.content: # deprecate warning
         logger.debug("loading_document_from_content",
                       document_type=request.document_type,
                       content_length=len(request.content))
         docs = load_document_from_content(request.content,
-                                          request.document_type)
+                                          request.document_type,
+                                          content_checksum=source_check)
         logger.info("document_loaded_from_content")
+        for doc in docs:
+            yield doc
     # else case should be handled by pydantic schema
 
-    chunks = split_documents_with_tracing(docs)
 
-    await compute_embeddings_and_add_to_store(chunks, vector_store)
-    return chunks
+def is_already_stored(source_check: str) -> bool:
+    """
+    is_already_ingested against the container's vector store. Blocking, run it in a
+    worker thread: the first call builds the store, and the store is queried while
+    the identifier index is still being built
+    """
+    return is_already_ingested(source_check, container.vector_store)
+
+
+@observe(name="document_ingestion")
+async def document_from_content_or_url_and_trace(request: IngestRequest,
+                                                 on_progress: Optional[ProgressCallback] = None):
+    """
+    Load document from URL if url is detected, otherwise load from content
+    Nest both chunk documents and embedding computations.
+    Documents stream through the ingestion pipeline, which splits, embeds and stores
+    chunks in batches of settings.ingest_embedding_batch_size as they are produced,
+    reporting progress through on_progress after each stored batch.
+    If the pipeline fails, the chunks it already stored are deleted
+    return: int number of chunks created
+    """
+    source_check_value = source_identifier(request)
+    is_duplicate = await asyncio.to_thread(is_already_stored, source_check_value)
+
+    if is_duplicate:
+        logger.warning("duplicate_document_rejected", source_check=source_check_value)
+        raise DuplicateDocumentException(
+            f"document already exists in vector store: {source_check_value}")
+
+    if on_progress is not None:
+        on_progress("loading", 0, 0)
+    pipeline = IngestPipeline(container.vector_store,
+                              batch_size=settings.ingest_embedding_batch_size,
+                              queue_size=settings.ingest_pipeline_queue_size,
+                              on_progress=on_progress)
+    try:
+        return await pipeline.run(stream_documents(request, source_check_value))
+    except BaseException:
+        # batches stored before the failure would make a retry a duplicate
+        await remove_partial_document(source_check_value)
+        raise
+    finally:
+        if pipeline.chunks_stored:
+            answer_cache.invalidate()
+
+
+async def remove_partial_document(source_check: str):
+    """Delete the chunks a failed ingestion already stored, a retry would be a duplicate otherwise"""
+    try:
+        deleted = await asyncio.to_thread(delete_documents_by_identifier,
+                                          container.vector_store, source_check)
+        if deleted:
+            logger.warning("partial_document_removed", source_check=source_check,
+                           chunks_deleted=deleted)
+    except Exception as e:
+        logger.error("partial_document_removal_failed", source_check=source_check, error=str(e))
+
+
+@observe(name="batch_document_ingestion")
+async def documents_from_batch_and_trace(
+        requests: List[IngestRequest]) -> List[BatchIngestItemResult]:
+    """
+    Ingest several documents. Documents are checked, fetched and split concurrently
+    up to settings.ingest_batch_concurrency, then their chunks are grouped across
+    documents into embedding batches of settings.ingest_embedding_batch_size.
+    Documents with refresh set are refreshed on their own instead of being batched.
+    A failing document doesn't abort the rest of the batch, the chunks it already
+    stored in earlier embedding batches are deleted so it can be ingested again
+    return: List[BatchIngestItemResult] in request order
+    """
+    semaphore = asyncio.Semaphore(settings.ingest_batch_concurrency)
+    source_checks = [source_identifier(request) for request in requests]
+    first_index_of_source: Dict[str, int] = {}
+    for index, source_check_value in enumerate(source_checks):
+        first_index_of_source.setdefault(source_check_value, index)
+
+    async def prepare(index: int, request: IngestRequest) -> Union[List[Document], RefreshResult]:
+        source_check_value = source_checks[index]
+        async with semaphore:
+            if first_index_of_source[source_check_value] != index:
+                raise DuplicateDocumentException(
+                    f"document is repeated in the batch: {source_check_value}")
+            if request.refresh:
+                return await refresh_document_from_url_and_trace(request)
+            if await asyncio.to_thread(is_already_stored, source_check_value):
+                raise DuplicateDocumentException(
+                    f"document already exists in vector store: {source_check_value}")
+            return await split_document_stream_with_tracing(
+                stream_documents(request, source_check_value))
+
+    logger.info("batch_ingest_started", documents_count=len(requests))
+    prepared = await asyncio.gather(*(prepare(i, request) for i, request in enumerate(requests)),
+                                    return_exceptions=True)
+
+    results: List[BatchIngestItemResult] = []
+    pending: List[Tuple[int, Document]] = []
+    for index, outcome in enumerate(prepared):
+        if isinstance(outcome, DuplicateDocumentException):
+            logger.warning("batch_ingest_duplicate", index=index, error=str(outcome))
+            results.append(BatchIngestItemResult(index=index, status="duplicate",
+                                                 message="Document already exists",
+                                                 chunks_created=0))
+        elif isinstance(outcome, RefreshResult):
+            results.append(BatchIngestItemResult(
+                index=index,
+                status="unchanged" if outcome.status == "unchanged" else "success",
+                message=("Document unchanged." if outcome.status == "unchanged"
+                         else f"Successfully {outcome.status} document."),
+                chunks_created=outcome.chunks_added,
+                chunks_deleted=outcome.chunks_deleted))
+        elif isinstance(outcome, BaseException):
+            logger.error("batch_ingest_document_failed", index=index, error=str(outcome))
+            results.append(BatchIngestItemResult(index=index, status="error",
+                                                 message=f"An error occurred: {outcome}",
+                                                 chunks_created=0))
+        else:
+            results.append(BatchIngestItemResult(index=index, status="success",
+                                                 message="Successfully ingested document.",
+                                                 chunks_created=len(outcome)))
+            pending.extend((index, chunk) for chunk in outcome)
+
+    batch_size = settings.ingest_embedding_batch_size
+    stored_any = False
+    failed_documents: Set[int] = set()
+    for start in range(0, len(pending), batch_size):
+        batch = [(index, chunk) for index, chunk in pending[start:start + batch_size]
+                 if index not in failed_documents]
+        if not batch:
+            continue
+        try:
+            await compute_embeddings_and_add_to_store([chunk for _, chunk in batch],
+                                                      container.vector_store)
+            stored_any = True
+        except Exception as e:
+            failed = {index for index, _ in batch}
+            failed_documents.update(failed)
+            logger.error("batch_ingest_embedding_failed", documents=sorted(failed), error=str(e))
+            for index in failed:
+                results[index] = BatchIngestItemResult(index=index, status="error",
+                                                       message=f"An error occurred: {e}",
+                                                       chunks_created=0)
+                await remove_partial_document(source_checks[index])
+
+    if stored_any:
+        answer_cache.invalidate()
+    logger.info("batch_ingest_completed",
+                documents_count=len(requests),
+                chunks_created=sum(result.chunks_created for result in results))
+    return results
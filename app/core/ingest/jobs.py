@@ -0,0 +1,150 @@
+"""Module for background ingestion jobs processed by a pool of workers.
+Jobs live in the memory of the app process that accepted them, their status is
+only found by that process, so the job API needs a single app worker"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.exceptions.exceptions import DuplicateDocumentException, JobQueueFullException
+from app.core.logging import logger
+from app.core.metrics import INGEST_JOB_QUEUE_DEPTH, INGEST_JOB_DURATION
+from app.config.pydantic_settings import settings
+from app.models.schemas import IngestRequest
+
+FINISHED_STAGES = ("completed", "duplicate", "failed")
+
+
+@dataclass
+class IngestionJob:
+    """State of a queued ingestion request, updated by the worker processing it.
+    The request is dropped once the job finishes, so retained jobs don't keep documents"""
+    request: Optional[IngestRequest]
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    stage: str = "queued"
+    chunks_embedded: int = 0
+    chunks_total: int = 0
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def update_progress(self, stage: str, chunks_embedded: int, chunks_total: int):
+        """Progress callback passed to document ingestion"""
+        self.stage = stage
+        self.chunks_embedded = chunks_embedded
+        self.chunks_total = chunks_total
+
+
+class IngestionJobQueue:
+    """
+    Bounded queue of ingestion jobs consumed by a fixed number of worker tasks.
+    Finished jobs are kept for status polling up to a retention limit
+    """
+
+    def __init__(self, workers: int, max_queue_size: int, retention: int):
+        self.workers = workers
+        self.retention = retention
+        self._queue: asyncio.Queue[IngestionJob] = asyncio.Queue(maxsize=max_queue_size)
+        self._jobs: OrderedDict[str, IngestionJob] = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        """Start worker tasks, must be called from a running event loop"""
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info("ingest_job_workers_started", workers=self.workers)
+
+    async def stop(self):
+        """Cancel worker tasks. Queued jobs that haven't started are dropped"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("ingest_job_workers_stopped", jobs_dropped=self._queue.qsize())
+
+    def submit(self, request: IngestRequest) -> IngestionJob:
+        """
+        Queue an ingestion request
+        raises: JobQueueFullException if the queue is at capacity
+        """
+        job = IngestionJob(request=request)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull as e:
+            logger.warning("ingest_job_queue_full", queue_size=self._queue.qsize())
+            raise JobQueueFullException("ingestion job queue is full") from e
+        self._jobs[job.job_id] = job
+        self._prune()
+        INGEST_JOB_QUEUE_DEPTH.set(self._queue.qsize())
+        logger.info("ingest_job_queued", job_id=job.job_id, queue_size=self._queue.qsize())
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Return a job by id, None if unknown or already pruned"""
+        return self._jobs.get(job_id)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.stage in FINISHED_STAGES]
+        for job_id in finished[:max(0, len(finished) - self.retention)]:
+            del self._jobs[job_id]
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            INGEST_JOB_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                await self._run(job, worker_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob, worker_id: int):
+        # imported on first job, the ingestion stack isn't needed to start the app
+        # pylint: disable=import-outside-toplevel
+        from app.core.container import container
+        from app.core.ingest.ingest import INGEST_DEPENDENCIES, document_from_content_or_url_and_trace
+        from app.core.ingest.refresh import refresh_document_from_url_and_trace
+        request: IngestRequest = job.request # type: ignore
+        job.started_at = datetime.now(timezone.utc)
+        start_time = time.perf_counter()
+        logger.info("ingest_job_started", job_id=job.job_id, worker_id=worker_id)
+        try:
+            await container.require(*INGEST_DEPENDENCIES)
+            if request.refresh:
+                refresh_result = await refresh_document_from_url_and_trace(
+                    request, on_progress=job.update_progress)
+                chunks_created = refresh_result.chunks_added
+            else:
+                chunks_created = await document_from_content_or_url_and_trace(
+                    request, on_progress=job.update_progress)
+            job.update_progress("completed", chunks_created, chunks_created)
+            logger.info("ingest_job_completed", job_id=job.job_id, chunks_created=chunks_created)
+        except DuplicateDocumentException as e:
+            job.stage = "duplicate"
+            job.error = "Document already exists"
+            logger.warning("ingest_job_duplicate", job_id=job.job_id, error=str(e))
+        except Exception as e:
+            job.stage = "failed"
+            job.error = str(e)
+            logger.error("ingest_job_failed", job_id=job.job_id, error=str(e))
+        finally:
+            job.request = None
+            job.finished_at = datetime.now(timezone.utc)
+            INGEST_JOB_DURATION.labels(job.stage).observe(time.perf_counter() - start_time)
+
+
+def initialize_ingestion_job_queue():
+    """
+    Setup background ingestion job queue, workers are started during FastAPI lifespan
+    """
+    logger.debug("initializing_ingestion_job_queue",
+                 workers=settings.ingest_job_workers,
+                 max_queue_size=settings.ingest_job_queue_size)
+    return IngestionJobQueue(workers=settings.ingest_job_workers,
+                             max_queue_size=settings.ingest_job_queue_size,
+                             retention=settings.ingest_job_retention)
+
+
+ingestion_jobs = initialize_ingestion_job_queue()
@@ -0,0 +1,140 @@
+"""Module for the streaming ingestion pipeline.
+Documents flow through split, embed and upsert stages connected by bounded
+queues, so loading, splitting, embedding and storage overlap and only a few
+batches of chunks are held in memory at any time"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+from langchain_core.vectorstores import VectorStore
+from langchain_core.documents import Document
+from app.core.logging import logger
+from app.core.metrics import record_stage
+from app.core.loader.text_splitter import text_splitter
+from app.core.embeddings.compute_embeddings import compute_embeddings, add_embeddings_to_store
+
+# Called with (stage, chunks_embedded, chunks_total) as ingestion advances
+ProgressCallback = Callable[[str, int, int], None]
+
+_END = None
+
+
+@dataclass
+class StageStats:
+    """Items processed by a pipeline stage and the time it spent working on them, for the
+    run's log. Prometheus gets the same measurements from the rag_stage_* families"""
+    items: int = 0
+    busy_seconds: float = 0.0
+
+    def record(self, items: int, seconds: float):
+        """Add processed items and busy time"""
+        self.items += items
+        self.busy_seconds += seconds
+
+    def throughput(self) -> float:
+        """Items per busy second"""
+        return self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+
+class IngestPipeline:
+    """
+    load -> split -> embed -> upsert pipeline with one task per stage.
+    Stages hand over batches of batch_size chunks through queues of queue_size batches,
+    a slow stage makes the previous ones wait instead of buffering the whole document
+    """
+
+    def __init__(self,
+                 vector_store_instance: VectorStore,
+                 batch_size: int,
+                 queue_size: int,
+                 on_progress: Optional[ProgressCallback] = None):
+        self.vector_store = vector_store_instance
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.on_progress = on_progress
+        self.stats = {stage: StageStats() for stage in ("load", "split", "embed", "upsert")}
+        self.chunks_split = 0
+        self.chunks_stored = 0
+
+    async def run(self, docs: AsyncIterator[Document]) -> int:
+        """
+        Ingest documents produced by docs
+        return: int number of chunks stored
+        """
+        start_time = time.perf_counter()
+        to_embed: asyncio.Queue[Optional[List[Document]]] = asyncio.Queue(self.queue_size)
+        to_upsert: asyncio.Queue[Optional[Tuple[List[Document], List[List[float]]]]] = \
+            asyncio.Queue(self.queue_size)
+        tasks = [asyncio.create_task(self._split(docs, to_embed)),
+                 asyncio.create_task(self._embed(to_embed, to_upsert)),
+                 asyncio.create_task(self._upsert(to_upsert))]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        logger.info("ingest_pipeline_completed",
+                    chunks_stored=self.chunks_stored,
+                    elapsed_seconds=round(time.perf_counter() - start_time, 3),
+                    **{f"{stage}_items_per_second": round(stats.throughput(), 1)
+                       for stage, stats in self.stats.items()})
+        return self.chunks_stored
+
+    def _report(self):
+        if self.on_progress is not None:
+            self.on_progress("embedding", self.chunks_stored, self.chunks_split)
+
+    async def _split(self, docs: AsyncIterator[Document], to_embed: asyncio.Queue):
+        batch: List[Document] = []
+        iterator = docs.__aiter__()
+        while True:
+            wait_start = time.perf_counter()
+            try:
+                doc = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            load_seconds = time.perf_counter() - wait_start
+            self.stats["load"].record(1, load_seconds)
+            record_stage("load", load_seconds, 1)
+
+            split_start = time.perf_counter()
+            chunks = await asyncio.to_thread(text_splitter.split_documents, [doc])
+            split_seconds = time.perf_counter() - split_start
+            self.stats["split"].record(len(chunks), split_seconds)
+            record_stage("split", split_seconds, len(chunks))
+            self.chunks_split += len(chunks)
+
+            batch.extend(chunks)
+            while len(batch) >= self.batch_size:
+                await to_embed.put(batch[:self.batch_size])
+                batch = batch[self.batch_size:]
+        if batch:
+            await to_embed.put(batch)
+        await to_embed.put(_END)
+
+    async def _embed(self, to_embed: asyncio.Queue, to_upsert: asyncio.Queue):
+        while (batch := await to_embed.get()) is not _END:
+            embed_start = time.perf_counter()
+            vectors = await compute_embeddings(batch, self.vector_store)
+            self.stats["embed"].record(len(batch), time.perf_counter() - embed_start)
+            await to_upsert.put((batch, vectors))
+        await to_upsert.put(_END)
+
+    async def _upsert(self, to_upsert: asyncio.Queue):
+        while (item := await to_upsert.get()) is not _END:
+            batch, vectors = item
+            upsert_start = time.perf_counter()
+            store = asyncio.ensure_future(add_embeddings_to_store(batch, vectors, self.vector_store))
+            try:
+                await asyncio.shield(store)
+            except asyncio.CancelledError:
+                # a cancelled run deletes what was stored, let the write in flight land first
+                await asyncio.wait([store])
+                raise
+            self.stats["upsert"].record(len(batch), time.perf_counter() - upsert_start)
+            self.chunks_stored += len(batch)
+            self._report()
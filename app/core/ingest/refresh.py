@@ -0,0 +1,153 @@
+"""Module for incremental re-ingestion of url documents.
+The url is downloaded with a conditional request using the validators stored in
+chunk metadata, and when it changed only chunks whose text isn't stored yet are
+embedded, so refreshing a document costs in proportion to what changed"""
+
+import asyncio
+import hashlib
+import weakref
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from langfuse import observe
+from langchain_core.documents import Document
+from app.exceptions.exceptions import DocumentNotModifiedException
+from app.core.logging import logger
+from app.core.metrics import INGEST_REFRESH_CHUNKS
+from app.config.pydantic_settings import settings
+from app.models.schemas import IngestRequest
+from app.core.loader.url_loader import stream_document_from_url, conditional_headers
+from app.core.loader.text_splitter import split_document_stream_with_tracing
+from app.core.embeddings.compute_embeddings import compute_embeddings_and_add_to_store
+from app.core.container import container
+from app.core.vector_store.vectorstore import (source_identifier, update_document_metadata,
+                                               delete_documents)
+from app.core.cache.answer_cache import answer_cache
+from app.core.ingest.pipeline import ProgressCallback
+
+_refresh_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+@dataclass
+class RefreshResult:
+    """Outcome of a url refresh, status is created, updated or unchanged"""
+    status: str
+    chunks_added: int
+    chunks_deleted: int
+    chunks_kept: int
+
+
+@dataclass
+class ChunkDiff:
+    """New chunks to embed, stored chunks to keep (with their new metadata) and stale ids"""
+    added: List[Document]
+    kept: List[Tuple[str, Document]]
+    stale_ids: List[str]
+
+
+def chunk_hash(text: str) -> str:
+    """Content hash used to match new chunks with stored ones"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def diff_chunks(stored_ids: List[str],
+                stored_texts: List[str],
+                new_chunks: List[Document]) -> ChunkDiff:
+    """
+    Match new chunks with stored chunks by content hash. Repeated texts are matched
+    one to one, so a text appearing twice needs two stored chunks to be kept twice
+    """
+    stored_by_hash: Dict[str, List[str]] = {}
+    for doc_id, text in zip(stored_ids, stored_texts):
+        stored_by_hash.setdefault(chunk_hash(text), []).append(doc_id)
+
+    diff = ChunkDiff(added=[], kept=[], stale_ids=[])
+    for chunk in new_chunks:
+        matching_ids = stored_by_hash.get(chunk_hash(chunk.page_content))
+        if matching_ids:
+            diff.kept.append((matching_ids.pop(), chunk))
+        else:
+            diff.added.append(chunk)
+    diff.stale_ids = [doc_id for ids in stored_by_hash.values() for doc_id in ids]
+    return diff
+
+
+@observe(name="document_refresh")
+async def refresh_document_from_url_and_trace(
+        request: IngestRequest,
+        on_progress: Optional[ProgressCallback] = None) -> RefreshResult:
+    """
+    Refresh an url document. Sources answering 304 Not Modified are skipped, otherwise
+    new chunks are embedded and stored, kept chunks get the new metadata (offsets, ETag)
+    and stale chunks are deleted. An url that was never ingested is ingested in full.
+    Refreshes of the same url are serialized
+    return: RefreshResult
+    """
+    source_check_value = source_identifier(request)
+    lock = _refresh_locks.setdefault(source_check_value, asyncio.Lock())
+    async with lock:
+        stored = await asyncio.to_thread(container.vector_store.get,
+                                         where={"identifier": source_check_value})
+        stored_ids: List[str] = stored["ids"]
+        stored_metadatas = stored["metadatas"] or []
+        headers = conditional_headers(stored_metadatas[0] or {}) if stored_ids else None
+
+        if on_progress is not None:
+            on_progress("loading", 0, 0)
+        try:
+            new_chunks = await split_document_stream_with_tracing(
+                stream_document_from_url(request.url, # type: ignore
+                                         request.document_type,
+                                         headers=headers))
+        except DocumentNotModifiedException:
+            INGEST_REFRESH_CHUNKS.labels("kept").inc(len(stored_ids))
+            logger.info("document_refresh_not_modified",
+                        source_check=source_check_value,
+                        chunks_kept=len(stored_ids))
+            return RefreshResult(status="unchanged", chunks_added=0, chunks_deleted=0,
+                                 chunks_kept=len(stored_ids))
+
+        diff = diff_chunks(stored_ids, stored["documents"], new_chunks)
+        logger.debug("document_refresh_diffed",
+                     source_check=source_check_value,
+                     chunks_added=len(diff.added),
+                     chunks_kept=len(diff.kept),
+                     chunks_stale=len(diff.stale_ids))
+
+        batch_size = settings.ingest_embedding_batch_size
+        for start in range(0, len(diff.added), batch_size):
+            if on_progress is not None:
+                on_progress("embedding", start, len(diff.added))
+            await compute_embeddings_and_add_to_store(diff.added[start:start + batch_size],
+                                                      container.vector_store)
+
+        stored_metadata_by_id = dict(zip(stored_ids, stored_metadatas))
+        changed = [(doc_id, chunk.metadata) for doc_id, chunk in diff.kept
+                   if stored_metadata_by_id[doc_id] != chunk.metadata]
+        await asyncio.to_thread(update_document_metadata, container.vector_store,
+                                [doc_id for doc_id, _ in changed],
+                                [metadata for _, metadata in changed])
+        await asyncio.to_thread(delete_documents, container.vector_store, diff.stale_ids)
+
+    if diff.added or diff.stale_ids:
+        answer_cache.invalidate()
+    INGEST_REFRESH_CHUNKS.labels("added").inc(len(diff.added))
+    INGEST_REFRESH_CHUNKS.labels("kept").inc(len(diff.kept))
+    INGEST_REFRESH_CHUNKS.labels("deleted").inc(len(diff.stale_ids))
+
+    if not stored_ids:
+        status = "created"
+    elif diff.added or diff.stale_ids:
+        status = "updated"
+    else:
+        status = "unchanged"
+    logger.info("document_refresh_completed",
+                source_check=source_check_value,
+                status=status,
+                chunks_added=len(diff.added),
+                chunks_kept=len(diff.kept),
+                chunks_deleted=len(diff.stale_ids),
+                metadata_updated=len(changed))
+    return RefreshResult(status=status,
+                         chunks_added=len(diff.added),
+                         chunks_deleted=len(diff.stale_ids),
+                         chunks_kept=len(diff.kept))
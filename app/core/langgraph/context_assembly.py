@@ -0,0 +1,149 @@
+"""Module to assemble the prompt context from retrieved chunks.
+Neighbouring chunks repeat up to chunk_overlap characters of each other and the
+same passage can be ingested from several sources, so retrieved chunks are
+merged, deduplicated and cut to a token budget before they reach the LLM"""
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from langchain_core.documents import Document
+
+# rough average for English text, no tokenizer is available locally for the chat model
+CHARS_PER_TOKEN = 4
+SHINGLE_WORDS = 5
+MIN_TRUNCATED_TOKENS = 50
+# chunk texts are stripped, so neighbours the splitter cut at a "\n\n", "\n" or " "
+# separator are that many whitespace characters apart. A wider gap may hold a chunk
+# that wasn't retrieved
+MAX_SEPARATOR_GAP = 2
+
+
+@dataclass
+class Segment:
+    """Contiguous text of one source built from one or more chunks"""
+    text: str
+    rank: int
+    start: Optional[int] = None
+
+    @property
+    def end(self) -> Optional[int]:
+        return None if self.start is None else self.start + len(self.text)
+
+
+@dataclass
+class AssembledContext:
+    """Prompt context and token counts before and after assembly"""
+    text: str
+    chunks: int
+    segments: int
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _source_key(doc: Document) -> Optional[Tuple]:
+    source = doc.metadata.get("identifier") or doc.metadata.get("source_url")
+    if source is None:
+        return None
+    return source, doc.metadata.get("page")
+
+
+def merge_adjacent_chunks(docs: List[Document]) -> List[Segment]:
+    """
+    Merge chunks of the same source (and page) whose start_index offsets overlap, touch or
+    are only a separator apart, keeping the overlapping text once and restoring the
+    separator as whitespace. Segments are ordered by their best retrieval rank
+    """
+    segments: List[Segment] = []
+    by_source: Dict[Tuple, List[Tuple[int, int, Document]]] = {}
+    for rank, doc in enumerate(docs):
+        key = _source_key(doc)
+        start = doc.metadata.get("start_index")
+        if key is None or start is None:
+            segments.append(Segment(text=doc.page_content, rank=rank))
+        else:
+            by_source.setdefault(key, []).append((start, rank, doc))
+
+    for chunks in by_source.values():
+        chunks.sort(key=lambda item: item[0])
+        current: Optional[Segment] = None
+        for start, rank, doc in chunks:
+            if current is not None and start <= current.end + MAX_SEPARATOR_GAP: # type: ignore
+                gap = start - current.end # type: ignore
+                if gap > 0:
+                    # same length as the stripped separator, so segment offsets stay exact
+                    current.text += ("\n\n" if gap == 2 else " ") + doc.page_content
+                else:
+                    current.text += doc.page_content[-gap:]
+                current.rank = min(current.rank, rank)
+                continue
+            current = Segment(text=doc.page_content, rank=rank, start=start)
+            segments.append(current)
+
+    return sorted(segments, key=lambda segment: segment.rank)
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    words = text.lower().split()
+    if len(words) <= SHINGLE_WORDS:
+        return {tuple(words)}
+    return {tuple(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def remove_near_duplicates(segments: List[Segment], threshold: float) -> List[Segment]:
+    """Drop segments whose word shingles are mostly contained in a better ranked segment"""
+    kept: List[Tuple[Segment, Set[Tuple[str, ...]]]] = []
+    for segment in segments:
+        shingles = _shingles(segment.text)
+        if not shingles:
+            continue
+        if any(len(shingles & kept_shingles) / len(shingles) >= threshold
+               for _, kept_shingles in kept):
+            continue
+        kept.append((segment, shingles))
+    return [segment for segment, _ in kept]
+
+
+def fit_token_budget(segments: List[Segment], token_budget: int) -> List[str]:
+    """
+    Take segments in rank order until the budget is spent. The first segment that
+    doesn't fit is cut at a word boundary if enough budget is left to be useful
+    """
+    if token_budget <= 0:
+        return [segment.text for segment in segments]
+    texts: List[str] = []
+    remaining = token_budget
+    for segment in segments:
+        tokens = estimate_tokens(segment.text)
+        if tokens <= remaining:
+            texts.append(segment.text)
+            remaining -= tokens
+            continue
+        if remaining >= MIN_TRUNCATED_TOKENS:
+            cut = segment.text[:remaining * CHARS_PER_TOKEN]
+            texts.append(cut.rsplit(maxsplit=1)[0] if " " in cut else cut)
+        break
+    return texts
+
+
+def assemble_context(docs: List[Document],
+                     token_budget: int,
+                     near_duplicate_threshold: float) -> AssembledContext:
+    """Build the prompt context for retrieved docs, most relevant text first"""
+    tokens_before = estimate_tokens("\n\n".join(doc.page_content for doc in docs))
+    segments = remove_near_duplicates(merge_adjacent_chunks(docs), near_duplicate_threshold)
+    texts = fit_token_budget(segments, token_budget)
+    text = "\n\n".join(texts)
+    return AssembledContext(text=text,
+                            chunks=len(docs),
+                            segments=len(texts),
+                            tokens_before=tokens_before,
+                            tokens_after=estimate_tokens(text))
@@ -1,30 +1,79 @@
 """Module for LangGraph RAG Graph functions invoke"""
 
 
+from typing import List, Optional
+from langchain_core.documents import Document
 from langgraph.graph import START, StateGraph
 from app.core.langgraph.models import State
-from app.core.vector_store.vectorstore import vector_store
+from app.core.container import container
 from app.core.chat_model.prompt import prompt
-from app.core.chat_model.llm import llm
+from app.core.langgraph.context_assembly import assemble_context
 from app.core.logging import logger
+from app.core.metrics import (CONTEXT_PROMPT_TOKENS, CONTEXT_TOKENS_SAVED, LLM_TOKENS,
+                              track_stage)
+from app.config.pydantic_settings import settings
 
 
-def retrieve(state: State):
-    """LangGraph retrieve step node for RAG"""
+@track_stage("retrieve", count_items=len)
+async def search_documents(question: str,
+                           question_embedding: Optional[List[float]]) -> List[Document]:
+    """Vector search for the question, by its embedding when already computed.
+    Uses the async search so concurrent queries don't hold the event loop.
+    The question is embedded with aembed_query rather than by the store, Chroma's
+    asimilarity_search calls the sync embed_query and would bypass the micro-batcher"""
+    if not question_embedding:
+        question_embedding = await container.embeddings.aembed_query(question)
+    return await container.vector_store.asimilarity_search_by_vector(question_embedding)
+
+
+async def retrieve(state: State):
+    """LangGraph retrieve step node for RAG.
+    Reuses the question embedding when the caller already computed it, and the
+    documents when the caller already searched (batch queries search together)"""
+    if state.get("context") is not None:
+        logger.debug("documents_already_retrieved", count=len(state["context"]))
+        return {"context": state["context"]}
     logger.debug("retrieving_relevant_documents")
-    retrieved_docs = vector_store.similarity_search(state["question"])
+    retrieved_docs = await search_documents(state["question"], state.get("question_embedding"))
     logger.debug("documents_retrieved", count=len(retrieved_docs))
     return {"context": retrieved_docs}
 
 
+@track_stage("assemble")
+async def assemble(state: State):
+    """LangGraph context assembly node for RAG.
+    Merges overlapping chunks, drops near-duplicates and fits the context to the token budget.
+    Retrieved documents in state["context"] are kept as they are for the response sources"""
+    assembled = assemble_context(state["context"],
+                                 token_budget=settings.context_token_budget,
+                                 near_duplicate_threshold=settings.context_near_duplicate_threshold)
+    CONTEXT_PROMPT_TOKENS.observe(assembled.tokens_after)
+    CONTEXT_TOKENS_SAVED.inc(assembled.tokens_saved)
+    logger.info("context_assembled",
+                chunks=assembled.chunks,
+                segments=assembled.segments,
+                tokens_before=assembled.tokens_before,
+                tokens_after=assembled.tokens_after,
+                tokens_saved=assembled.tokens_saved)
+    return {"context_text": assembled.text, "context_tokens_saved": assembled.tokens_saved}
 
-def generate(state: State):
-    """LangGraph generation step node for RAG"""
-    docs_content = "\n\n".join(doc.page_content for doc in state["context"])
-    messages = prompt.invoke({"question": state["question"], "context": docs_content})
-    response = llm.invoke(messages)
+
+@track_stage("generate")
+async def generate(state: State):
+    """LangGraph generation step node for RAG.
+    Token usage is exported when the chat model reports it"""
+    messages = await prompt.ainvoke({"question": state["question"],
+                                     "context": state["context_text"]})
+    response = await container.llm.ainvoke(messages)
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        LLM_TOKENS.labels("prompt").inc(usage.get("input_tokens", 0))
+        LLM_TOKENS.labels("completion").inc(usage.get("output_tokens", 0))
     return {"answer": response.content}
 
-graph_builder = StateGraph(State).add_sequence([retrieve, generate])
-graph_builder.add_edge(START, "retrieve")
-graph = graph_builder.compile()
+
+def build_graph():
+    """Compile the retrieve, assemble, generate RAG graph"""
+    graph_builder = StateGraph(State).add_sequence([retrieve, assemble, generate])
+    graph_builder.add_edge(START, "retrieve")
+    return graph_builder.compile()
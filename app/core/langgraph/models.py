@@ -6,5 +6,8 @@ from typing_extensions import List, TypedDict
 class State(TypedDict):
     """LangGraph State class with enough fields for RAG"""
     question: str
+    question_embedding: List[float]
     context: List[Document]
+    context_text: str
+    context_tokens_saved: int
     answer: str
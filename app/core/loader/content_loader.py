@@ -1,16 +1,20 @@
 """Module for utility to load a document from URL given a type"""
 
 import hashlib
-from typing import List
+from typing import List, Optional
 from langfuse import observe
 from langchain_core.documents import Document
 from app.models.schemas import DocumentType
 
 @observe(name="load_document_from_content")
-def load_document_from_content(content: str, document_type: DocumentType) -> List[Document]:
-    """Load document from direct content"""
+def load_document_from_content(content: str,
+                               document_type: DocumentType,
+                               content_checksum: Optional[str] = None) -> List[Document]:
+    """Load document from direct content.
+    Pass the SHA-256 checksum when the caller already computed it for the duplicate check"""
 
-    content_checksum = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    if content_checksum is None:
+        content_checksum = hashlib.sha256(content.encode('utf-8')).hexdigest()
 
     metadata = {
         "identifier": content_checksum,
@@ -0,0 +1,142 @@
+"""Module for the shared async HTTP client used to download documents.
+A single pooled client keeps connections alive across ingests, limits concurrent
+downloads per host and caps download size while streaming the response"""
+
+import asyncio
+import importlib.util
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+from app.exceptions.exceptions import DocumentTooLargeException
+from app.core.logging import logger
+from app.config.pydantic_settings import settings
+
+
+@dataclass
+class FetchedResource:
+    """Downloaded response body with the headers needed by the loaders"""
+    url: str
+    status_code: int
+    content: bytes
+    headers: httpx.Headers
+    charset: Optional[str]
+
+    @property
+    def text(self) -> str:
+        """Body decoded with the response charset, utf-8 if none was declared"""
+        return self.content.decode(self.charset or "utf-8", errors="replace")
+
+
+class AsyncHttpFetcher:
+    """
+    Pooled async HTTP client with per-host concurrency limits and a download size cap.
+    The underlying httpx client is created on first use so it binds to the running loop
+    """
+
+    def __init__(self,
+                 limits: httpx.Limits,
+                 timeout: httpx.Timeout,
+                 per_host_concurrency: int,
+                 max_download_bytes: int,
+                 http2: bool,
+                 user_agent: str):
+        self.limits = limits
+        self.timeout = timeout
+        self.per_host_concurrency = per_host_concurrency
+        self.max_download_bytes = max_download_bytes
+        self.http2 = http2
+        self.user_agent = user_agent
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared httpx client"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self.limits,
+                                             timeout=self.timeout,
+                                             http2=self.http2,
+                                             follow_redirects=True,
+                                             headers={"User-Agent": self.user_agent})
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_semaphores[host]
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchedResource:
+        """
+        Download url, streaming the body so oversized documents are aborted early.
+        For conditional requests (If-None-Match / If-Modified-Since headers) a
+        304 Not Modified is returned as a resource with an empty body
+        raises: httpx.HTTPError on transport errors or error status codes,
+        DocumentTooLargeException if the body exceeds max_download_bytes
+        """
+        async with self._host_semaphore(url):
+            async with self.client.stream("GET", url, headers=headers) as response:
+                if response.status_code == httpx.codes.NOT_MODIFIED:
+                    logger.debug("http_fetch_not_modified", url=url)
+                    return FetchedResource(url=str(response.url),
+                                           status_code=response.status_code,
+                                           content=b"",
+                                           headers=response.headers,
+                                           charset=None)
+                response.raise_for_status()
+                declared_length = response.headers.get("content-length")
+                if declared_length and int(declared_length) > self.max_download_bytes:
+                    raise DocumentTooLargeException(
+                        f"document is {declared_length} bytes, limit is {self.max_download_bytes}")
+
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) > self.max_download_bytes:
+                        raise DocumentTooLargeException(
+                            f"document exceeds download limit of {self.max_download_bytes} bytes")
+
+                logger.debug("http_fetch_completed",
+                             url=url,
+                             status_code=response.status_code,
+                             http_version=response.http_version,
+                             content_length=len(body))
+                return FetchedResource(url=str(response.url),
+                                       status_code=response.status_code,
+                                       content=bytes(body),
+                                       headers=response.headers,
+                                       charset=response.charset_encoding)
+
+    async def aclose(self):
+        """Close pooled connections, called during FastAPI lifespan shutdown"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def initialize_http_fetcher():
+    """
+    Setup the shared HTTP client used by the url loader.
+    HTTP/2 is only enabled when the optional h2 package is available
+    """
+    http2 = settings.http2_enabled and importlib.util.find_spec("h2") is not None
+    logger.debug("initializing_http_fetcher",
+                 http2=http2,
+                 max_connections=settings.http_max_connections,
+                 per_host_concurrency=settings.http_per_host_concurrency)
+    fetcher = AsyncHttpFetcher(
+        limits=httpx.Limits(max_connections=settings.http_max_connections,
+                            max_keepalive_connections=settings.http_max_keepalive_connections,
+                            keepalive_expiry=settings.http_keepalive_expiry_seconds),
+        timeout=httpx.Timeout(settings.http_timeout_seconds,
+                              connect=settings.http_connect_timeout_seconds),
+        per_host_concurrency=settings.http_per_host_concurrency,
+        max_download_bytes=settings.http_max_download_bytes,
+        http2=http2,
+        user_agent=f"{settings.Project_name}/{settings.Version}")
+    logger.info("http_fetcher_initialized")
+    return fetcher
+
+
+http_fetcher = initialize_http_fetcher()
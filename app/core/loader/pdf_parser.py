@@ -0,0 +1,150 @@
+"""Module for in-memory PDF parsing.
+Page text extraction is spread across a process pool and pages are yielded
+as soon as their range has been extracted. The PDF is shared with the pool
+through shared memory, tasks only carry page ranges"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from multiprocessing import shared_memory
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from langchain_core.documents import Document
+from app.core.logging import logger
+from app.config.pydantic_settings import settings
+
+
+def count_pdf_pages(content: bytes) -> int:
+    """Number of pages of an in-memory PDF"""
+    from pypdf import PdfReader # pylint: disable=import-outside-toplevel
+    return len(PdfReader(BytesIO(content)).pages)
+
+
+def extract_pdf_pages(content: bytes, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Extract text of pages [start, stop) from an in-memory PDF"""
+    from pypdf import PdfReader # pylint: disable=import-outside-toplevel
+    reader = PdfReader(BytesIO(content))
+    return [(number, reader.pages[number].extract_text()) for number in range(start, stop)]
+
+
+# (name, reader) of the last shared PDF opened by this pool worker process
+_worker_document: Optional[Tuple[str, Any]] = None
+
+
+def _read_shared_document(name: str, size: int) -> Any:
+    global _worker_document # pylint: disable=global-statement
+    if _worker_document is None or _worker_document[0] != name:
+        from pypdf import PdfReader # pylint: disable=import-outside-toplevel
+        if sys.version_info >= (3, 13):
+            # the parent owns and unlinks the block
+            memory = shared_memory.SharedMemory(name=name, track=False) # pylint: disable=unexpected-keyword-arg
+        else:
+            # spawned workers register it with the parent's resource tracker, which
+            # keeps one entry per block, removed when the parent unlinks it
+            memory = shared_memory.SharedMemory(name=name)
+        try:
+            content = bytes(memory.buf[:size])
+        finally:
+            memory.close()
+        _worker_document = (name, PdfReader(BytesIO(content)))
+    return _worker_document[1]
+
+
+def extract_shared_pdf_pages(name: str, size: int, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Extract text of pages [start, stop) of the PDF in shared memory block `name`.
+    Runs inside pool worker processes: each worker copies and opens a PDF once,
+    for its first range, so tasks only take and return small picklable values"""
+    reader = _read_shared_document(name, size)
+    return [(number, reader.pages[number].extract_text()) for number in range(start, stop)]
+
+
+def page_ranges(page_count: int, tasks: int) -> List[Tuple[int, int]]:
+    """Split page_count pages into at most `tasks` contiguous ranges of similar size"""
+    tasks = max(1, min(tasks, page_count))
+    size, remainder = divmod(page_count, tasks)
+    ranges = []
+    start = 0
+    for i in range(tasks):
+        stop = start + size + (1 if i < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+class PdfParser:
+    """
+    Parses PDFs from bytes without temporary files.
+    Small PDFs are parsed in a thread, larger ones are split into page ranges
+    parsed in parallel by a lazily created process pool. Workers are spawned rather
+    than forked, forking the multithreaded app process can deadlock them
+    """
+
+    def __init__(self, workers: int, parallel_min_pages: int, tasks_per_worker: int):
+        self.workers = workers
+        self.parallel_min_pages = parallel_min_pages
+        self.tasks_per_worker = tasks_per_worker
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Process pool for page extraction"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def iter_pages(self, content: bytes) -> AsyncIterator[Document]:
+        """
+        Yield one document per page as page ranges finish parsing, so pages can be
+        split while the rest of the PDF is still being extracted.
+        Pages are not yielded in order, metadata["page"] holds the 1-based page number
+        """
+        page_count = await asyncio.to_thread(count_pdf_pages, content)
+        if self.workers <= 1 or page_count < self.parallel_min_pages:
+            pages = await asyncio.to_thread(extract_pdf_pages, content, 0, page_count)
+            for number, text in pages:
+                yield Document(page_content=text, metadata={"page": number + 1})
+            return
+
+        ranges = page_ranges(page_count, self.workers * self.tasks_per_worker)
+        logger.debug("pdf_parallel_parsing_started", pages=page_count, tasks=len(ranges))
+        memory = shared_memory.SharedMemory(create=True, size=len(content))
+        futures: List[asyncio.Future] = []
+        try:
+            memory.buf[:len(content)] = content
+            loop = asyncio.get_running_loop()
+            futures = [loop.run_in_executor(self.pool, extract_shared_pdf_pages,
+                                            memory.name, len(content), start, stop)
+                       for start, stop in ranges]
+            for future in asyncio.as_completed(futures):
+                for number, text in await future:
+                    yield Document(page_content=text, metadata={"page": number + 1})
+        finally:
+            for future in futures:
+                future.cancel()
+            # workers copy the PDF out when they start a range, a cancelled range
+            # starting after the unlink fails and its result is dropped
+            memory.close()
+            memory.unlink()
+
+    def shutdown(self):
+        """Stop the process pool, called during FastAPI lifespan shutdown"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def initialize_pdf_parser():
+    """
+    Setup PDF parser, settings.pdf_parse_workers of 0 uses one worker per CPU core
+    """
+    workers = settings.pdf_parse_workers or (os.cpu_count() or 1)
+    logger.debug("initializing_pdf_parser", workers=workers)
+    return PdfParser(workers=workers,
+                     parallel_min_pages=settings.pdf_parallel_min_pages,
+                     tasks_per_worker=settings.pdf_tasks_per_worker)
+
+
+pdf_parser = initialize_pdf_parser()
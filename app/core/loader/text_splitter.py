@@ -1,14 +1,20 @@
 """Module to configure the LangChain text splitter"""
 
-from typing import List
+import asyncio
+import time
+from typing import AsyncIterator, List
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langfuse import observe
 from app.core.logging import logger
+from app.core.metrics import track_stage, record_stage
 
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+# start_index lets context assembly merge overlapping neighbouring chunks at query time
+text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200,
+                                               add_start_index=True)
 
 @observe(name="document_splitting")
+@track_stage("split", count_items=len)
 def split_documents_with_tracing(docs: List[Document]):
     """Do a tracing span for the method split_documents which has no callback for langfuse. 
     There is no async version of split_documents"""
@@ -16,3 +22,27 @@ def split_documents_with_tracing(docs: List[Document]):
     chunks = text_splitter.split_documents(docs)
     logger.info("documents_split", chunks_created=len(chunks))
     return chunks
+
+@observe(name="document_stream_splitting")
+async def split_document_stream_with_tracing(docs: AsyncIterator[Document]) -> List[Document]:
+    """Split documents as they are produced by a loader, so splitting overlaps with
+    parsing of the remaining documents (e.g. PDF pages still being extracted).
+    Each document is split in a worker thread to keep the event loop free.
+    Waiting for the loader is exported as the load stage, splitting as the split stage"""
+    chunks: List[Document] = []
+    document_count = 0
+    iterator = docs.__aiter__()
+    while True:
+        load_start = time.perf_counter()
+        try:
+            doc = await iterator.__anext__()
+        except StopAsyncIteration:
+            break
+        record_stage("load", time.perf_counter() - load_start, 1)
+        document_count += 1
+        split_start = time.perf_counter()
+        doc_chunks = await asyncio.to_thread(text_splitter.split_documents, [doc])
+        record_stage("split", time.perf_counter() - split_start, len(doc_chunks))
+        chunks.extend(doc_chunks)
+    logger.info("documents_split", document_count=document_count, chunks_created=len(chunks))
+    return chunks
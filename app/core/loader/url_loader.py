@@ -1,57 +1,80 @@
 """Module for utility to load a document from URL given a type"""
 
-import os
-import tempfile
-from typing import List
-import requests
-from langfuse import observe
+import asyncio
+from typing import AsyncIterator, Dict, Optional
+from bs4 import BeautifulSoup
 from pydantic import HttpUrl
 from langchain_core.documents import Document
-from langchain_community.document_loaders import WebBaseLoader, PyPDFLoader
 from app.models.schemas import DocumentType
+from app.exceptions.exceptions import DocumentNotModifiedException
 from app.core.logging import logger
+from app.core.loader.http_client import FetchedResource, http_fetcher
+from app.core.loader.pdf_parser import pdf_parser
 
-@observe(name="load_document_from_url")
-async def load_document_from_url(url: HttpUrl, document_type: DocumentType) -> List[Document]:
-    """Load document from URL based on document type"""
-    # TODO: Find out if langchain loaders can be used in another way
-    # so we don't have to instance new loaders and other objects every time we call the function
-    try:
-        url_str = str(url)
-        docs: List[Document] = []
 
-        if document_type == DocumentType.HTML:
-            loader = WebBaseLoader([url_str])
-            docs = loader.load()
+def html_to_text(resource: FetchedResource) -> str:
+    """Extract page text from HTML the same way WebBaseLoader does"""
+    soup = BeautifulSoup(resource.content, "html.parser", from_encoding=resource.charset)
+    return soup.get_text()
+
 
-        elif document_type == DocumentType.PDF:
-            response = requests.get(url_str, timeout=10)
-            response.raise_for_status()
+def cache_validators(resource: FetchedResource) -> Dict[str, str]:
+    """ETag and Last-Modified response headers, stored in chunk metadata for refreshes"""
+    validators = {"etag": resource.headers.get("etag"),
+                  "last_modified": resource.headers.get("last-modified")}
+    return {key: value for key, value in validators.items() if value}
 
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
-                tmp_file.write(response.content)
-                tmp_file_path = tmp_file.name
 
-            try:
-                loader = PyPDFLoader(tmp_file_path)
-                docs = loader.load()
-            finally:
-                os.unlink(tmp_file_path)
+def conditional_headers(metadata: Dict[str, str]) -> Dict[str, str]:
+    """Conditional request headers from validators stored in chunk metadata"""
+    headers = {}
+    if metadata.get("etag"):
+        headers["If-None-Match"] = metadata["etag"]
+    if metadata.get("last_modified"):
+        headers["If-Modified-Since"] = metadata["last_modified"]
+    return headers
 
-        elif document_type in [DocumentType.TEXT, DocumentType.MARKDOWN]:
-            response = requests.get(str(url), timeout=10)
-            response.raise_for_status()
-            return [Document(page_content=response.text)]
 
-        for doc in docs:
+async def stream_document_from_url(url: HttpUrl,
+                                   document_type: DocumentType,
+                                   headers: Optional[Dict[str, str]] = None
+                                   ) -> AsyncIterator[Document]:
+    """Load document from URL based on document type, yielding documents as they are parsed.
+    Downloads go through the shared pooled HTTP client. PDF pages are parsed in memory
+    in parallel and yielded as they complete, other types yield a single document.
+    raises: DocumentNotModifiedException if conditional headers were sent and the
+    server answered 304 Not Modified"""
+    url_str = str(url)
+    try:
+        resource = await http_fetcher.fetch(url_str, headers=headers)
+        if resource.status_code == 304:
+            raise DocumentNotModifiedException(f"document not modified: {url_str}")
+        validators = cache_validators(resource)
+
+        if document_type == DocumentType.PDF:
+            docs = pdf_parser.iter_pages(resource.content)
+        elif document_type == DocumentType.HTML:
+            docs = _single_document(await asyncio.to_thread(html_to_text, resource))
+        else:
+            docs = _single_document(resource.text)
+
+        async for doc in docs:
             doc.metadata = {
+                **doc.metadata,
                 "identifier": url_str,  
                 "source_type": "url", 
                 "document_type": document_type.value,
                 "source_url": url_str,
+                **validators,
             }
-        return docs
+            yield doc
 
+    except DocumentNotModifiedException:
+        raise
     except Exception as e:
-        logger.error("document_loading_from_url_failed", url=str(url), error=str(e))
+        logger.error("document_loading_from_url_failed", url=url_str, error=str(e))
         raise ValueError(f"Failed to load document from URL: {e}") from e
+
+
+async def _single_document(text: str) -> AsyncIterator[Document]:
+    yield Document(page_content=text)
@@ -1,22 +1,162 @@
-""""Module to provide structured logging and setup logging object"""
+""""Module to provide structured logging and setup logging object.
+Rendered events are handed to a writer thread through a bounded queue, so a slow
+stdout pipe doesn't stall request handling, and high-volume debug and info events
+are rate-limited per event name"""
 
+import atexit
+import importlib.util
+import json
 import logging
+import queue
+import sys
+import threading
+import time
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 import structlog
 from app.config.pydantic_settings import settings
+from app.core.metrics import LOG_EVENTS_DROPPED, LOG_EVENTS_SAMPLED_OUT
 
+# lines written to the stream in one call at most
+WRITE_BATCH_SIZE = 512
+
+
+def _json_serializer(as_bytes: bool):
+    """orjson when installed, the standard library otherwise.
+    orjson renders bytes, they are decoded unless the logger writes bytes"""
+    if importlib.util.find_spec("orjson") is None:
+        return json.dumps
+    import orjson # pylint: disable=import-outside-toplevel
+    if as_bytes:
+        return orjson.dumps
+    return lambda obj, **kwargs: orjson.dumps(obj, **kwargs).decode()
+
+
+class EventSampler:
+    """
+    structlog processor dropping debug and info events of an event name past
+    max_events_per_second within each second. Warnings and errors are always kept
+    """
+
+    def __init__(self, max_events_per_second: float):
+        self.max_events_per_second = max_events_per_second
+        self._windows: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, _logger, _method_name: str, event_dict: dict) -> dict:
+        if event_dict.get("level") not in ("debug", "info"):
+            return event_dict
+        event = str(event_dict.get("event"))
+        second = int(time.monotonic())
+        with self._lock:
+            window_second, count = self._windows.get(event, (second, 0))
+            if window_second != second:
+                count = 0
+            count += 1
+            self._windows[event] = (second, count)
+        if count > self.max_events_per_second:
+            LOG_EVENTS_SAMPLED_OUT.labels(event).inc()
+            raise structlog.DropEvent
+        return event_dict
+
+
+class AsyncLogWriter:
+    """
+    Writes log lines to a binary stream from a dedicated thread. Callers only enqueue,
+    lines are dropped and counted when the queue is full. Queued lines are flushed
+    at interpreter exit
+    """
+
+    def __init__(self, stream: BinaryIO, max_queue_size: int):
+        self.stream = stream
+        self._queue: queue.Queue[Optional[bytes]] = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, line: bytes):
+        """Queue a line without blocking"""
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            LOG_EVENTS_DROPPED.inc()
+
+    def _run(self):
+        closing = False
+        while not closing:
+            lines: List[bytes] = []
+            line = self._queue.get()
+            # write whatever else is already queued in the same call
+            while line is not None:
+                lines.append(line)
+                if len(lines) >= WRITE_BATCH_SIZE:
+                    break
+                try:
+                    line = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            closing = line is None
+            try:
+                self.stream.write(b"".join(lines))
+                self.stream.flush()
+            except (OSError, ValueError):
+                LOG_EVENTS_DROPPED.inc(len(lines))
+
+    def close(self, timeout: float = 2.0):
+        """Write the queued lines and stop the writer thread"""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+class QueueLogger:
+    """structlog logger handing rendered events to an AsyncLogWriter"""
+
+    def __init__(self, writer: AsyncLogWriter):
+        self._writer = writer
+
+    def msg(self, message: Union[str, bytes]):
+        """Queue one rendered event as a line"""
+        if isinstance(message, str):
+            message = message.encode("utf-8", "backslashreplace")
+        self._writer.write(message + b"\n")
+
+    log = debug = info = warn = warning = msg
+    fatal = failure = err = error = critical = exception = msg
+
+
+class QueueLoggerFactory:
+    """Returns loggers sharing one AsyncLogWriter"""
+
+    def __init__(self, writer: AsyncLogWriter):
+        self._logger = QueueLogger(writer)
+
+    def __call__(self, *args) -> QueueLogger:
+        return self._logger
 
 
 def setup_logging(environment: str = "dev") -> structlog.BoundLogger:
     """
-    Simple structlog setup based on official documentation
+    Simple structlog setup based on official documentation.
+    Bound loggers are cached on first use, events are sampled before they are
+    rendered, and prod renders JSON with orjson when available
     """
+    stream = getattr(sys.stdout, "buffer", None)
+    write_async = settings.log_async_enabled and stream is not None
     processors = [
         structlog.contextvars.merge_contextvars,
         structlog.processors.add_log_level,
+    ]
+    if settings.log_sample_max_events_per_second:
+        processors.append(EventSampler(settings.log_sample_max_events_per_second))
+    processors.extend([
         structlog.processors.StackInfoRenderer(),
         structlog.dev.set_exc_info,
         structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S", utc=False),
-    ]
+    ])
 
     if environment == "dev":
         processors.extend([
@@ -24,17 +164,22 @@ def setup_logging(environment: str = "dev") -> structlog.BoundLogger:
         ])
     else:
         processors.extend([
-            structlog.processors.JSONRenderer()
+            structlog.processors.JSONRenderer(serializer=_json_serializer(as_bytes=write_async))
         ])
 
+    if write_async:
+        logger_factory = QueueLoggerFactory(AsyncLogWriter(stream, settings.log_queue_size)) # type: ignore
+    else:
+        logger_factory = structlog.PrintLoggerFactory()
+
     structlog.configure(
         processors=processors,
         wrapper_class=structlog.make_filtering_bound_logger(
             logging.DEBUG if environment == "dev" else logging.INFO
         ),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
-        cache_logger_on_first_use=False,
+        logger_factory=logger_factory,
+        cache_logger_on_first_use=True,
     )
 
     return structlog.get_logger()
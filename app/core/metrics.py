@@ -1,37 +1,222 @@
-"""Module for metrics: metrics (e.g. request counts, latency histograms, error rates)."""
+"""Module for metrics: metrics (e.g. request counts, latency histograms, error rates).
+With several worker processes, PROMETHEUS_MULTIPROC_DIR must point to an empty directory
+shared by the workers before they start. Each worker then writes its values there and
+any worker's /metrics aggregates all of them. Gauges declare how values of different
+workers are combined"""
 
+import functools
+import inspect
+import os
 import time
+from typing import Callable, Optional
 from fastapi import Request
-from prometheus_client import Counter, Histogram, Gauge
-from starlette_prometheus import metrics
+from starlette.routing import Match
+from prometheus_client import (CollectorRegistry, Counter, Histogram, Gauge, generate_latest,
+                               multiprocess)
+
+# request and stage latencies range from cached answers to long LLM generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
 
 REQUEST_COUNT = Counter("http_requests_total",
                         "Total HTTP requests", 
                         ["method",
                           "endpoint", 
                           "status"])
-REQUEST_DURATION = Histogram("request_duration_seconds", "Request duration in seconds")
-CPU_USAGE = Gauge("cpu_usage_percent", "CPU usage percent")
-MEMORY_USAGE = Gauge("memory_usage_percent", "Memory usage percent")
+REQUEST_DURATION = Histogram("request_duration_seconds",
+                             "Request duration in seconds by route template",
+                             ["method", "endpoint"],
+                             buckets=LATENCY_BUCKETS)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress",
+                             "HTTP requests being handled",
+                             ["method", "endpoint"],
+                             multiprocess_mode="livesum")
+# host-wide values, every worker samples the same ones
+CPU_USAGE = Gauge("cpu_usage_percent", "CPU usage percent", multiprocess_mode="mostrecent")
+MEMORY_USAGE = Gauge("memory_usage_percent", "Memory usage percent",
+                     multiprocess_mode="mostrecent")
+
+ANSWER_CACHE_HITS = Counter("answer_cache_hits_total", "Semantic answer cache hits")
+ANSWER_CACHE_MISSES = Counter("answer_cache_misses_total", "Semantic answer cache misses")
+ANSWER_CACHE_EVICTIONS = Counter("answer_cache_evictions_total",
+                                 "Semantic answer cache evictions",
+                                 ["reason"])
+# every worker has its own answer cache and job queue, their sizes add up
+ANSWER_CACHE_ENTRIES = Gauge("answer_cache_entries", "Entries in the semantic answer cache",
+                             multiprocess_mode="livesum")
+ANSWER_CACHE_BYTES = Gauge("answer_cache_bytes",
+                           "Estimated memory used by the semantic answer cache",
+                           multiprocess_mode="livesum")
+
+
+STAGE_DURATION = Histogram("rag_stage_duration_seconds",
+                           "Duration of RAG stages (load, split, embed, upsert, retrieve, "
+                           "assemble, generate) in seconds",
+                           ["stage"],
+                           buckets=LATENCY_BUCKETS)
+STAGE_IN_PROGRESS = Gauge("rag_stage_in_progress", "RAG stage calls running", ["stage"],
+                          multiprocess_mode="livesum")
+STAGE_ITEMS = Counter("rag_stage_items_total",
+                      "Items processed by RAG stages (documents for load, chunks otherwise)",
+                      ["stage"])
+LLM_TOKENS = Counter("llm_tokens_total",
+                     "Tokens reported by the chat model (prompt, completion)",
+                     ["type"])
+
+
+def route_template(request: Request) -> str:
+    """Path template of the route handling the request (/ingest/jobs/{job_id}),
+    so labels don't grow with every job id or unknown path"""
+    partial = None
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+def record_stage(stage: str, seconds: float, items: int = 0):
+    """Export the duration and processed items of one stage run"""
+    STAGE_DURATION.labels(stage).observe(seconds)
+    if items:
+        STAGE_ITEMS.labels(stage).inc(items)
+
+
+def track_stage(stage: str, count_items: Optional[Callable] = None):
+    """
+    Decorator exporting duration and in-flight calls of a stage function, sync or async.
+    count_items maps the function result to the number of items processed
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                STAGE_IN_PROGRESS.labels(stage).inc()
+                start_time = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                finally:
+                    STAGE_IN_PROGRESS.labels(stage).dec()
+                record_stage(stage, time.perf_counter() - start_time,
+                             count_items(result) if count_items else 0)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            STAGE_IN_PROGRESS.labels(stage).inc()
+            start_time = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                STAGE_IN_PROGRESS.labels(stage).dec()
+            record_stage(stage, time.perf_counter() - start_time,
+                         count_items(result) if count_items else 0)
+            return result
+        return wrapper
+    return decorator
 
 
 def setup_metrics(app):
-    """Set up Prometheus metrics middleware and endpoints.
+    """Set up Prometheus metrics middleware, the scrape endpoint is app/api/routes/metrics.py
 
     Args:
         app: FastAPI application instance
     """
     @app.middleware("http")
     async def metrics_middleware(request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        duration = time.time() - start_time
-        REQUEST_COUNT.labels(request.method, 
-                             request.url.path, 
-                             str(response.status_code)
-                            ).inc()
-        REQUEST_DURATION.observe(duration)
+        endpoint = route_template(request)
+        in_progress = REQUESTS_IN_PROGRESS.labels(request.method, endpoint)
+        in_progress.inc()
+        start_time = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            in_progress.dec()
+            duration = time.perf_counter() - start_time
+            REQUEST_COUNT.labels(request.method, 
+                                 endpoint, 
+                                 str(status_code)
+                                ).inc()
+            REQUEST_DURATION.labels(request.method, endpoint).observe(duration)
         return response
 
-    # Add metrics endpoint
-    app.add_route("/metrics", metrics)
+
+def multiprocess_enabled() -> bool:
+    """Whether metric values are shared between worker processes"""
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def render_metrics() -> bytes:
+    """Metrics in the Prometheus text format, of all worker processes in multiprocess mode"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+def mark_worker_exited():
+    """Drop the live gauge values of this worker process, called on shutdown"""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
+
+EMBEDDING_CACHE_HITS = Counter("embedding_cache_hits_total",
+                               "Document embeddings served from the persistent cache")
+EMBEDDING_CACHE_MISSES = Counter("embedding_cache_misses_total",
+                                 "Document embeddings computed by the provider")
+EMBEDDING_PROVIDER_CALLS = Counter("embedding_provider_calls_total",
+                                   "Batched document embedding calls sent to the provider")
+EMBEDDING_COST_SAVED = Counter("embedding_cost_saved_usd_total",
+                               "Estimated provider cost saved by the embedding cache")
+
+INGEST_JOB_QUEUE_DEPTH = Gauge("ingest_job_queue_depth", "Ingestion jobs waiting in the queue",
+                               multiprocess_mode="livesum")
+INGEST_JOB_DURATION = Histogram("ingest_job_duration_seconds",
+                                "Ingestion job duration from start to finish in seconds",
+                                ["status"],
+                                buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800))
+
+INGEST_REFRESH_CHUNKS = Counter("ingest_refresh_chunks_total",
+                                "Chunks of refreshed url documents by outcome "
+                                "(added, kept, deleted)",
+                                ["action"])
+
+EMBEDDING_QUERY_BATCH_SIZE = Histogram("embedding_query_batch_size",
+                                       "Queries per micro-batched embedding request",
+                                       buckets=(1, 2, 4, 8, 16, 32, 64, 100))
+EMBEDDING_QUERY_BATCH_WAIT_SECONDS = Histogram(
+    "embedding_query_batch_wait_seconds",
+    "Time a query waited for its embedding micro-batch to be sent",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1))
+
+CONTEXT_PROMPT_TOKENS = Histogram("context_prompt_tokens",
+                                  "Estimated tokens of assembled context sent to the LLM",
+                                  buckets=(250, 500, 1000, 2000, 3000, 4000, 8000, 16000))
+CONTEXT_TOKENS_SAVED = Counter("context_tokens_saved_total",
+                               "Estimated context tokens removed by merging, deduplication "
+                               "and the token budget")
+
+LOG_EVENTS_SAMPLED_OUT = Counter("log_events_sampled_out_total",
+                                 "Debug and info log events dropped by rate-based sampling",
+                                 ["event"])
+LOG_EVENTS_DROPPED = Counter("log_events_dropped_total",
+                             "Rendered log events dropped because the log writer queue was full")
+
+TRACES_SAMPLED = Counter("langfuse_traces_total",
+                         "Finished traces by tail sampling decision "
+                         "(head, error, slow, dropped, evicted before finishing)",
+                         ["decision"])
+
+VECTOR_STORE_UPSERT_CHUNKS = Counter("vector_store_upserted_chunks_total",
+                                     "Chunks written to Chroma by bulk upserts, "
+                                     "its rate is the upsert throughput in chunks per second")
+VECTOR_STORE_UPSERT_BATCH_SECONDS = Histogram("vector_store_upsert_batch_seconds",
+                                              "Duration of one Chroma upsert batch, retries included",
+                                              buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1,
+                                                       2.5, 5, 10, 30))
+VECTOR_STORE_UPSERT_RETRIES = Counter("vector_store_upsert_retries_total",
+                                      "Chroma upsert batches retried after a transient failure")
@@ -1,23 +1,56 @@
-"""Module to setup LangFuse Observability"""
+"""Module to setup LangFuse Observability.
+Spans are exported in batches by a background thread with a bounded queue
+(OpenTelemetry's OTEL_BSP_MAX_QUEUE_SIZE, 2048 by default), full queues drop spans
+instead of blocking requests"""
 
-from langfuse import Langfuse
-from langfuse.langchain import CallbackHandler
 from app.core.logging import logger
 from app.config.pydantic_settings import settings
 
+# pylint: disable=import-outside-toplevel
+
 def initialize_langfuse():
     """
     Setup Langfuse instance here
+    Below LANGFUSE_SAMPLE_RATE, unsampled traces aren't recorded at all, unless
+    failed or slow traces must also be exported: then every trace is recorded and
+    the decision is taken when it finishes (see sampling.py)
     """
-    logger.debug("initializing_langfuse", host=settings.langfuse_host)
+    from langfuse import Langfuse
+    from opentelemetry import trace
+    from app.core.observability.sampling import SamplingPolicy, TailSamplingTracerProvider
+
+    policy = SamplingPolicy(sample_rate=settings.langfuse_sample_rate,
+                            sample_errors=settings.langfuse_sample_errors,
+                            slow_trace_seconds=settings.langfuse_slow_trace_seconds)
+    tail_sampling = settings.langfuse_tracing_enabled and policy.needs_tail
+    tracer_provider = None
+    if tail_sampling:
+        tracer_provider = TailSamplingTracerProvider(policy, settings.langfuse_max_pending_traces)
+        # Langfuse flushes the global provider, as it registers its default one
+        trace.set_tracer_provider(tracer_provider)
+    logger.debug("initializing_langfuse",
+                 host=settings.langfuse_host,
+                 tracing_enabled=settings.langfuse_tracing_enabled,
+                 sample_rate=settings.langfuse_sample_rate,
+                 tail_sampling=tail_sampling)
     langfuse_instance = Langfuse(
         secret_key=settings.langfuse_secret_key,
         public_key=settings.langfuse_public_key,
         host=settings.langfuse_host,
+        tracing_enabled=settings.langfuse_tracing_enabled,
+        sample_rate=None if tail_sampling else settings.langfuse_sample_rate,
+        tracer_provider=tracer_provider,
+        flush_at=settings.langfuse_flush_at,
+        flush_interval=settings.langfuse_flush_interval_seconds,
     )
     logger.info("langfuse_initialized")
     return langfuse_instance
 
 
-langfuse = initialize_langfuse()
-langfuse_callback_handler = CallbackHandler()
+def initialize_langfuse_callback_handler():
+    """
+    Setup the LangChain callback handler here, it traces through the Langfuse
+    client, initialize_langfuse must have run first
+    """
+    from langfuse.langchain import CallbackHandler
+    return CallbackHandler()
@@ -0,0 +1,126 @@
+"""Module for tail-based trace sampling in front of the Langfuse span exporter.
+Spans are recorded for every trace and held until the trace's root span ends, then
+the whole trace is exported if it was head sampled, failed or was slow"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider
+from opentelemetry.trace import StatusCode
+from app.core.metrics import TRACES_SAMPLED
+
+# Langfuse marks failed observations with this attribute instead of the span status
+LANGFUSE_LEVEL_ATTRIBUTE = "langfuse.observation.level"
+_TRACE_ID_LIMIT = 2**64
+
+
+@dataclass(frozen=True)
+class SamplingPolicy:
+    """
+    Which finished traces are exported: a sample_rate share chosen by trace id,
+    plus traces with an error when sample_errors, plus traces whose root span took at
+    least slow_trace_seconds when it is set
+    """
+    sample_rate: float
+    sample_errors: bool
+    slow_trace_seconds: float
+
+    def head_sampled(self, trace_id: int) -> bool:
+        """Deterministic per trace, like OpenTelemetry's TraceIdRatioBased sampler"""
+        return (trace_id & (_TRACE_ID_LIMIT - 1)) < self.sample_rate * _TRACE_ID_LIMIT
+
+    @property
+    def needs_tail(self) -> bool:
+        """Whether unsampled traces must still be recorded to be kept on error or slowness"""
+        return self.sample_rate < 1 and (self.sample_errors or self.slow_trace_seconds > 0)
+
+
+@dataclass
+class _PendingTrace:
+    spans: List[ReadableSpan] = field(default_factory=list)
+    failed: bool = False
+
+
+def _span_failed(span: ReadableSpan) -> bool:
+    return (span.status.status_code == StatusCode.ERROR
+            or (span.attributes or {}).get(LANGFUSE_LEVEL_ATTRIBUTE) == "ERROR")
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Holds the spans of each trace until its root span ends and passes the trace to the
+    wrapped processor when the policy keeps it. At most max_pending_traces traces are
+    held, the oldest ones are dropped past that. on_end only appends to memory,
+    the wrapped batch processor exports from its own thread
+    """
+
+    def __init__(self, processor: SpanProcessor, policy: SamplingPolicy, max_pending_traces: int):
+        self.processor = processor
+        self.policy = policy
+        self.max_pending_traces = max_pending_traces
+        self._pending: OrderedDict[int, _PendingTrace] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None):
+        self.processor.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan):
+        trace_id = span.context.trace_id # type: ignore
+        evicted = 0
+        with self._lock:
+            pending = self._pending.get(trace_id)
+            if pending is None:
+                pending = self._pending[trace_id] = _PendingTrace()
+                while len(self._pending) > self.max_pending_traces:
+                    self._pending.popitem(last=False)
+                    evicted += 1
+            pending.spans.append(span)
+            pending.failed = pending.failed or _span_failed(span)
+            if span.parent is not None:
+                decision = None
+            else:
+                del self._pending[trace_id]
+                decision = self._decide(trace_id, span, pending.failed)
+        if evicted:
+            TRACES_SAMPLED.labels("evicted").inc(evicted)
+        if decision is None:
+            return
+        TRACES_SAMPLED.labels(decision).inc()
+        if decision != "dropped":
+            for pending_span in pending.spans:
+                self.processor.on_end(pending_span)
+
+    def _decide(self, trace_id: int, root: ReadableSpan, failed: bool) -> str:
+        if self.policy.head_sampled(trace_id):
+            return "head"
+        if failed and self.policy.sample_errors:
+            return "error"
+        duration_seconds = ((root.end_time or 0) - (root.start_time or 0)) / 1e9
+        if self.policy.slow_trace_seconds and duration_seconds >= self.policy.slow_trace_seconds:
+            return "slow"
+        return "dropped"
+
+    def shutdown(self):
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.processor.force_flush(timeout_millis)
+
+
+class TailSamplingTracerProvider(TracerProvider):
+    """
+    Tracer provider recording every span and wrapping each span processor added to it,
+    the Langfuse exporter included, in a TailSamplingSpanProcessor
+    """
+
+    def __init__(self, policy: SamplingPolicy, max_pending_traces: int, **kwargs):
+        super().__init__(**kwargs)
+        self.policy = policy
+        self.max_pending_traces = max_pending_traces
+
+    def add_span_processor(self, span_processor: SpanProcessor):
+        super().add_span_processor(TailSamplingSpanProcessor(span_processor,
+                                                             self.policy,
+                                                             self.max_pending_traces))
@@ -0,0 +1,52 @@
+"""Module for host metrics sampled in the background instead of during scrapes"""
+
+import asyncio
+from contextlib import suppress
+from typing import Optional
+import psutil
+from app.core.logging import logger
+from app.core.metrics import CPU_USAGE, MEMORY_USAGE
+from app.config.pydantic_settings import settings
+
+
+class SystemMetricsSampler:
+    """
+    Background task sampling host CPU and memory usage into their gauges,
+    so scrapes only read stored values
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def sample():
+        """Set the system gauges, CPU usage is measured since the previous sample"""
+        CPU_USAGE.set(psutil.cpu_percent())
+        MEMORY_USAGE.set(psutil.virtual_memory().percent)
+
+    async def _run(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error("system_metrics_sample_failed", error=str(e))
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start sampling, must be called from a running event loop"""
+        psutil.cpu_percent() # the first call only sets the reference point
+        self._task = asyncio.create_task(self._run())
+        logger.info("system_metrics_sampler_started", interval_seconds=self.interval_seconds)
+
+    async def stop(self):
+        """Cancel the sampling task"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+
+system_metrics_sampler = SystemMetricsSampler(settings.system_metrics_interval_seconds)
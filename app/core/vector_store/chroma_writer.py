@@ -0,0 +1,161 @@
+"""Module for bulk writes to Chroma.
+Large upserts are split into batches sent concurrently up to a limit shared by all
+ingestions, through a pooled async HTTP client when Chroma runs as a server, and
+each batch is retried on transient failures"""
+
+import asyncio
+import time
+from typing import Any, List, Optional
+import httpx
+from app.core.logging import logger
+from app.config.pydantic_settings import settings
+from app.core.metrics import (VECTOR_STORE_UPSERT_BATCH_SECONDS, VECTOR_STORE_UPSERT_CHUNKS,
+                              VECTOR_STORE_UPSERT_RETRIES)
+
+# pylint: disable=import-outside-toplevel
+
+
+def chroma_client_settings():
+    """Connection pool settings of the Chroma HTTP clients"""
+    from chromadb.config import Settings
+    return Settings(chroma_http_max_connections=settings.chroma_http_max_connections,
+                    chroma_http_max_keepalive_connections=settings.chroma_http_max_connections,
+                    chroma_http_keepalive_secs=settings.chroma_http_keepalive_seconds)
+
+
+def _is_transient(error: BaseException) -> bool:
+    from chromadb.errors import InternalError, RateLimitError
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError,
+                              InternalError, RateLimitError))
+
+
+class ChromaBulkWriter:
+    """
+    Upserts chunks with precomputed embeddings into the collection of a Chroma vector
+    store, in batches of at most batch_size (and the server's max batch size), with
+    max_concurrency batches in flight across all callers. A batch failing with a
+    transient error or timing out is retried max_retries times with exponential backoff.
+    With a host, batches go through chromadb's async HTTP client, created on first use
+    so it binds to the running loop. Without, the embedded client is called from
+    worker threads
+    """
+
+    def __init__(self,
+                 collection: Any,
+                 host: Optional[str],
+                 port: int,
+                 batch_size: int,
+                 max_concurrency: int,
+                 max_retries: int,
+                 retry_backoff_seconds: float,
+                 timeout_seconds: float):
+        self.collection = collection
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._connect_lock = asyncio.Lock()
+        self._async_collection: Optional[Any] = None
+        self._max_batch_size: Optional[int] = None
+
+    async def _connect(self):
+        async with self._connect_lock:
+            if self._max_batch_size is not None:
+                return
+            if self.host is None:
+                self._max_batch_size = await asyncio.to_thread(
+                    self.collection._client.get_max_batch_size) # pylint: disable=protected-access
+                return
+            import chromadb
+            client = await chromadb.AsyncHttpClient(host=self.host,
+                                                    port=self.port,
+                                                    settings=chroma_client_settings())
+            self._async_collection = await client.get_collection(self.collection.name,
+                                                                 embedding_function=None)
+            self._max_batch_size = await client.get_max_batch_size()
+            logger.info("chroma_async_client_connected",
+                        host=self.host,
+                        collection=self.collection.name,
+                        max_batch_size=self._max_batch_size)
+
+    async def _send(self, batch: dict):
+        if self._async_collection is None:
+            await asyncio.to_thread(self.collection.upsert, **batch)
+        else:
+            await self._async_collection.upsert(**batch)
+
+    async def _upsert_batch(self, batch: dict):
+        async with self._semaphore:
+            start_time = time.perf_counter()
+            attempt = 0
+            while True:
+                try:
+                    await asyncio.wait_for(self._send(batch), self.timeout_seconds)
+                    break
+                except Exception as e:
+                    if attempt >= self.max_retries or not _is_transient(e):
+                        raise
+                    attempt += 1
+                    VECTOR_STORE_UPSERT_RETRIES.inc()
+                    logger.warning("chroma_upsert_retry",
+                                   attempt=attempt,
+                                   chunks=len(batch["ids"]),
+                                   error=str(e) or type(e).__name__)
+                    await asyncio.sleep(self.retry_backoff_seconds * 2 ** (attempt - 1))
+            VECTOR_STORE_UPSERT_BATCH_SECONDS.observe(time.perf_counter() - start_time)
+            VECTOR_STORE_UPSERT_CHUNKS.inc(len(batch["ids"]))
+
+    async def upsert(self,
+                     ids: List[str],
+                     embeddings: List[List[float]],
+                     metadatas: List[dict],
+                     documents: List[str]):
+        """
+        Upsert chunks, returns once every batch is stored.
+        raises: the error of the first batch failing after its retries, the batches
+        still running are cancelled
+        """
+        if not ids:
+            return
+        await self._connect()
+        batch_size = min(self.batch_size, self._max_batch_size or self.batch_size)
+        start_time = time.perf_counter()
+        tasks = [asyncio.create_task(self._upsert_batch({
+                    "ids": ids[start:start + batch_size],
+                    "embeddings": embeddings[start:start + batch_size],
+                    "metadatas": metadatas[start:start + batch_size],
+                    "documents": documents[start:start + batch_size]}))
+                 for start in range(0, len(ids), batch_size)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        elapsed_seconds = time.perf_counter() - start_time
+        logger.debug("chroma_upsert_completed",
+                     chunks=len(ids),
+                     batches=len(tasks),
+                     chunks_per_second=round(len(ids) / elapsed_seconds, 1))
+
+
+def initialize_chroma_writer(vector_store_instance: Any) -> ChromaBulkWriter:
+    """Setup the bulk writer of a Chroma vector store built by initialize_vectorstore"""
+    host = settings.chroma_host if settings.ENV == "prod" else None
+    logger.debug("initializing_chroma_writer",
+                 host=host,
+                 batch_size=settings.chroma_upsert_batch_size,
+                 concurrency=settings.chroma_upsert_concurrency)
+    return ChromaBulkWriter(
+        vector_store_instance._collection, # pylint: disable=protected-access
+        host=host,
+        port=settings.chroma_port,
+        batch_size=settings.chroma_upsert_batch_size,
+        max_concurrency=settings.chroma_upsert_concurrency,
+        max_retries=settings.chroma_upsert_max_retries,
+        retry_backoff_seconds=settings.chroma_upsert_retry_backoff_seconds,
+        timeout_seconds=settings.chroma_upsert_timeout_seconds)
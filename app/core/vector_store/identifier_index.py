@@ -0,0 +1,101 @@
+"""Module for the in-memory index of ingested document identifiers.
+Duplicate checks are answered locally instead of running a metadata query
+against the vector store for every ingested document"""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from langchain_core.vectorstores import VectorStore
+from app.core.logging import logger
+from app.core.vector_store.numpy_store import NumpyVectorStore
+
+CHROMA_SCAN_PAGE_SIZE = 10000
+
+
+def scan_identifier_counts(vector_store_instance: VectorStore) -> Dict[str, int]:
+    """Count stored chunks per identifier, paging through the collection metadata"""
+    if isinstance(vector_store_instance, NumpyVectorStore):
+        return vector_store_instance.identifier_counts()
+
+    counts: Dict[str, int] = {}
+    offset = 0
+    while True:
+        page = vector_store_instance._collection.get( # type: ignore # pylint: disable=protected-access
+            include=["metadatas"], limit=CHROMA_SCAN_PAGE_SIZE, offset=offset)
+        for metadata in page["metadatas"] or []:
+            identifier = (metadata or {}).get("identifier")
+            if identifier is not None:
+                counts[identifier] = counts.get(identifier, 0) + 1
+        if len(page["ids"]) < CHROMA_SCAN_PAGE_SIZE:
+            return counts
+        offset += CHROMA_SCAN_PAGE_SIZE
+
+
+class IdentifierIndex:
+    """
+    Chunk counts per document identifier, so a document stops being a duplicate once
+    all its chunks are deleted. Until the index is built from the store, `contains`
+    returns None and callers fall back to querying the store.
+    The counts only see the chunks written by this process. A document missing from
+    them is only known not to be stored when this process is the store's single
+    writer, as with the NumPy store which locks its directory. With Chroma, other
+    workers may have stored it, so `contains` returns None for it too.
+    Chunks stored while the index is being built are counted by both the scan and add,
+    the larger count is kept for each identifier
+    """
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.ready = False
+        self.sole_writer = False
+
+    def build(self, vector_store_instance: VectorStore):
+        """Scan the store, blocking, run it in a worker thread"""
+        start_time = time.perf_counter()
+        scanned = scan_identifier_counts(vector_store_instance)
+        with self._lock:
+            for identifier, count in scanned.items():
+                self._counts[identifier] = max(count, self._counts.get(identifier, 0))
+            self.sole_writer = isinstance(vector_store_instance, NumpyVectorStore)
+            self.ready = True
+        logger.info("identifier_index_built",
+                    identifiers=len(self._counts),
+                    sole_writer=self.sole_writer,
+                    chunks=sum(self._counts.values()),
+                    elapsed_seconds=round(time.perf_counter() - start_time, 3))
+
+    def contains(self, identifier: str) -> Optional[bool]:
+        """
+        Whether chunks of the document are stored, None when the store must be asked:
+        while the index isn't built, or for an unknown document when other processes
+        may write to the store
+        """
+        if not self.ready:
+            return None
+        if self._counts.get(identifier, 0) > 0:
+            return True
+        return False if self.sole_writer else None
+
+    def add(self, identifiers: Iterable[Optional[str]]):
+        """Record stored chunks by their identifier metadata"""
+        with self._lock:
+            for identifier in identifiers:
+                if identifier is not None:
+                    self._counts[identifier] = self._counts.get(identifier, 0) + 1
+
+    def remove(self, identifiers: Iterable[Optional[str]]):
+        """Record deleted chunks by their identifier metadata"""
+        with self._lock:
+            for identifier in identifiers:
+                if identifier is None or identifier not in self._counts:
+                    continue
+                self._counts[identifier] -= 1
+                if self._counts[identifier] <= 0:
+                    del self._counts[identifier]
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+identifier_index = IdentifierIndex()
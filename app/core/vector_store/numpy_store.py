@@ -0,0 +1,609 @@
+"""Module for the in-process NumPy vector store.
+Embeddings live in one contiguous float32 matrix, memory-mapped from disk when
+persisted, and search is a single matrix-vector product over it, or over a
+float16/int8 copy of it followed by exact rescoring of the best candidates"""
+
+import fcntl
+import json
+import os
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from app.core.logging import logger
+from app.exceptions.exceptions import VectorStoreLockedException
+
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.jsonl"
+META_FILE = "meta.json"
+LOCK_FILE = "lock"
+LOAD_BLOCK_ROWS = 16384
+# widened float32 block per step of the quantized scan, small enough to stay in cache
+QUANTIZED_BLOCK_BYTES = 512 * 1024
+# queries scored together by batched search, bounds the rows x queries score matrix
+QUERY_GROUP_SIZE = 16
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize_rows(vectors: np.ndarray, quantization: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scalar-quantize float32 rows. int8 uses one scale per row, float16 needs no scale
+    return: (codes, per-row scales)
+    """
+    if quantization == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantized_scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Approximate dot products of a query, or of the columns of a (dimension, queries)
+    matrix, with quantized rows.
+    NumPy has no fast int8/float16 matmul, so rows are widened to float32 in small blocks.
+    Widening float16 is much slower than int8, float16 mostly trades latency for memory"""
+    scores = np.empty((len(codes), *query.shape[1:]), dtype=np.float32)
+    block_rows = max(1, QUANTIZED_BLOCK_BYTES // (4 * max(1, codes.shape[1])))
+    for start in range(0, len(codes), block_rows):
+        stop = start + block_rows
+        scores[start:stop] = codes[start:stop].astype(np.float32) @ query
+    return scores * scales.reshape(-1, *([1] * (query.ndim - 1)))
+
+
+class _RowBuffer:
+    """Append-only array with amortized growth, views taken earlier stay valid"""
+
+    def __init__(self, dtype, row_shape: Tuple[int, ...] = ()):
+        self._data = np.empty((0, *row_shape), dtype=dtype)
+        self.size = 0
+
+    def append(self, rows: np.ndarray):
+        if self.size + len(rows) > len(self._data):
+            grown = np.empty((max(2 * len(self._data), self.size + len(rows)),
+                              *self._data.shape[1:]), dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:self.size + len(rows)] = rows
+        self.size += len(rows)
+
+    def view(self) -> np.ndarray:
+        return self._data[:self.size]
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _matches(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    return all(metadata.get(key) == value for key, value in where.items())
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact cosine similarity search over L2-normalized float32 rows.
+    Persistence is append-only: vectors are appended to a raw float32 file that is
+    memory-mapped for search, and adds and deletes are appended to a JSON lines log
+    replayed on startup. Upserting an existing id appends a new row and tombstones the old one.
+    With quantization set to float16 or int8 a compressed copy of the matrix is kept in
+    memory and scanned instead, the top k * rescore_factor candidates are then rescored
+    exactly against the float32 rows, which are only paged in for those candidates.
+    Chunks are indexed by their "identifier" metadata so duplicate checks don't scan.
+    Mutations are serialized by a lock, searches work on a snapshot and run concurrently.
+    A persisted store is opened by one process at a time, it holds an exclusive lock on
+    the directory: other processes would append to the files without seeing each
+    other's rows, so several app workers need Chroma
+    """
+
+    def __init__(self,
+                 embedding_function: Embeddings,
+                 persist_directory: Optional[str] = None,
+                 quantization: str = "none",
+                 rescore_factor: int = 4):
+        if quantization not in ("none", "float16", "int8"):
+            raise ValueError(f"unsupported quantization {quantization}")
+        self.embedding_function = embedding_function
+        self.persist_directory = persist_directory
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self._codes: Optional[_RowBuffer] = None
+        self._scales = _RowBuffer(np.float32)
+        # float32 rows of a store without persist_directory, memory-mapped otherwise
+        self._vectors: Optional[_RowBuffer] = None
+        self._lock = threading.RLock()
+        self._dimension: Optional[int] = None
+        self._collection_metadata: Dict[str, Any] = {}
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._live = np.zeros(0, dtype=bool)
+        self._row_ids: List[Optional[str]] = []
+        self._texts: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}
+        self._identifiers: Dict[str, Set[str]] = {}
+        self._lock_file = None
+        if persist_directory is not None:
+            os.makedirs(persist_directory, exist_ok=True)
+            self._acquire_directory_lock()
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # persistence
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, name) # type: ignore
+
+    def _acquire_directory_lock(self):
+        # released by the OS when the process exits
+        self._lock_file = open(self._path(LOCK_FILE), "a", encoding="utf-8") # pylint: disable=consider-using-with
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as e:
+            self._lock_file.close()
+            raise VectorStoreLockedException(
+                f"NumPy vector store {self.persist_directory} is open in another process, "
+                "it supports a single writer: run one worker (WEB_CONCURRENCY=1) "
+                "or use VECTOR_STORE_BACKEND=chroma") from e
+
+    def close(self):
+        """Release the directory lock so another process can open the store"""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _truncate_torn_vectors(self) -> int:
+        """
+        Row count of the vectors file. Bytes of a row partly written when the process
+        stopped are cut off, the next rows are appended after the last complete one
+        """
+        if not os.path.exists(self._path(VECTORS_FILE)):
+            return 0
+        row_bytes = 4 * self._dimension # type: ignore
+        size = os.path.getsize(self._path(VECTORS_FILE))
+        row_count = size // row_bytes
+        if size != row_count * row_bytes:
+            os.truncate(self._path(VECTORS_FILE), row_count * row_bytes)
+            logger.warning("numpy_vector_store_torn_row_truncated",
+                           path=self.persist_directory,
+                           rows=row_count,
+                           bytes_dropped=size - row_count * row_bytes)
+        return row_count
+
+    def _read_records(self, row_count: int) -> List[Dict[str, Any]]:
+        """
+        Records of the log. Adds of rows past row_count, whose vectors were not fully
+        written, and a partly written last line are dropped from the file, so the rows
+        appended next are not matched with them on a later load
+        """
+        if not os.path.exists(self._path(RECORDS_FILE)):
+            return []
+        records = []
+        dropped = 0
+        with open(self._path(RECORDS_FILE), encoding="utf-8") as records_file:
+            for line in records_file:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    dropped += 1
+                    continue
+                if record["op"] == "add" and record["row"] >= row_count:
+                    dropped += 1
+                    continue
+                records.append(record)
+        if dropped:
+            temporary_path = self._path(RECORDS_FILE + ".tmp")
+            with open(temporary_path, "w", encoding="utf-8") as records_file:
+                records_file.write("".join(json.dumps(record) + "\n" for record in records))
+            os.replace(temporary_path, self._path(RECORDS_FILE))
+            logger.warning("numpy_vector_store_records_dropped",
+                           path=self.persist_directory,
+                           records=dropped)
+        return records
+
+    def _load(self):
+        if not os.path.exists(self._path(META_FILE)):
+            return
+        with open(self._path(META_FILE), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        self._dimension = meta.get("dimension")
+        self._collection_metadata = meta.get("metadata", {})
+        if self._dimension is None:
+            return
+        row_count = self._truncate_torn_vectors()
+        self._row_ids = [None] * row_count
+        self._texts = [None] * row_count
+        self._metadatas = [None] * row_count
+
+        for record in self._read_records(row_count):
+            if record["op"] == "add":
+                self._set_row(record["row"], record["id"], record["text"], record["metadata"])
+            elif record["op"] == "update" and record["id"] in self._rows:
+                row = self._rows[record["id"]]
+                self._set_row(row, record["id"], self._texts[row], record["metadata"])
+            elif record["op"] == "delete":
+                self._clear_id(record["id"])
+
+        self._remap(row_count)
+        self._live = np.array([row_id is not None for row_id in self._row_ids], dtype=bool)
+        for start in range(0, row_count, LOAD_BLOCK_ROWS):
+            self._append_codes(np.asarray(self._matrix[start:start + LOAD_BLOCK_ROWS]))
+        logger.info("numpy_vector_store_loaded",
+                    path=self.persist_directory,
+                    rows=row_count,
+                    live_rows=len(self._rows),
+                    quantization=self.quantization,
+                    index_bytes=self.index_bytes())
+
+    def _remap(self, row_count: int):
+        if row_count == 0:
+            self._matrix = np.empty((0, self._dimension), dtype=np.float32)
+        else:
+            self._matrix = np.memmap(self._path(VECTORS_FILE), dtype=np.float32, mode="r",
+                                     shape=(row_count, self._dimension))
+
+    def _append_records(self, records: List[Dict[str, Any]]):
+        if self.persist_directory is None or not records:
+            return
+        with open(self._path(RECORDS_FILE), "a", encoding="utf-8") as records_file:
+            records_file.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def _write_meta(self):
+        if self.persist_directory is None:
+            return
+        temporary_path = self._path(META_FILE + ".tmp")
+        with open(temporary_path, "w", encoding="utf-8") as meta_file:
+            json.dump({"dimension": self._dimension, "metadata": self._collection_metadata},
+                      meta_file)
+        os.replace(temporary_path, self._path(META_FILE))
+
+    def _append_vectors(self, vectors: np.ndarray):
+        if self.persist_directory is None:
+            if self._vectors is None:
+                self._vectors = _RowBuffer(np.float32, (self._dimension,))
+            self._vectors.append(vectors)
+            self._matrix = self._vectors.view()
+            return
+        # vectors are written before their records, rows without a record are ignored on load
+        with open(self._path(VECTORS_FILE), "ab") as vectors_file:
+            vectors_file.write(vectors.tobytes())
+        self._remap(len(self._row_ids))
+
+    def _append_codes(self, vectors: np.ndarray):
+        if self.quantization == "none":
+            return
+        codes, scales = quantize_rows(vectors, self.quantization)
+        if self._codes is None:
+            self._codes = _RowBuffer(codes.dtype, (self._dimension,))
+        self._codes.append(codes)
+        self._scales.append(scales)
+
+    @property
+    def collection_metadata(self) -> Dict[str, Any]:
+        """Store level metadata, persisted with the dimension"""
+        return dict(self._collection_metadata)
+
+    def set_collection_metadata(self, metadata: Dict[str, Any]):
+        """Replace the store level metadata"""
+        with self._lock:
+            self._collection_metadata = dict(metadata)
+            self._write_meta()
+
+    def index_bytes(self) -> int:
+        """Size of the vectors scanned by every unfiltered search"""
+        if self.quantization == "none":
+            return self._matrix.nbytes
+        if self._codes is None:
+            return 0
+        return self._codes.view().nbytes + self._scales.view().nbytes
+
+    # index bookkeeping
+
+    def _set_row(self, row: int, doc_id: str, text: str, metadata: Dict[str, Any]):
+        self._clear_id(doc_id)
+        self._row_ids[row] = doc_id
+        self._texts[row] = text
+        self._metadatas[row] = metadata
+        self._rows[doc_id] = row
+        identifier = metadata.get("identifier")
+        if identifier is not None:
+            self._identifiers.setdefault(identifier, set()).add(doc_id)
+
+    def _clear_id(self, doc_id: str) -> Optional[int]:
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return None
+        identifier = (self._metadatas[row] or {}).get("identifier")
+        if identifier is not None:
+            ids = self._identifiers.get(identifier, set())
+            ids.discard(doc_id)
+            if not ids:
+                self._identifiers.pop(identifier, None)
+        self._row_ids[row] = None
+        self._texts[row] = None
+        self._metadatas[row] = None
+        return row
+
+    # writes
+
+    def add_embeddings(self,
+                       texts: Sequence[str],
+                       embeddings: Sequence[Sequence[float]],
+                       metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+                       ids: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Upsert texts with precomputed embeddings
+        return: List[str] ids of the stored texts
+        """
+        if not texts:
+            return []
+        vectors = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+
+        with self._lock:
+            if self._dimension is None:
+                self._dimension = vectors.shape[1]
+                self._matrix = np.empty((0, self._dimension), dtype=np.float32)
+                self._write_meta()
+            if vectors.shape[1] != self._dimension:
+                raise ValueError(f"embedding dimension {vectors.shape[1]} does not match "
+                                 f"the store dimension {self._dimension}")
+
+            first_row = len(self._row_ids)
+            self._row_ids.extend([None] * len(ids))
+            self._texts.extend([None] * len(ids))
+            self._metadatas.extend([None] * len(ids))
+            self._append_vectors(vectors)
+            self._append_codes(vectors)
+
+            live = np.concatenate([self._live, np.zeros(len(ids), dtype=bool)])
+            records = []
+            for offset, (doc_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                previous_row = self._rows.get(doc_id)
+                if previous_row is not None:
+                    live[previous_row] = False
+                self._set_row(first_row + offset, doc_id, text, dict(metadata))
+                live[first_row + offset] = True
+                records.append({"op": "add", "id": doc_id, "row": first_row + offset,
+                                "text": text, "metadata": metadata})
+            self._append_records(records)
+            self._live = live
+        return ids
+
+    def add_texts(self,
+                  texts: Iterable[str],
+                  metadatas: Optional[List[dict]] = None,
+                  *,
+                  ids: Optional[List[str]] = None,
+                  **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self.embedding_function.embed_documents(texts),
+                                   metadatas, ids)
+
+    async def aadd_texts(self,
+                         texts: Iterable[str],
+                         metadatas: Optional[List[dict]] = None,
+                         *,
+                         ids: Optional[List[str]] = None,
+                         **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        vectors = await self.embedding_function.aembed_documents(texts)
+        return self.add_embeddings(texts, vectors, metadatas, ids)
+
+    def update_metadatas(self, ids: Sequence[str], metadatas: Sequence[Dict[str, Any]]):
+        """Replace the metadata of stored texts without touching their vectors"""
+        with self._lock:
+            records = []
+            for doc_id, metadata in zip(ids, metadatas):
+                row = self._rows.get(doc_id)
+                if row is None:
+                    continue
+                self._set_row(row, doc_id, self._texts[row], dict(metadata)) # type: ignore
+                records.append({"op": "update", "id": doc_id, "metadata": metadata})
+            self._append_records(records)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return None
+        with self._lock:
+            live = self._live.copy()
+            records = []
+            for doc_id in ids:
+                row = self._clear_id(doc_id)
+                if row is not None:
+                    live[row] = False
+                    records.append({"op": "delete", "id": doc_id})
+            self._append_records(records)
+            self._live = live
+        return True
+
+    # reads
+
+    def _ids_matching(self, where: Dict[str, Any]) -> List[str]:
+        if "identifier" in where:
+            candidates = list(self._identifiers.get(where["identifier"], ()))
+        else:
+            candidates = list(self._rows)
+        return [doc_id for doc_id in candidates
+                if _matches(self._metadatas[self._rows[doc_id]], where)] # type: ignore
+
+    def get(self,
+            ids: Optional[Sequence[str]] = None,
+            where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None,
+            **kwargs: Any) -> Dict[str, Any]:
+        """Chroma compatible get: equality filters on metadata, returns ids, documents, metadatas"""
+        with self._lock:
+            if ids is not None:
+                selected = [doc_id for doc_id in ids if doc_id in self._rows]
+            elif where:
+                selected = self._ids_matching(where)
+            else:
+                selected = list(self._rows)
+            if where and ids is not None:
+                selected = [doc_id for doc_id in selected
+                            if _matches(self._metadatas[self._rows[doc_id]], where)] # type: ignore
+            if limit is not None:
+                selected = selected[:limit]
+            rows = [self._rows[doc_id] for doc_id in selected]
+            return {"ids": selected,
+                    "documents": [self._texts[row] for row in rows],
+                    "metadatas": [self._metadatas[row] for row in rows]}
+
+    def identifier_counts(self) -> Dict[str, int]:
+        """Number of stored chunks per identifier metadata value"""
+        with self._lock:
+            return {identifier: len(ids) for identifier, ids in self._identifiers.items()}
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        result = self.get(ids=ids)
+        return [Document(id=doc_id, page_content=text, metadata=metadata)
+                for doc_id, text, metadata in
+                zip(result["ids"], result["documents"], result["metadatas"])]
+
+    def similarity_search_by_vector_with_score(
+            self,
+            embedding: List[float],
+            k: int = 4,
+            filter: Optional[Dict[str, Any]] = None, # pylint: disable=redefined-builtin
+            **kwargs: Any) -> List[Tuple[Document, float]]:
+        """Top k documents by cosine similarity, scores are similarities in [-1, 1]"""
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        with self._lock:
+            matrix, live = self._matrix, self._live
+            codes = self._codes.view() if self._codes is not None else None
+            scales = self._scales.view()
+            if len(matrix) == 0:
+                return []
+            candidate_rows = None
+            if filter:
+                candidate_rows = np.array([self._rows[doc_id]
+                                           for doc_id in self._ids_matching(filter)], dtype=np.int64)
+
+        if candidate_rows is None and codes is not None:
+            coarse = quantized_scores(codes, scales, query)
+            coarse[~live] = -np.inf
+            candidate_rows = np.sort(_top_k(coarse, k * self.rescore_factor))
+
+        if candidate_rows is not None:
+            if len(candidate_rows) == 0:
+                return []
+            scores = matrix[candidate_rows] @ query
+        else:
+            scores = matrix @ query
+            scores[~live] = -np.inf
+        return self._to_documents(candidate_rows, scores, _top_k(scores, k))
+
+    def _to_documents(self,
+                      candidate_rows: Optional[np.ndarray],
+                      scores: np.ndarray,
+                      top: np.ndarray) -> List[Tuple[Document, float]]:
+        results = []
+        # under the lock so a concurrent write can't change a row while it is read
+        with self._lock:
+            for position in top:
+                row = int(candidate_rows[position]) if candidate_rows is not None else int(position)
+                doc_id = self._row_ids[row]
+                if doc_id is None:
+                    # deleted after the snapshot was taken
+                    continue
+                results.append((Document(id=doc_id, page_content=self._texts[row] or "",
+                                         metadata=self._metadatas[row] or {}),
+                                float(scores[position])))
+        return results
+
+    def similarity_search_by_vectors(self,
+                                     embeddings: Sequence[Sequence[float]],
+                                     k: int = 4) -> List[List[Document]]:
+        """
+        Top k documents for several query embeddings at once. Queries are scored in
+        groups with one matrix-matrix product, so each pass over the (quantized) matrix
+        is shared by the whole group
+        return: one list of documents per query, in order
+        """
+        if len(embeddings) == 0:
+            return []
+        queries = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            matrix, live = self._matrix, self._live
+            codes = self._codes.view() if self._codes is not None else None
+            scales = self._scales.view()
+        if len(matrix) == 0:
+            return [[] for _ in embeddings]
+
+        results: List[List[Document]] = []
+        for start in range(0, len(queries), QUERY_GROUP_SIZE):
+            group = np.ascontiguousarray(queries[start:start + QUERY_GROUP_SIZE].T)
+            if codes is not None:
+                coarse = quantized_scores(codes, scales, group)
+                coarse[~live] = -np.inf
+            else:
+                group_scores = matrix @ group
+                group_scores[~live] = -np.inf
+            for column in range(group.shape[1]):
+                if codes is not None:
+                    candidate_rows = np.sort(_top_k(coarse[:, column], k * self.rescore_factor))
+                    scores = matrix[candidate_rows] @ group[:, column]
+                else:
+                    candidate_rows, scores = None, group_scores[:, column]
+                results.append([doc for doc, _ in
+                                self._to_documents(candidate_rows, scores, _top_k(scores, k))])
+        return results
+
+    def similarity_search_by_vector(self,
+                                    embedding: List[float],
+                                    k: int = 4,
+                                    **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self,
+                                     query: str,
+                                     k: int = 4,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self.embedding_function.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        embedding = await self.embedding_function.aembed_query(query)
+        return await self.asimilarity_search_by_vector(embedding, k, **kwargs)
+
+    def _select_relevance_score_fn(self):
+        return lambda similarity: (similarity + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(cls,
+                   texts: List[str],
+                   embedding: Embeddings,
+                   metadatas: Optional[List[dict]] = None,
+                   *,
+                   ids: Optional[List[str]] = None,
+                   **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(embedding_function=embedding, persist_directory=kwargs.get("persist_directory"))
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -1,29 +1,100 @@
 """Module to configure and initialize vectorstore"""
 
+import asyncio
 import hashlib
-from langchain_chroma import Chroma
-from app.core.embeddings.embeddings_model import embeddings
+import uuid
+from typing import List, Optional
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from app.core.embeddings.embeddings_model import embedding_backend_signature
+from app.exceptions.exceptions import EmbeddingBackendMismatchException
 from app.core.logging import logger
 from app.config.pydantic_settings import settings
+from app.core.vector_store.numpy_store import NumpyVectorStore
+from app.core.vector_store.identifier_index import identifier_index
+from app.core.vector_store.chroma_writer import ChromaBulkWriter, chroma_client_settings
 from app.models.schemas import IngestRequest
 
-def initialize_vectorstore():
+EMBEDDING_BACKEND_METADATA_KEY = "embedding_backend"
+
+
+def _collection_metadata(vector_store_instance: VectorStore) -> dict:
+    if isinstance(vector_store_instance, NumpyVectorStore):
+        return vector_store_instance.collection_metadata
+    collection = vector_store_instance._collection # type: ignore # pylint: disable=protected-access
+    # hnsw settings are fixed at creation and can't be passed back to modify
+    return {key: value
+            for key, value in (collection.metadata or {}).items()
+            if not key.startswith("hnsw:")}
+
+
+def check_embedding_backend(vector_store_instance: VectorStore, signature: str):
+    """
+    Record the embedding backend signature with the store, or refuse to use a store
+    whose vectors were produced by another backend. Stores created before the
+    signature was recorded are assumed to match
+    """
+    metadata = _collection_metadata(vector_store_instance)
+    recorded = metadata.get(EMBEDDING_BACKEND_METADATA_KEY)
+    if recorded == signature:
+        return
+    if recorded is not None:
+        raise EmbeddingBackendMismatchException(
+            f"vector store was created with embedding backend {recorded}, "
+            f"configured backend is {signature}. Re-ingest into a new store "
+            "or configure the original backend")
+
+    if isinstance(vector_store_instance, NumpyVectorStore):
+        stored_chunks = len(vector_store_instance)
+    else:
+        stored_chunks = vector_store_instance._collection.count() # type: ignore # pylint: disable=protected-access
+    if stored_chunks:
+        logger.warning("embedding_backend_assumed",
+                       embedding_backend=signature,
+                       stored_chunks=stored_chunks)
+    metadata[EMBEDDING_BACKEND_METADATA_KEY] = signature
+    if isinstance(vector_store_instance, NumpyVectorStore):
+        vector_store_instance.set_collection_metadata(metadata)
+    else:
+        vector_store_instance._collection.modify(metadata=metadata) # type: ignore # pylint: disable=protected-access
+    logger.info("embedding_backend_recorded", embedding_backend=signature)
+
+
+def initialize_vectorstore(embeddings: Embeddings):
     """
     Setup Chroma vector store here 
     We consider an in-memory Chroma and Chroma running on a 
     separate container depending on the running mode defined 
-    by environment variable ENV
+    by environment variable ENV, or the in-process NumPy store
+    when VECTOR_STORE_BACKEND is numpy.
+    The store must have been created with the configured embedding backend
     """
     logger.debug("initializing_vectorstore",
                  env=settings.ENV,
+                 backend=settings.vector_store_backend,
                  host=settings.chroma_host,
                  port=settings.chroma_port)
+    if settings.vector_store_backend == "numpy":
+        numpy_instance = NumpyVectorStore(embedding_function=embeddings,
+                                          persist_directory=settings.numpy_store_path,
+                                          quantization=settings.numpy_store_quantization,
+                                          rescore_factor=settings.numpy_store_rescore_factor)
+        check_embedding_backend(numpy_instance, embedding_backend_signature)
+        logger.info("vectorstore_initialized",
+                    env=settings.ENV,
+                    backend="numpy",
+                    quantization=settings.numpy_store_quantization)
+        return numpy_instance
+
+    from langchain_chroma import Chroma # pylint: disable=import-outside-toplevel
     chroma_instance = None
     if settings.ENV == "prod":
         chroma_instance = Chroma(
             embedding_function=embeddings,
             host=settings.chroma_host,
             port=settings.chroma_port,
+            client_settings=chroma_client_settings(),
             )
     else:
         chroma_instance = Chroma(
@@ -34,32 +105,143 @@ def initialize_vectorstore():
             #port=
             )
 
-    logger.info("vectorstore_initialized", env=settings.ENV)
+    check_embedding_backend(chroma_instance, embedding_backend_signature)
+    logger.info("vectorstore_initialized", env=settings.ENV, backend="chroma")
     return chroma_instance
 
-vector_store = initialize_vectorstore()
+def source_identifier(request: IngestRequest) -> str:
+    """
+    Identifier stored in chunk metadata for the document of a request:
+    the url, or the SHA-256 checksum of the content
+    """
+    if request.url:
+        return str(request.url)
+    if request.content:
+        return hashlib.sha256(request.content.encode('utf-8')).hexdigest()
+    raise ValueError("request format not supported")
 
-def is_already_ingested(request: IngestRequest, vector_store_instance: Chroma):
+def is_already_ingested(source_check: str, vector_store_instance: VectorStore) -> bool:
     """
-    Check if document is already ingested in vector store
+    Check if a document identifier (see source_identifier) is already ingested.
+    Answered by the in-memory identifier index, the vector store is queried while
+    the index is still being built at startup, and for documents the index doesn't
+    know when other processes may write to the store
     return: bool (true if exists)
     """
+    indexed = identifier_index.contains(source_check)
+    if indexed is not None:
+        return indexed
     try:
-        source_check = ""
-        if request.url:
-            source_check = str(request.url)
-        elif request.content:
-            source_check = hashlib.sha256(request.content.encode('utf-8')).hexdigest()
-        else:
-            raise ValueError("request format not supported")
-
         existing_docs = vector_store_instance.get(
             where={"identifier": source_check},
             limit=1
         )
 
-        return len(existing_docs['ids']) > 0, source_check
+        return len(existing_docs['ids']) > 0
 
     except Exception as e:
         logger.error("duplicate_check_failed", error=str(e))
         raise RuntimeError(f"failed to check if document is already ingested {e}") from e
+
+
+def upsert_embedded_documents(vector_store_instance: VectorStore,
+                              docs: List[Document],
+                              vectors: List[List[float]]) -> List[str]:
+    """
+    Write documents whose embeddings were already computed, so the embedding and
+    storage steps of ingestion can run (and be measured) separately.
+    Mirrors what Chroma.add_texts does after calling its embedding function
+    return: List[str] ids of the stored documents
+    """
+    ids = [doc.id or str(uuid.uuid4()) for doc in docs]
+    if isinstance(vector_store_instance, NumpyVectorStore):
+        vector_store_instance.add_embeddings(
+            texts=[doc.page_content for doc in docs],
+            embeddings=vectors,
+            metadatas=[doc.metadata for doc in docs],
+            ids=ids)
+    else:
+        vector_store_instance._collection.upsert( # type: ignore # pylint: disable=protected-access
+            ids=ids,
+            embeddings=vectors, # type: ignore
+            metadatas=[doc.metadata for doc in docs], # type: ignore
+            documents=[doc.page_content for doc in docs],
+        )
+    identifier_index.add(doc.metadata.get("identifier") for doc in docs)
+    return ids
+
+
+async def aupsert_embedded_documents(vector_store_instance: VectorStore,
+                                     docs: List[Document],
+                                     vectors: List[List[float]],
+                                     writer: Optional[ChromaBulkWriter]) -> List[str]:
+    """
+    Async upsert_embedded_documents. Chroma writes go through the bulk writer,
+    which batches and retries them, the NumPy store is written from a worker thread
+    return: List[str] ids of the stored documents
+    """
+    if writer is None:
+        return await asyncio.to_thread(upsert_embedded_documents,
+                                       vector_store_instance, docs, vectors)
+    ids = [doc.id or str(uuid.uuid4()) for doc in docs]
+    await writer.upsert(ids=ids,
+                        embeddings=vectors,
+                        metadatas=[doc.metadata for doc in docs],
+                        documents=[doc.page_content for doc in docs])
+    identifier_index.add(doc.metadata.get("identifier") for doc in docs)
+    return ids
+
+
+def similarity_search_by_vectors(vector_store_instance: VectorStore,
+                                 embeddings: List[List[float]],
+                                 k: int = 4) -> List[List[Document]]:
+    """
+    Run the vector searches of several queries together: one matrix product in the
+    NumPy store, one query call with all embeddings in Chroma
+    return: one list of documents per embedding, in order
+    """
+    if isinstance(vector_store_instance, NumpyVectorStore):
+        return vector_store_instance.similarity_search_by_vectors(embeddings, k)
+    results = vector_store_instance._collection.query( # type: ignore # pylint: disable=protected-access
+        query_embeddings=embeddings, # type: ignore
+        n_results=k,
+        include=["documents", "metadatas"])
+    return [[Document(id=doc_id, page_content=text or "", metadata=metadata or {})
+             for doc_id, text, metadata in zip(ids, texts, metadatas)]
+            for ids, texts, metadatas in zip(results["ids"],
+                                             results["documents"], # type: ignore
+                                             results["metadatas"])] # type: ignore
+
+
+def update_document_metadata(vector_store_instance: VectorStore,
+                             ids: List[str],
+                             metadatas: List[dict]):
+    """Replace the metadata of stored chunks, their embeddings are kept"""
+    if not ids:
+        return
+    if isinstance(vector_store_instance, NumpyVectorStore):
+        vector_store_instance.update_metadatas(ids, metadatas)
+    else:
+        vector_store_instance._collection.update(ids=ids, metadatas=metadatas) # type: ignore # pylint: disable=protected-access
+
+
+def delete_documents(vector_store_instance: VectorStore, ids: List[str]):
+    """Delete stored chunks by id and remove them from the identifier index"""
+    if not ids:
+        return
+    stored = vector_store_instance.get(ids=ids) # type: ignore
+    vector_store_instance.delete(ids=stored["ids"])
+    identifier_index.remove((metadata or {}).get("identifier")
+                            for metadata in stored["metadatas"])
+
+
+def delete_documents_by_identifier(vector_store_instance: VectorStore, identifier: str) -> int:
+    """
+    Delete every stored chunk of a document identifier (see source_identifier),
+    used to undo a partly stored ingestion so the document can be ingested again
+    return: int number of chunks deleted
+    """
+    stored = vector_store_instance.get(where={"identifier": identifier}) # type: ignore
+    delete_documents(vector_store_instance, stored["ids"])
+    return len(stored["ids"])
+
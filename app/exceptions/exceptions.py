@@ -9,3 +9,58 @@ class DuplicateDocumentException(Exception):
     def __init__(self, message):
         self.message = message
         super().__init__(self.message)
+
+
+class JobQueueFullException(Exception):
+    """
+    Exception raised when a background job is submitted to a full queue
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class DocumentTooLargeException(Exception):
+    """
+    Exception raised when a downloaded document exceeds the configured size limit
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class EmbeddingBackendMismatchException(Exception):
+    """
+    Exception raised when the vector store was created with another embedding backend
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class DocumentNotModifiedException(Exception):
+    """
+    Exception raised when a conditional download reports the document is unchanged
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class VectorStoreLockedException(Exception):
+    """
+    Exception raised when a vector store supporting a single writer is open in another process
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
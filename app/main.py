@@ -2,13 +2,19 @@
 TODO use context managers for global variable imports used in this file
 """
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from app.api.route import api_router
-from app.core.metrics import setup_metrics
+from app.core.metrics import setup_metrics, mark_worker_exited
+from app.core.system_metrics import system_metrics_sampler
 from app.core.logging import logger
 from app.config.pydantic_settings import settings
-from app.api.lifespan_setup import auto_ingest_base_documents
+from app.api.lifespan_setup import warm_up
+from app.core.ingest.jobs import ingestion_jobs
+from app.core.loader.http_client import http_fetcher
+from app.core.loader.pdf_parser import pdf_parser
+from app.core.container import container
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -18,8 +24,19 @@ async def lifespan(app: FastAPI):
         project_name=settings.Project_name,
         version=settings.Version,
     )
-    await auto_ingest_base_documents()
+    ingestion_jobs.start()
+    system_metrics_sampler.start()
+    warm_up_task = asyncio.create_task(warm_up())
     yield
+    warm_up_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await warm_up_task
+    await ingestion_jobs.stop()
+    await system_metrics_sampler.stop()
+    await http_fetcher.aclose()
+    pdf_parser.shutdown()
+    container.close()
+    mark_worker_exited()
     logger.info("application_shutdown")
 
 app = FastAPI(
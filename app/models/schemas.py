@@ -1,8 +1,9 @@
 """Module with Pydantic Models for ingest, query structures"""
 
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Literal, Optional
 from enum import Enum
-from pydantic import BaseModel, HttpUrl, model_validator
+from pydantic import BaseModel, Field, HttpUrl, model_validator
 from typing_extensions import Self
 
 
@@ -13,6 +14,7 @@ class IngestResponse(BaseModel):
     status: str
     message: str
     chunks_created: int
+    chunks_deleted: int = 0
 
 class QueryRequest(BaseModel):
     """
@@ -46,6 +48,32 @@ class QueryResponse(BaseModel):
     answer: str
     sources: List[Source]
 
+class QueryBatchRequest(BaseModel):
+    """
+    Pydantic Model for answering several questions in one request
+    """
+    questions: List[str] = Field(min_length=1)
+
+class QueryBatchItemResult(BaseModel):
+    """
+    Pydantic Model for the answer to one question of a batch query.
+    index refers to the position of the question in the batch request
+    """
+    index: int
+    status: Literal["success", "error"]
+    answer: Optional[str] = None
+    sources: List[Source] = Field(default_factory=list)
+    error: Optional[str] = None
+
+class QueryBatchResponse(BaseModel):
+    """
+    Pydantic Model for batch query responses.
+    status is 'success' when no question failed, 'partial' when some did
+    and 'error' when all of them did
+    """
+    status: Literal["success", "partial", "error"]
+    results: List[QueryBatchItemResult]
+
 class DocumentType(str, Enum):
     PDF = "pdf"
     TEXT = "text"
@@ -56,6 +84,9 @@ class IngestRequest(BaseModel):
     content: Optional[str] = None
     url: Optional[HttpUrl] = None
     document_type: DocumentType
+    refresh: bool = Field(
+        default=False,
+        description="Re-ingest an already ingested url, only changed chunks are embedded")
 
     @model_validator(mode='after')
     def validate_input(self) -> Self:
@@ -64,5 +95,51 @@ class IngestRequest(BaseModel):
             raise ValueError('Either url or content must be provided')
         if self.url is not None and self.content is not None:
             raise ValueError('Provide either url or content, not both')
+        if self.refresh and self.url is None:
+            raise ValueError('refresh is only supported for url documents')
 
         return self
+
+
+class BatchIngestRequest(BaseModel):
+    """
+    Pydantic Model for batch ingestion of several documents in one request
+    """
+    documents: List[IngestRequest] = Field(min_length=1)
+
+class BatchIngestItemResult(BaseModel):
+    """
+    Pydantic Model for the outcome of one document of a batch ingestion.
+    index refers to the position of the document in the batch request
+    """
+    index: int
+    status: Literal["success", "unchanged", "duplicate", "error"]
+    message: str
+    chunks_created: int
+    chunks_deleted: int = 0
+
+class BatchIngestResponse(BaseModel):
+    """
+    Pydantic Model for batch ingestion responses.
+    status is 'success' when no document failed, 'partial' when some did
+    and 'error' when all of them did
+    """
+    status: Literal["success", "partial", "error"]
+    chunks_created: int
+    results: List[BatchIngestItemResult]
+
+
+class IngestJobResponse(BaseModel):
+    """
+    Pydantic Model for background ingestion job status.
+    chunks_embedded and chunks_total report progress during the embedding stage
+    """
+    job_id: str
+    stage: Literal["queued", "loading", "embedding",
+                   "completed", "duplicate", "failed"]
+    chunks_embedded: int
+    chunks_total: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
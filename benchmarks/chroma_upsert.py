@@ -0,0 +1,117 @@
+"""Benchmark Chroma upsert throughput in chunks per second, comparing the previous
+unbounded upserts from worker threads with the bulk writer at several concurrency limits
+
+Usage:
+    python -m benchmarks.chroma_upsert [--host localhost --port 8000] [--chunks 8000]
+        [--callers 4] [--call-size 256] [--batch-size 1000] [--concurrency 1 2 4]
+Without --host Chroma runs embedded in a temporary directory, with it the benchmark
+writes to new collections on that server (`chroma run --path /tmp/chroma --port 8000`)
+and deletes them afterwards. --callers concurrent ingestions each upsert their share
+of the chunks in calls of --call-size chunks, as the ingestion pipeline does
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from typing import List
+import numpy as np
+from benchmarks.offline import configure_offline_environment, synthetic_text
+
+
+def make_chunks(count: int, dimension: int):
+    """Random unit vectors with chunk sized texts and ingestion-like metadata"""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(count, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    texts = [synthetic_text(150, seed=index % 100) for index in range(count)]
+    metadatas = [{"identifier": f"doc-{index // 50}", "source_type": "content"}
+                 for index in range(count)]
+    return vectors.tolist(), texts, metadatas
+
+
+async def run_callers(upsert, callers: int, call_size: int, vectors, texts, metadatas) -> float:
+    """Split the chunks between concurrent callers, return: chunks per second"""
+    share = len(vectors) // callers
+
+    async def caller(offset: int):
+        for start in range(offset, offset + share, call_size):
+            end = min(start + call_size, offset + share)
+            await upsert([str(uuid.uuid4()) for _ in range(start, end)],
+                         vectors[start:end], metadatas[start:end], texts[start:end])
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(caller(index * share) for index in range(callers)))
+    return share * callers / (time.perf_counter() - start_time)
+
+
+async def run(args):
+    # pylint: disable=import-outside-toplevel
+    import chromadb
+    from app.core.vector_store.chroma_writer import ChromaBulkWriter, chroma_client_settings
+
+    if args.host:
+        client = chromadb.HttpClient(host=args.host, port=args.port,
+                                     settings=chroma_client_settings())
+    else:
+        client = chromadb.PersistentClient(path="./chroma_db")
+    vectors, texts, metadatas = make_chunks(args.chunks, args.dimension)
+    collections: List[str] = []
+
+    def new_collection(label: str):
+        name = f"benchmark-upsert-{label}-{uuid.uuid4().hex[:8]}"
+        collections.append(name)
+        return client.create_collection(name, embedding_function=None)
+
+    try:
+        collection = new_collection("threads")
+
+        async def upsert_from_thread(ids, embeddings, batch_metadatas, documents):
+            await asyncio.to_thread(collection.upsert, ids=ids, embeddings=embeddings,
+                                    metadatas=batch_metadatas, documents=documents)
+
+        chunks_per_second = await run_callers(upsert_from_thread, args.callers, args.call_size,
+                                              vectors, texts, metadatas)
+        print(f"threads  unbounded         {chunks_per_second:8.0f} chunks/s")
+
+        for concurrency in args.concurrency:
+            writer = ChromaBulkWriter(new_collection(f"writer-{concurrency}"),
+                                      host=args.host,
+                                      port=args.port,
+                                      batch_size=args.batch_size,
+                                      max_concurrency=concurrency,
+                                      max_retries=3,
+                                      retry_backoff_seconds=0.5,
+                                      timeout_seconds=60.0)
+            chunks_per_second = await run_callers(writer.upsert, args.callers, args.call_size,
+                                                  vectors, texts, metadatas)
+            print(f"writer   concurrency={concurrency:<4} {chunks_per_second:8.0f} chunks/s")
+    finally:
+        for name in collections:
+            client.delete_collection(name)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--host", help="Chroma server host, embedded Chroma when omitted")
+    arg_parser.add_argument("--port", type=int, default=8000)
+    arg_parser.add_argument("--chunks", type=int, default=8000)
+    arg_parser.add_argument("--dimension", type=int, default=768)
+    arg_parser.add_argument("--callers", type=int, default=4)
+    arg_parser.add_argument("--call-size", type=int, default=256)
+    arg_parser.add_argument("--batch-size", type=int, default=1000)
+    arg_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    args = arg_parser.parse_args()
+
+    if args.host:
+        os.environ.setdefault("ENV", "prod")
+    workdir = configure_offline_environment("chroma")
+    print(f"chroma={args.host or 'embedded'} chunks={args.chunks} callers={args.callers} "
+          f"call_size={args.call_size} batch_size={args.batch_size} workdir={workdir}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
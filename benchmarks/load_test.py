@@ -0,0 +1,152 @@
+"""Offline load test of /ingest and /query through the ASGI app, with hashing
+embeddings, a fake streaming chat model and no tracing
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 16] [--documents 200] [--queries 500]
+        [--vector-store numpy|chroma] [--llm-first-token-ms 300] [--llm-token-ms 10]
+        [--tracing] [--trace-sample-rate 1.0]
+With --tracing, Langfuse tracing stays enabled and exports to a local sink that
+discards the spans, so comparing with a run without it gives the tracing overhead.
+Requests go through httpx's ASGI transport, so the numbers include routing,
+validation and middleware but no sockets. Each phase reports throughput,
+p50/p95/p99 latency and process memory. The transport buffers response bodies,
+so streamed queries are timed until their end event, not their first token
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List
+import psutil
+from benchmarks.offline import (HashingEmbeddings, FakeStreamingChatModel, synthetic_text,
+                                configure_offline_environment, install_offline_backends,
+                                start_trace_sink, percentile_report)
+
+
+@dataclass
+class PhaseResult:
+    """Latencies of the successful requests of a phase and its failures"""
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed_seconds: float = 0.0
+
+
+async def drive(send: Callable[[int], Awaitable[bool]],
+                total: int,
+                concurrency: int) -> PhaseResult:
+    """Send total requests with concurrency workers, send returns whether it succeeded"""
+    result = PhaseResult()
+    next_index = iter(range(total))
+
+    async def worker():
+        for index in next_index:
+            start = time.perf_counter()
+            try:
+                succeeded = await send(index)
+            except Exception: # pylint: disable=broad-exception-caught
+                succeeded = False
+            if succeeded:
+                result.latencies_ms.append((time.perf_counter() - start) * 1000)
+            else:
+                result.errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed_seconds = time.perf_counter() - start
+    return result
+
+
+def report(name: str, result: PhaseResult):
+    """Print throughput, latency percentiles and memory after a phase"""
+    completed = len(result.latencies_ms)
+    throughput = completed / result.elapsed_seconds if result.elapsed_seconds else 0.0
+    rss_mb = psutil.Process().memory_info().rss / 2**20
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{name:8s} ok={completed} errors={result.errors} {throughput:.1f} req/s "
+          f"{percentile_report(result.latencies_ms)} rss={rss_mb:.0f}MB peak={peak_rss_mb:.0f}MB")
+
+
+async def run(args):
+    """Ingest synthetic documents, then query them, then stream answers"""
+    # pylint: disable=import-outside-toplevel
+    import httpx
+    from app.main import app
+    from app.core.container import container
+    from app.core.vector_store.identifier_index import identifier_index
+
+    install_offline_backends(
+        HashingEmbeddings(args.dimension, latency_seconds=args.embedding_latency_ms / 1000),
+        FakeStreamingChatModel(response_tokens=args.llm_tokens,
+                               first_token_seconds=args.llm_first_token_ms / 1000,
+                               token_seconds=args.llm_token_ms / 1000),
+        tracing=args.tracing)
+    # the ASGI transport doesn't run the lifespan, which builds the index at startup
+    identifier_index.build(container.vector_store)
+
+    questions = [synthetic_text(8, seed=1_000_000 + index)
+                 for index in range(args.distinct_questions)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                 timeout=None) as client:
+
+        async def ingest(index: int) -> bool:
+            response = await client.post("/ingest", json={
+                "content": synthetic_text(args.document_words, seed=index),
+                "document_type": "text"})
+            return response.status_code == 200 and response.json()["status"] == "success"
+
+        async def query(index: int) -> bool:
+            response = await client.post("/query", json={
+                "question": questions[index % len(questions)]})
+            return response.status_code == 200
+
+        async def stream(index: int) -> bool:
+            response = await client.post("/query/stream", json={
+                "question": questions[index % len(questions)]})
+            return response.status_code == 200 and "event: end" in response.text
+
+        report("ingest", await drive(ingest, args.documents, args.concurrency))
+        report("query", await drive(query, args.queries, args.concurrency))
+        if args.stream_queries:
+            report("stream", await drive(stream, args.stream_queries, args.concurrency))
+
+
+def main():
+    """Parse arguments, configure the offline environment and run the phases"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--concurrency", type=int, default=16)
+    arg_parser.add_argument("--documents", type=int, default=200)
+    arg_parser.add_argument("--document-words", type=int, default=2000)
+    arg_parser.add_argument("--queries", type=int, default=500)
+    arg_parser.add_argument("--stream-queries", type=int, default=100)
+    arg_parser.add_argument("--distinct-questions", type=int, default=200)
+    arg_parser.add_argument("--vector-store", choices=["numpy", "chroma"], default="numpy")
+    arg_parser.add_argument("--answer-cache", action="store_true",
+                            help="keep the semantic answer cache enabled")
+    arg_parser.add_argument("--dimension", type=int, default=768)
+    arg_parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    arg_parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    arg_parser.add_argument("--llm-token-ms", type=float, default=10.0)
+    arg_parser.add_argument("--llm-tokens", type=int, default=64)
+    arg_parser.add_argument("--tracing", action="store_true",
+                            help="trace to Langfuse, exporting to a local sink")
+    arg_parser.add_argument("--trace-sample-rate", type=float, default=1.0)
+    args = arg_parser.parse_args()
+
+    if args.tracing:
+        os.environ["LANGFUSE_TRACING_ENABLED"] = "true"
+        os.environ["LANGFUSE_HOST"] = start_trace_sink()
+        os.environ["LANGFUSE_SAMPLE_RATE"] = str(args.trace_sample_rate)
+
+    workdir = configure_offline_environment(args.vector_store, answer_cache=args.answer_cache,
+                                            embedding_dimension=args.dimension)
+    print(f"vector_store={args.vector_store} concurrency={args.concurrency} workdir={workdir}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Microbenchmarks of document splitting and vector search with hashing embeddings
+
+Usage:
+    python -m benchmarks.microbench [--document-words 2000 20000 200000]
+        [--chunks 20000] [--queries 500] [--vector-store numpy|chroma]
+Splitting is timed through split_documents_with_tracing with tracing disabled.
+Search is timed on the app's vector store, both by precomputed vector and by
+question text (including the hashing embedding)
+"""
+
+import argparse
+import time
+from typing import Callable, List
+from benchmarks.offline import (HashingEmbeddings, synthetic_text, configure_offline_environment,
+                                percentile_report)
+
+
+def time_calls(call: Callable[[int], object], count: int, warm_up: int = 5) -> List[float]:
+    """Latencies in milliseconds of count calls of call(index), after warm_up calls"""
+    for index in range(min(warm_up, count)):
+        call(index)
+    latencies = []
+    for index in range(count):
+        start = time.perf_counter()
+        call(index)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def bench_splitting(document_words: List[int], repeats: int):
+    """Split synthetic documents of each size"""
+    # pylint: disable=import-outside-toplevel
+    from langchain_core.documents import Document
+    from app.core.loader.text_splitter import split_documents_with_tracing
+
+    for words in document_words:
+        doc = Document(page_content=synthetic_text(words, seed=words),
+                       metadata={"identifier": f"doc-{words}"})
+        chunks = len(split_documents_with_tracing([doc]))
+        latencies = time_calls(lambda _: split_documents_with_tracing([doc]), repeats, warm_up=1)
+        megabytes_per_second = len(doc.page_content) / 2**20 / (sum(latencies) / 1000 / repeats)
+        print(f"split    words={words} chunks={chunks} {percentile_report(latencies)} "
+              f"{megabytes_per_second:.1f} MB/s")
+
+
+def bench_search(embeddings: HashingEmbeddings, chunk_count: int, queries: int, k: int):
+    """Fill the app vector store with synthetic chunks, then search it"""
+    # pylint: disable=import-outside-toplevel
+    from app.core.container import container
+    from app.core.vector_store.vectorstore import upsert_embedded_documents
+    from app.core.loader.text_splitter import text_splitter
+    from langchain_core.documents import Document
+
+    vector_store = container.vector_store
+    chunks = []
+    document = 0
+    while len(chunks) < chunk_count:
+        chunks.extend(text_splitter.split_documents([Document(
+            page_content=synthetic_text(5000, seed=document),
+            metadata={"identifier": f"doc-{document}", "source_type": "content"})]))
+        document += 1
+    chunks = chunks[:chunk_count]
+    start = time.perf_counter()
+    for batch_start in range(0, len(chunks), 1000):
+        batch = chunks[batch_start:batch_start + 1000]
+        upsert_embedded_documents(vector_store, batch,
+                                  embeddings.embed_documents([chunk.page_content for chunk in batch]))
+    print(f"index    chunks={len(chunks)} {time.perf_counter() - start:.2f}s")
+
+    questions = [synthetic_text(8, seed=1_000_000 + index) for index in range(queries)]
+    vectors = embeddings.embed_documents(questions)
+    latencies = time_calls(lambda index: vector_store.similarity_search_by_vector(vectors[index], k=k),
+                           queries)
+    print(f"search   by_vector k={k} {percentile_report(latencies)}")
+    latencies = time_calls(lambda index: vector_store.similarity_search(questions[index], k=k),
+                           queries)
+    print(f"search   by_text   k={k} {percentile_report(latencies)}")
+
+
+def main():
+    """Parse arguments, configure the offline environment and run both benchmarks"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--document-words", type=int, nargs="+", default=[2000, 20000, 200000])
+    arg_parser.add_argument("--split-repeats", type=int, default=20)
+    arg_parser.add_argument("--chunks", type=int, default=20000)
+    arg_parser.add_argument("--queries", type=int, default=500)
+    arg_parser.add_argument("--k", type=int, default=4)
+    arg_parser.add_argument("--dimension", type=int, default=768)
+    arg_parser.add_argument("--vector-store", choices=["numpy", "chroma"], default="numpy")
+    args = arg_parser.parse_args()
+
+    configure_offline_environment(args.vector_store, embedding_dimension=args.dimension)
+    # pylint: disable=import-outside-toplevel
+    from app.core.container import container
+    from benchmarks.offline import install_offline_backends, FakeStreamingChatModel
+
+    embeddings = HashingEmbeddings(args.dimension)
+    install_offline_backends(embeddings, FakeStreamingChatModel())
+    print(f"vector_store={args.vector_store} ({type(container.vector_store).__name__})")
+    bench_splitting(args.document_words, args.split_repeats)
+    bench_search(embeddings, args.chunks, args.queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
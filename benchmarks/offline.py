@@ -0,0 +1,207 @@
+"""Deterministic stand-ins for the Google and Langfuse services, so the app can be
+benchmarked offline: the local hashing embeddings with optional latency, a chat model
+with configurable latency and token streaming, and a callback handler that traces nothing.
+
+configure_offline_environment (or set_offline_environment_defaults) must run before
+anything from app is imported, install_offline_backends before the app builds its dependencies
+"""
+
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Iterator, List, Optional
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+# doesn't read settings, safe to import before configure_offline_environment
+from app.core.embeddings.hashing_embeddings import HashingEmbeddings as LocalHashingEmbeddings
+
+VOCABULARY_SIZE = 5000
+_SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "do", "gu"]
+
+
+def synthetic_words(count: int, seed: int) -> List[str]:
+    """Pseudo words drawn from a fixed vocabulary with a Zipf-like distribution,
+    so chunks share common words like real text does"""
+    vocabulary_rng = random.Random(0)
+    vocabulary = ["".join(vocabulary_rng.choices(_SYLLABLES, k=vocabulary_rng.randint(1, 4)))
+                  for _ in range(VOCABULARY_SIZE)]
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+    return random.Random(seed).choices(vocabulary, weights=weights, k=count)
+
+
+def synthetic_text(words: int, seed: int) -> str:
+    """Paragraphs of synthetic words, about 80 words per paragraph"""
+    tokens = synthetic_words(words, seed)
+    return "\n\n".join(" ".join(tokens[start:start + 80]) for start in range(0, words, 80))
+
+
+class HashingEmbeddings(LocalHashingEmbeddings):
+    """
+    The app's local hashing embeddings, deterministic across processes, with texts
+    sharing words close to each other so retrieval and the answer cache behave like
+    with a real model. latency_seconds is slept once per call to stand in for a
+    provider round trip
+    """
+
+    def __init__(self, dimension: int = 768, latency_seconds: float = 0.0):
+        super().__init__(dimension)
+        self.latency_seconds = latency_seconds
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return super().embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return await asyncio.to_thread(super().embed_documents, texts)
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """
+    Chat model answering with response_tokens filler tokens. The first token comes
+    after first_token_seconds and each following one after token_seconds, streamed
+    when the caller streams. Usage metadata counts prompt words as tokens
+    """
+
+    response_tokens: int = 64
+    first_token_seconds: float = 0.3
+    token_seconds: float = 0.01
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat-model"
+
+    def _tokens(self) -> List[str]:
+        return [f"token{index} " for index in range(self.response_tokens)]
+
+    def _usage(self, messages: List[BaseMessage]) -> dict:
+        prompt_tokens = sum(len(str(message.content).split()) for message in messages)
+        return {"input_tokens": prompt_tokens,
+                "output_tokens": self.response_tokens,
+                "total_tokens": prompt_tokens + self.response_tokens}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.first_token_seconds + self.token_seconds * (self.response_tokens - 1))
+        message = AIMessage(content="".join(self._tokens()), usage_metadata=self._usage(messages)) # type: ignore
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.first_token_seconds + self.token_seconds * (self.response_tokens - 1))
+        message = AIMessage(content="".join(self._tokens()), usage_metadata=self._usage(messages)) # type: ignore
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for index, token in enumerate(self._tokens()):
+            time.sleep(self.first_token_seconds if index == 0 else self.token_seconds)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="",
+                                                         usage_metadata=self._usage(messages))) # type: ignore
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        for index, token in enumerate(self._tokens()):
+            await asyncio.sleep(self.first_token_seconds if index == 0 else self.token_seconds)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="",
+                                                         usage_metadata=self._usage(messages))) # type: ignore
+
+
+class NoOpCallbackHandler(BaseCallbackHandler):
+    """Stands in for the Langfuse callback handler, records nothing"""
+
+
+def set_offline_environment_defaults(vector_store_backend: str = "numpy",
+                                     answer_cache: bool = False,
+                                     embedding_dimension: int = 768):
+    """
+    Disable everything that talks to the network or keeps state between runs, store
+    paths are left to the caller. Explicitly set environment variables win
+    """
+    defaults = {
+        "LANGFUSE_HOST": "http://localhost",
+        "LANGFUSE_PUBLIC_KEY": "benchmark",
+        "LANGFUSE_SECRET_KEY": "benchmark",
+        "LANGFUSE_TRACING_ENABLED": "false",
+        "LLM_PROVIDER": "google",
+        "LLM_MODEL": "benchmark",
+        "GOOGLE_API_KEY": "benchmark",
+        "EMBEDDINGS_MODEL": "hashing",
+        "EMBEDDING_HASHING_DIMENSION": str(embedding_dimension),
+        "ENV": "dev",
+        "VECTOR_STORE_BACKEND": vector_store_backend,
+        "EMBEDDING_CACHE_ENABLED": "false",
+        "ANSWER_CACHE_ENABLED": str(answer_cache).lower(),
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+def configure_offline_environment(vector_store_backend: str = "numpy",
+                                  answer_cache: bool = False,
+                                  embedding_dimension: int = 768) -> str:
+    """
+    set_offline_environment_defaults, with the stores in a new temporary directory
+    that becomes the working directory
+    return: the temporary working directory
+    """
+    workdir = tempfile.mkdtemp(prefix="rag-benchmark-")
+    os.environ.setdefault("NUMPY_STORE_PATH", os.path.join(workdir, "numpy_store"))
+    set_offline_environment_defaults(vector_store_backend, answer_cache, embedding_dimension)
+    # the dev Chroma persists to ./chroma_db, keep it out of the working tree
+    os.chdir(workdir)
+    return workdir
+
+
+def install_offline_backends(embeddings: Embeddings, llm: BaseChatModel, tracing: bool = False):
+    """Use these embeddings and chat model in the app's container, the vector store is
+    then built with the embeddings. Without tracing, the Langfuse handler is replaced too"""
+    from app.core.container import container # pylint: disable=import-outside-toplevel
+
+    container.override(embeddings=embeddings, llm=llm)
+    if not tracing:
+        container.override(langfuse_callback_handler=NoOpCallbackHandler())
+
+
+class _TraceSinkHandler(BaseHTTPRequestHandler):
+    def do_POST(self): # pylint: disable=invalid-name
+        """Accept and discard an export request"""
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        pass
+
+
+def start_trace_sink() -> str:
+    """Local HTTP server answering 200 to every Langfuse export, return: its url"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _TraceSinkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def percentile_report(latencies_ms: List[float]) -> str:
+    """p50/p95/p99 of latencies in milliseconds"""
+    if not latencies_ms:
+        return "p50=- p95=- p99=-"
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return f"p50={p50:.1f}ms p95={p95:.1f}ms p99={p99:.1f}ms"
@@ -0,0 +1,111 @@
+"""Benchmark PDF parsing: temp file + PyPDFLoader against the in-memory,
+page-parallel parser in app/core/loader/pdf_parser.py
+
+Usage:
+    python -m benchmarks.pdf_parsing [--pdf path/to/manual.pdf] [--pages 500]
+Without --pdf a synthetic text PDF with --pages pages is generated
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("LANGFUSE_HOST", "http://localhost")
+os.environ.setdefault("LANGFUSE_PUBLIC_KEY", "benchmark")
+os.environ.setdefault("LANGFUSE_SECRET_KEY", "benchmark")
+os.environ.setdefault("LLM_PROVIDER", "google")
+os.environ.setdefault("LLM_MODEL", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from langchain_community.document_loaders import PyPDFLoader
+from app.core.loader.pdf_parser import PdfParser
+from app.core.loader.text_splitter import text_splitter
+
+
+def make_synthetic_pdf(pages: int, lines_per_page: int = 45) -> bytes:
+    """Build a minimal PDF with one Helvetica text stream per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"",
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in range(pages):
+        lines = "".join(
+            f"({'Line %d of page %d: the quick brown fox jumps over the lazy dog.' % (line, page)}) Tj T* "
+            for line in range(lines_per_page))
+        stream = f"BT /F1 10 Tf 14 TL 40 800 Td {lines}ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+                       % len(objects))
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf.extend(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = len(pdf)
+    pdf.extend(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        pdf.extend(b"%010d 00000 n \n" % offset)
+    pdf.extend(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+               % (len(objects) + 1, xref))
+    return bytes(pdf)
+
+
+def parse_with_temp_file(content: bytes) -> int:
+    """Previous url_loader PDF path: write to a temp file and load it with PyPDFLoader"""
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp_file:
+        tmp_file.write(content)
+        tmp_file_path = tmp_file.name
+    try:
+        docs = PyPDFLoader(tmp_file_path).load()
+    finally:
+        os.unlink(tmp_file_path)
+    return len(text_splitter.split_documents(docs))
+
+
+async def parse_in_memory(parser: PdfParser, content: bytes) -> int:
+    """Current path: in-memory parsing with pages split as they arrive"""
+    chunks = 0
+    async for doc in parser.iter_pages(content):
+        chunks += len(text_splitter.split_documents([doc]))
+    return chunks
+
+
+def main():
+    """Run both parsers and print wall time and chunk counts"""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--pdf", help="PDF file to parse")
+    arg_parser.add_argument("--pages", type=int, default=500)
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, "rb") as pdf_file:
+            content = pdf_file.read()
+    else:
+        content = make_synthetic_pdf(args.pages)
+
+    parser = PdfParser(workers=args.workers, parallel_min_pages=2, tasks_per_worker=2)
+    # warm up the process pool so worker start-up isn't counted
+    asyncio.run(parse_in_memory(parser, content))
+
+    for name, run in (("temp_file_pypdfloader", lambda: parse_with_temp_file(content)),
+                      ("in_memory_parallel", lambda: asyncio.run(parse_in_memory(parser, content)))):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            chunks = run()
+            timings.append(time.perf_counter() - start)
+        print(f"{name:24s} best={min(timings):.3f}s mean={sum(timings) / len(timings):.3f}s "
+              f"chunks={chunks}")
+    parser.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark application import time and time until a fresh uvicorn worker answers
+/health, both in new processes so nothing is already imported or built
+
+Usage:
+    python -m benchmarks.startup [--runs 5] [--vector-store chroma|numpy]
+        [--embeddings-model auto|hashing]
+Runs offline: settings come from the environment of benchmarks/offline.py in a
+temporary directory, and the Google clients are built but never called
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List
+import numpy as np
+
+IMPORT_SCRIPT = ("import time; start = time.perf_counter(); import app.main; "
+                 "print(time.perf_counter() - start)")
+
+
+def offline_environment(vector_store: str, embeddings_model: str, workdir: str) -> Dict[str, str]:
+    """Environment of a worker that talks to no external service"""
+    environment = dict(os.environ)
+    environment.update({
+        "PYTHONPATH": os.getcwd(),
+        "LANGFUSE_HOST": "http://localhost",
+        "LANGFUSE_PUBLIC_KEY": "benchmark",
+        "LANGFUSE_SECRET_KEY": "benchmark",
+        "LANGFUSE_TRACING_ENABLED": "false",
+        "LLM_PROVIDER": "google",
+        "LLM_MODEL": "benchmark",
+        "GOOGLE_API_KEY": "benchmark",
+        "EMBEDDINGS_MODEL": embeddings_model,
+        "VECTOR_STORE_BACKEND": vector_store,
+        "NUMPY_STORE_PATH": os.path.join(workdir, "numpy_store"),
+        "ENV": "dev",
+    })
+    return environment
+
+
+def measure_import(environment: Dict[str, str], workdir: str) -> float:
+    """Seconds to import app.main in a new interpreter"""
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], env=environment, cwd=workdir,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    """A port nothing listens on right now"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def measure_first_response(environment: Dict[str, str], workdir: str, timeout: float) -> float:
+    """Seconds from spawning uvicorn until /health answers 200"""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app",
+                               "--port", str(port), "--log-level", "warning"],
+                              env=environment, cwd=workdir,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"no /health response within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summary(seconds: List[float]) -> str:
+    """Median and spread of measurements in milliseconds"""
+    milliseconds = np.array(seconds) * 1000
+    return (f"median={np.median(milliseconds):.0f}ms min={milliseconds.min():.0f}ms "
+            f"max={milliseconds.max():.0f}ms")
+
+
+def main():
+    """Measure import and first response times over several runs"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--vector-store", choices=["chroma", "numpy"], default="chroma")
+    arg_parser.add_argument("--embeddings-model", default="auto")
+    arg_parser.add_argument("--timeout", type=float, default=60.0)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        environment = offline_environment(args.vector_store, args.embeddings_model, workdir)
+        measure_import(environment, workdir) # warm the filesystem cache
+        imports = [measure_import(environment, workdir) for _ in range(args.runs)]
+        responses = [measure_first_response(environment, workdir, args.timeout)
+                     for _ in range(args.runs)]
+    print(f"vector_store={args.vector_store} embeddings_model={args.embeddings_model}")
+    print(f"import app.main      {summary(imports)}")
+    print(f"first /health 200    {summary(responses)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark recall against memory for reduced-dimension and quantized embeddings
+in the NumPy vector store
+
+Usage:
+    python -m benchmarks.vector_compression [--vectors 50000] [--dimension 3072]
+        [--dimensions 3072 1536 768 256] [--quantizations none float16 int8]
+The synthetic corpus puts more variance in leading dimensions, like Matryoshka-trained
+embeddings, and recall@k is measured against exact full-size float32 search
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("LANGFUSE_HOST", "http://localhost")
+os.environ.setdefault("LANGFUSE_PUBLIC_KEY", "benchmark")
+os.environ.setdefault("LANGFUSE_SECRET_KEY", "benchmark")
+os.environ.setdefault("LLM_PROVIDER", "google")
+os.environ.setdefault("LLM_MODEL", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.core.vector_store.numpy_store import NumpyVectorStore
+
+ADD_BATCH = 5000
+
+
+def make_matryoshka_embeddings(count: int, dimension: int, clusters: int,
+                               seed: int) -> np.ndarray:
+    """Clustered unit vectors whose per-dimension scale decays with the dimension index"""
+    rng = np.random.default_rng(seed)
+    decay = 1 / np.sqrt(1 + np.arange(dimension) / 64)
+    centers = rng.normal(size=(clusters, dimension)) * decay
+    noise = 0.6 * rng.normal(size=(count, dimension)) * decay
+    vectors = centers[rng.integers(clusters, size=count)] + noise
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def truncate(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    """Same truncation and renormalization as TruncatedEmbeddings, on a whole matrix"""
+    reduced = vectors[:, :dimensions]
+    return reduced / np.linalg.norm(reduced, axis=1, keepdims=True)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Ground truth neighbours at full size and precision"""
+    truth = []
+    for start in range(0, len(queries), 256):
+        scores = queries[start:start + 256] @ corpus.T
+        truth.append(np.argsort(-scores, axis=1)[:, :k])
+    return np.concatenate(truth)
+
+
+def main():
+    """Build one store per dimensionality and quantization, then measure it"""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--vectors", type=int, default=50000)
+    arg_parser.add_argument("--dimension", type=int, default=3072)
+    arg_parser.add_argument("--dimensions", type=int, nargs="+", default=[3072, 1536, 768, 256])
+    arg_parser.add_argument("--quantizations", nargs="+", default=["none", "float16", "int8"])
+    arg_parser.add_argument("--queries", type=int, default=200)
+    arg_parser.add_argument("--clusters", type=int, default=500)
+    arg_parser.add_argument("--rescore-factor", type=int, default=4)
+    arg_parser.add_argument("--k", type=int, default=10)
+    args = arg_parser.parse_args()
+
+    corpus = make_matryoshka_embeddings(args.vectors, args.dimension, args.clusters, seed=0)
+    queries = make_matryoshka_embeddings(args.queries, args.dimension, args.clusters, seed=1)
+    truth = exact_top_k(corpus, queries, args.k)
+    ids = [str(row) for row in range(args.vectors)]
+    texts = [""] * args.vectors
+
+    print(f"{'dims':>5s} {'storage':>8s} {'index_mb':>9s} {'recall@' + str(args.k):>10s} "
+          f"{'p50_ms':>7s} {'p99_ms':>7s}")
+    for dimensions in args.dimensions:
+        reduced_corpus = truncate(corpus, dimensions)
+        reduced_queries = truncate(queries, dimensions)
+        for quantization in args.quantizations:
+            with tempfile.TemporaryDirectory() as directory:
+                store = NumpyVectorStore(DeterministicFakeEmbedding(size=dimensions),
+                                         persist_directory=directory,
+                                         quantization=quantization,
+                                         rescore_factor=args.rescore_factor)
+                for start in range(0, args.vectors, ADD_BATCH):
+                    batch = slice(start, start + ADD_BATCH)
+                    store.add_embeddings(texts[batch], reduced_corpus[batch], ids=ids[batch])
+
+                latencies, hits = [], 0
+                for query, expected in zip(reduced_queries, truth):
+                    start = time.perf_counter()
+                    docs = store.similarity_search_by_vector(query, k=args.k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    hits += len({int(doc.id) for doc in docs} & set(expected.tolist()))
+                print(f"{dimensions:5d} {quantization:>8s} {store.index_bytes() / 2**20:9.1f} "
+                      f"{hits / truth.size:10.4f} {np.percentile(latencies, 50):7.2f} "
+                      f"{np.percentile(latencies, 99):7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark the in-process NumPy vector store against Chroma on recall@k
+and query latency, using synthetic clustered embeddings
+
+Usage:
+    python -m benchmarks.vector_store [--vectors 20000] [--dimension 768] [--queries 500]
+Chroma runs embedded in this process with a temporary persist directory, so its
+numbers don't include the network hop of the prod container setup
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+os.environ.setdefault("LANGFUSE_HOST", "http://localhost")
+os.environ.setdefault("LANGFUSE_PUBLIC_KEY", "benchmark")
+os.environ.setdefault("LANGFUSE_SECRET_KEY", "benchmark")
+os.environ.setdefault("LLM_PROVIDER", "google")
+os.environ.setdefault("LLM_MODEL", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.core.vector_store.numpy_store import NumpyVectorStore
+
+CHROMA_MAX_BATCH = 5000
+
+
+def make_embeddings(count: int, dimension: int, clusters: int, seed: int) -> np.ndarray:
+    """Unit vectors scattered around random cluster centers, closer to real embeddings
+    than uniform noise, where every neighbour is almost equally far"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.5 * rng.normal(size=(count, dimension))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Ground truth neighbours by brute force cosine similarity"""
+    scores = queries.astype(np.float64) @ corpus.astype(np.float64).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def run_queries(search, queries: np.ndarray, k: int):
+    """Return found row indices and per-query latencies in milliseconds"""
+    found, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        docs = search(query.tolist(), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append([int(doc.id) for doc in docs])
+    return found, np.array(latencies)
+
+
+def report(name: str, found, truth: np.ndarray, latencies: np.ndarray, build_seconds: float):
+    """Print recall@k and latency percentiles"""
+    k = truth.shape[1]
+    recall = np.mean([len(set(row) & set(expected)) / k for row, expected in zip(found, truth)])
+    print(f"{name:8s} build={build_seconds:.2f}s recall@{k}={recall:.4f} "
+          f"p50={np.percentile(latencies, 50):.2f}ms p99={np.percentile(latencies, 99):.2f}ms")
+
+
+def main():
+    """Load the same vectors into both stores and compare them"""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--vectors", type=int, default=20000)
+    arg_parser.add_argument("--dimension", type=int, default=768)
+    arg_parser.add_argument("--queries", type=int, default=500)
+    arg_parser.add_argument("--clusters", type=int, default=200)
+    arg_parser.add_argument("--k", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    corpus = make_embeddings(args.vectors, args.dimension, args.clusters, seed=0)
+    queries = make_embeddings(args.queries, args.dimension, args.clusters, seed=1)
+    truth = exact_top_k(corpus, queries, args.k)
+    ids = [str(row) for row in range(args.vectors)]
+    texts = [f"chunk {row}" for row in range(args.vectors)]
+    metadatas = [{"identifier": f"doc-{row // 50}"} for row in range(args.vectors)]
+    embedding_function = DeterministicFakeEmbedding(size=args.dimension)
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        numpy_store = NumpyVectorStore(embedding_function, os.path.join(directory, "numpy"))
+        for batch_start in range(0, args.vectors, CHROMA_MAX_BATCH):
+            batch = slice(batch_start, batch_start + CHROMA_MAX_BATCH)
+            numpy_store.add_embeddings(texts[batch], corpus[batch], metadatas[batch], ids[batch])
+        numpy_build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        chroma_store = Chroma(collection_name=f"benchmark_{uuid.uuid4().hex}",
+                              embedding_function=embedding_function,
+                              persist_directory=os.path.join(directory, "chroma"))
+        for batch_start in range(0, args.vectors, CHROMA_MAX_BATCH):
+            batch = slice(batch_start, batch_start + CHROMA_MAX_BATCH)
+            chroma_store._collection.upsert(ids=ids[batch], # pylint: disable=protected-access
+                                            embeddings=corpus[batch],
+                                            metadatas=metadatas[batch], # type: ignore
+                                            documents=texts[batch])
+        chroma_build = time.perf_counter() - start
+
+        for name, store, build_seconds in (("numpy", numpy_store, numpy_build),
+                                           ("chroma", chroma_store, chroma_build)):
+            run_queries(store.similarity_search_by_vector, queries[:10], args.k)
+            found, latencies = run_queries(store.similarity_search_by_vector, queries, args.k)
+            report(name, found, truth, latencies, build_seconds)
+
+
+if __name__ == "__main__":
+    main()
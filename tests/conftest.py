@@ -0,0 +1,28 @@
+"""Shared test setup. The app runs offline with the stand-ins of benchmarks/offline.py,
+the environment is configured before anything from app is imported"""
+
+import pytest
+from benchmarks.offline import set_offline_environment_defaults
+
+set_offline_environment_defaults("numpy")
+
+from app.config.pydantic_settings import settings # pylint: disable=wrong-import-position
+from app.core.container import container # pylint: disable=wrong-import-position
+
+
+@pytest.fixture(autouse=True, scope="session")
+def offline_store_paths(tmp_path_factory):
+    """Stores the app builds from settings are written under pytest's temporary directory"""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, "numpy_store_path",
+                            str(tmp_path_factory.mktemp("numpy_store")))
+        yield
+
+
+@pytest.fixture
+def offline_container():
+    """The app's container, the dependencies a test overrides are restored afterwards"""
+    saved = dict(container._instances) # pylint: disable=protected-access
+    yield container
+    container._instances.clear() # pylint: disable=protected-access
+    container._instances.update(saved) # pylint: disable=protected-access
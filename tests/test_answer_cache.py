@@ -0,0 +1,36 @@
+"""Answer caches of workers sharing a generation file are invalidated together"""
+
+from app.core.cache.answer_cache import SemanticAnswerCache
+
+EMBEDDING = [1.0, 0.0, 0.0]
+
+
+def worker_cache(path: str) -> SemanticAnswerCache:
+    return SemanticAnswerCache(enabled=True, similarity_threshold=0.95, ttl_seconds=3600,
+                               max_entries=16, max_bytes=1024 * 1024,
+                               shared_generation_path=path)
+
+
+def test_invalidation_reaches_other_workers(tmp_path):
+    path = str(tmp_path / "answer_cache_generation")
+    ingesting, answering = worker_cache(path), worker_cache(path)
+    ingesting.store(EMBEDDING, "old answer", [], ingesting.generation)
+    answering.store(EMBEDDING, "old answer", [], answering.generation)
+    generation_before_ingest = answering.generation
+
+    ingesting.invalidate()
+
+    assert ingesting.lookup(EMBEDDING) is None
+    assert answering.lookup(EMBEDDING) is None
+    # an answer computed before the invalidation is not cached
+    answering.store(EMBEDDING, "old answer", [], generation_before_ingest)
+    assert answering.lookup(EMBEDDING) is None
+    answering.store(EMBEDDING, "new answer", [], answering.generation)
+    assert answering.lookup(EMBEDDING).answer == "new answer"
+
+
+def test_without_a_generation_file_invalidation_stays_local():
+    ingesting, answering = worker_cache(""), worker_cache("")
+    answering.store(EMBEDDING, "old answer", [], answering.generation)
+    ingesting.invalidate()
+    assert answering.lookup(EMBEDDING).answer == "old answer"
@@ -0,0 +1,52 @@
+"""Building one dependency holds up neither the callers of other dependencies nor,
+through require, the event loop"""
+
+import asyncio
+import threading
+import time
+from app.core.container import Container
+
+BUILD_SECONDS = 0.3
+
+
+class SlowContainer(Container):
+    """Container with a dependency taking BUILD_SECONDS to build and a quick one"""
+
+    @property
+    def slow(self):
+        """Built in BUILD_SECONDS"""
+        return self._resolve("slow", lambda: time.sleep(BUILD_SECONDS) or "slow")
+
+    @property
+    def quick(self):
+        """Built at once"""
+        return self._resolve("quick", lambda: "quick")
+
+
+def test_dependencies_are_built_under_their_own_lock():
+    container = SlowContainer()
+    warm_up = threading.Thread(target=lambda: container.slow)
+    warm_up.start()
+    time.sleep(0.05)
+    start_time = time.perf_counter()
+    assert container.quick == "quick"
+    assert time.perf_counter() - start_time < BUILD_SECONDS / 3
+    warm_up.join()
+
+
+def test_require_builds_in_a_worker_thread():
+    container = SlowContainer()
+    ticks = []
+
+    async def tick():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(BUILD_SECONDS / 10)
+
+    async def run():
+        await asyncio.gather(container.require("slow", "quick"), tick())
+    asyncio.run(run())
+
+    assert len(ticks) == 5
+    assert max(later - earlier for earlier, later in zip(ticks, ticks[1:])) < BUILD_SECONDS / 2
+    assert container.slow == "slow"
@@ -0,0 +1,34 @@
+"""Neighbouring chunks of a source are merged into one segment of the source text"""
+
+from langchain_core.documents import Document
+from benchmarks.offline import synthetic_text
+from app.core.loader.text_splitter import text_splitter
+from app.core.langgraph.context_assembly import merge_adjacent_chunks
+
+
+def split(text: str):
+    return text_splitter.split_documents([Document(page_content=text,
+                                                   metadata={"identifier": "doc"})])
+
+
+def test_overlapping_chunks_merge_into_the_source_text():
+    text = synthetic_text(600, seed=1)
+    chunks = split(text)
+    assert len(chunks) > 1
+    segments = merge_adjacent_chunks(list(reversed(chunks)))
+    assert [segment.text for segment in segments] == [text]
+
+
+def test_chunks_split_at_paragraph_separators_merge_into_the_source_text():
+    text = "\n\n".join(synthetic_text(150, seed=seed) for seed in range(3))
+    chunks = split(text)
+    assert len(chunks) == 3
+    segments = merge_adjacent_chunks(chunks)
+    assert [segment.text for segment in segments] == [text]
+
+
+def test_chunks_with_a_missing_neighbour_stay_apart():
+    chunks = split("\n\n".join(synthetic_text(150, seed=seed) for seed in range(3)))
+    segments = merge_adjacent_chunks([chunks[0], chunks[2]])
+    assert [segment.text for segment in segments] == [chunks[0].page_content,
+                                                     chunks[2].page_content]
@@ -0,0 +1,31 @@
+"""The identifier index only answers that a document is not stored when this process
+is the only writer of the vector store"""
+
+from types import SimpleNamespace
+from benchmarks.offline import HashingEmbeddings
+from app.core.vector_store.identifier_index import IdentifierIndex
+from app.core.vector_store.numpy_store import NumpyVectorStore
+
+
+class SharedCollection:
+    """Stands in for a Chroma collection other workers write to"""
+
+    def get(self, include, limit, offset): # pylint: disable=unused-argument
+        return {"ids": ["chunk"], "metadatas": [{"identifier": "known"}]}
+
+
+def test_unknown_documents_are_not_stored_with_a_single_writer(tmp_path):
+    store = NumpyVectorStore(HashingEmbeddings(8), persist_directory=str(tmp_path / "store"))
+    store.add_embeddings(["text"], [[1.0] * 8], [{"identifier": "known"}])
+    index = IdentifierIndex()
+    index.build(store)
+    assert index.contains("known") is True
+    assert index.contains("unknown") is False
+    store.close()
+
+
+def test_unknown_documents_are_checked_against_a_shared_store():
+    index = IdentifierIndex()
+    index.build(SimpleNamespace(_collection=SharedCollection()))
+    assert index.contains("known") is True
+    assert index.contains("unknown") is None
@@ -0,0 +1,19 @@
+"""Batch ingestion requests with more documents than the configured limit are rejected"""
+
+import asyncio
+import httpx
+from app.main import app
+from app.config.pydantic_settings import settings
+
+
+def test_oversized_batch_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "ingest_batch_max_documents", 2)
+    documents = [{"content": f"document {index}", "document_type": "text"} for index in range(3)]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/ingest/batch", json={"documents": documents})
+    response = asyncio.run(run())
+
+    assert response.status_code == 422
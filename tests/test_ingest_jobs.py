@@ -0,0 +1,31 @@
+"""A finished background ingestion job keeps its status for polling but not the
+document it was submitted with"""
+
+import asyncio
+from benchmarks.offline import HashingEmbeddings, synthetic_text
+from app.core.ingest.jobs import FINISHED_STAGES, IngestionJobQueue
+from app.core.vector_store.numpy_store import NumpyVectorStore
+from app.models.schemas import IngestRequest
+
+
+def test_finished_job_drops_its_request(offline_container, tmp_path):
+    store = NumpyVectorStore(embedding_function=HashingEmbeddings(64),
+                             persist_directory=str(tmp_path / "store"))
+    offline_container.override(vector_store=store, vector_store_writer=None)
+    jobs = IngestionJobQueue(workers=1, max_queue_size=4, retention=4)
+
+    async def run():
+        jobs.start()
+        job = jobs.submit(IngestRequest(content=synthetic_text(500, seed=7),
+                                        document_type="text")) # type: ignore
+        while job.stage not in FINISHED_STAGES:
+            await asyncio.sleep(0.01)
+        await jobs.stop()
+        return job
+    job = asyncio.run(run())
+
+    assert job.stage == "completed"
+    assert job.chunks_total == len(store) > 0
+    assert job.request is None
+    assert jobs.get(job.job_id) is job
+    store.close()
@@ -0,0 +1,70 @@
+"""A document whose ingestion fails after some of its chunks were stored can be
+ingested again, its partly stored chunks are removed"""
+
+import asyncio
+from typing import List, Set
+import httpx
+from benchmarks.offline import HashingEmbeddings, synthetic_text
+from app.main import app
+from app.config.pydantic_settings import settings
+from app.core.vector_store.numpy_store import NumpyVectorStore
+
+BATCH_SIZE = 4
+
+
+class FailingEmbeddings(HashingEmbeddings):
+    """Hashing embeddings whose document embedding calls fail at the given call numbers"""
+
+    def __init__(self, failing_calls: Set[int]):
+        super().__init__(64)
+        self.failing_calls = failing_calls
+        self.calls = 0
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.calls in self.failing_calls:
+            raise RuntimeError("embedding provider unavailable")
+        return await super().aembed_documents(texts)
+
+
+def ingest_store(offline_container, tmp_path, monkeypatch, failing_calls: Set[int]):
+    monkeypatch.setattr(settings, "ingest_embedding_batch_size", BATCH_SIZE)
+    store = NumpyVectorStore(embedding_function=FailingEmbeddings(failing_calls),
+                             persist_directory=str(tmp_path / "store"))
+    offline_container.override(vector_store=store, vector_store_writer=None)
+    return store
+
+
+def post(path: str, payload: dict) -> dict:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return (await client.post(path, json=payload)).json()
+    return asyncio.run(run())
+
+
+def test_batch_ingest_removes_chunks_of_a_document_failing_in_a_later_batch(
+        offline_container, tmp_path, monkeypatch):
+    store = ingest_store(offline_container, tmp_path, monkeypatch, failing_calls={2})
+    document = {"content": synthetic_text(2000, seed=5), "document_type": "text"}
+
+    response = post("/ingest/batch", {"documents": [document]})
+    assert response["results"][0]["status"] == "error"
+    assert len(store) == 0
+
+    response = post("/ingest/batch", {"documents": [document]})
+    assert response["results"][0]["status"] == "success"
+    assert len(store) == response["results"][0]["chunks_created"] > BATCH_SIZE
+
+
+def test_ingest_removes_chunks_stored_before_a_later_batch_fails(offline_container, tmp_path,
+                                                                 monkeypatch):
+    store = ingest_store(offline_container, tmp_path, monkeypatch, failing_calls={4})
+    document = {"content": synthetic_text(2000, seed=6), "document_type": "text"}
+
+    assert post("/ingest", document)["status"] == "error"
+    assert len(store) == 0
+
+    response = post("/ingest", document)
+    assert response["status"] == "success"
+    assert len(store) == response["chunks_created"] > BATCH_SIZE
@@ -0,0 +1,54 @@
+"""A persisted NumPy store stopped in the middle of an append loads its complete rows,
+and rows added afterwards are searched against their own vectors"""
+
+import json
+import os
+import numpy as np
+import pytest
+from benchmarks.offline import HashingEmbeddings
+from app.core.vector_store.numpy_store import RECORDS_FILE, VECTORS_FILE, NumpyVectorStore
+from app.exceptions.exceptions import VectorStoreLockedException
+
+DIMENSION = 8
+
+
+def unit_vector(index: int) -> list:
+    vector = np.zeros(DIMENSION, dtype=np.float32)
+    vector[index] = 1.0
+    return vector.tolist()
+
+
+def test_torn_append_is_dropped_on_load(tmp_path):
+    directory = str(tmp_path / "store")
+    store = NumpyVectorStore(HashingEmbeddings(DIMENSION), persist_directory=directory)
+    store.add_embeddings(["zero", "one"], [unit_vector(0), unit_vector(1)], ids=["0", "1"])
+    store.close()
+    # the process stopped after writing part of a row and its add record
+    with open(os.path.join(directory, VECTORS_FILE), "ab") as vectors_file:
+        vectors_file.write(np.ones(DIMENSION, dtype=np.float32).tobytes()[:10])
+    with open(os.path.join(directory, RECORDS_FILE), "a", encoding="utf-8") as records_file:
+        records_file.write(json.dumps({"op": "add", "id": "torn", "row": 2,
+                                       "text": "torn", "metadata": {}}) + "\n")
+        records_file.write('{"op": "add", "id": "half')
+
+    store = NumpyVectorStore(HashingEmbeddings(DIMENSION), persist_directory=directory)
+    assert len(store) == 2
+    store.add_embeddings(["two"], [unit_vector(2)], ids=["2"])
+    store.close()
+
+    store = NumpyVectorStore(HashingEmbeddings(DIMENSION), persist_directory=directory)
+    assert len(store) == 3
+    for index in range(3):
+        (doc, score), = store.similarity_search_by_vector_with_score(unit_vector(index), k=1)
+        assert doc.id == str(index)
+        assert score == pytest.approx(1.0)
+    store.close()
+
+
+def test_store_directory_is_opened_by_one_store_at_a_time(tmp_path):
+    directory = str(tmp_path / "store")
+    store = NumpyVectorStore(HashingEmbeddings(DIMENSION), persist_directory=directory)
+    with pytest.raises(VectorStoreLockedException):
+        NumpyVectorStore(HashingEmbeddings(DIMENSION), persist_directory=directory)
+    store.close()
+    NumpyVectorStore(HashingEmbeddings(DIMENSION), persist_directory=directory).close()
@@ -0,0 +1,23 @@
+"""Page ranges of PDFs parsed in the spawned process pool, which reads each PDF from
+shared memory, give the same pages as parsing them in one go"""
+
+import asyncio
+from benchmarks.pdf_parsing import make_synthetic_pdf
+from app.core.loader.pdf_parser import PdfParser, extract_pdf_pages
+
+PAGES = 24
+
+
+def test_parallel_parsing_yields_every_page_of_each_pdf():
+    parser = PdfParser(workers=2, parallel_min_pages=2, tasks_per_worker=3)
+
+    async def parse(content: bytes):
+        return sorted([(doc.metadata["page"], doc.page_content)
+                       async for doc in parser.iter_pages(content)])
+    try:
+        # the workers are reused by the second PDF and must not read the first one again
+        for content in (make_synthetic_pdf(PAGES), make_synthetic_pdf(PAGES, lines_per_page=5)):
+            assert asyncio.run(parse(content)) == [(number + 1, text) for number, text
+                                                   in extract_pdf_pages(content, 0, PAGES)]
+    finally:
+        parser.shutdown()
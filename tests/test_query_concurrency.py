@@ -0,0 +1,55 @@
+"""Concurrent /query requests overlap instead of queuing behind each other"""
+
+import asyncio
+import time
+from typing import List
+import httpx
+from langchain_core.documents import Document
+from benchmarks.offline import FakeStreamingChatModel, NoOpCallbackHandler
+from app.main import app
+
+LATENCY_SECONDS = 0.2
+PARALLEL_REQUESTS = 10
+
+
+class SlowVectorStore:
+    """Stands in for the vector store, each search waits like a remote call"""
+
+    async def asimilarity_search(self, question: str, k: int = 4) -> List[Document]:
+        await asyncio.sleep(LATENCY_SECONDS)
+        return [Document(page_content=f"context for {question}",
+                         metadata={"source_type": "content"})][:k]
+
+    async def asimilarity_search_by_vector(self, embedding: List[float],
+                                           k: int = 4) -> List[Document]:
+        return await self.asimilarity_search("vector", k)
+
+
+async def timed_queries(client: httpx.AsyncClient, count: int) -> float:
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(client.post("/query", json={"question": f"question {i}"})
+                                       for i in range(count)))
+    elapsed = time.perf_counter() - start
+    assert all(response.status_code == 200 for response in responses)
+    return elapsed
+
+
+def test_parallel_queries_take_about_one_query_latency(offline_container):
+    offline_container.override(vector_store=SlowVectorStore(),
+                               llm=FakeStreamingChatModel(response_tokens=4,
+                                                          first_token_seconds=LATENCY_SECONDS,
+                                                          token_seconds=0),
+                               langfuse_callback_handler=NoOpCallbackHandler())
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await timed_queries(client, 1) # builds the graph
+            single = await timed_queries(client, 1)
+            parallel = await timed_queries(client, PARALLEL_REQUESTS)
+        return single, parallel
+
+    single, parallel = asyncio.run(run())
+    assert single >= 2 * LATENCY_SECONDS
+    # serialized requests would take PARALLEL_REQUESTS times longer
+    assert parallel < 2 * single
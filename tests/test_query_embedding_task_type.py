@@ -0,0 +1,44 @@
+"""Questions coalesced by the query micro-batcher are embedded by the provider as
+queries, not as documents"""
+
+import asyncio
+from typing import List
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from app.config.pydantic_settings import settings
+from app.core.embeddings import embeddings_model
+from app.core.embeddings.backends import EMBEDDING_BACKENDS
+
+
+class RecordingAsyncClient:
+    """Stands in for the Google async client, records the embedding requests"""
+
+    def __init__(self):
+        self.requests: List = []
+
+    async def batch_embed_contents(self, request):
+        self.requests.extend(request.requests)
+
+        class Embedding: # pylint: disable=too-few-public-methods
+            values = [1.0, 0.0, 0.0]
+
+        class Response: # pylint: disable=too-few-public-methods
+            embeddings = [Embedding() for _ in request.requests]
+        return Response()
+
+
+def test_micro_batched_questions_are_embedded_as_queries(monkeypatch):
+    client = RecordingAsyncClient()
+    monkeypatch.setattr(GoogleGenerativeAIEmbeddings, "_async_client", property(lambda _: client))
+    monkeypatch.setattr(embeddings_model, "embedding_backend", EMBEDDING_BACKENDS["google"])
+    monkeypatch.setattr(settings, "embedding_cache_enabled", False)
+    monkeypatch.setattr(settings, "embedding_micro_batch_enabled", True)
+    monkeypatch.setattr(settings, "embedding_output_dimensionality", 0)
+    embeddings, _ = embeddings_model.initialize_embeddings_model()
+
+    async def run():
+        await asyncio.gather(*(embeddings.aembed_query(f"question {index}") for index in range(3)))
+        await embeddings.aembed_queries(["first question", "second question"])
+    asyncio.run(run())
+
+    assert len(client.requests) == 5
+    assert {request.task_type.name for request in client.requests} == {"RETRIEVAL_QUERY"}
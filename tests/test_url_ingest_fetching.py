@@ -0,0 +1,116 @@
+"""URL documents are downloaded through the shared pooled HTTP client: concurrent
+/ingest requests fetch in parallel, reuse connections and oversized bodies are rejected"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Set
+import httpx
+import pytest
+from benchmarks.offline import HashingEmbeddings, synthetic_text
+from app.main import app
+from app.core.loader.http_client import http_fetcher
+from app.core.vector_store.numpy_store import NumpyVectorStore
+
+DELAY_SECONDS = 0.3
+PARALLEL_REQUESTS = 5
+
+
+class DelayedDocumentServer(ThreadingHTTPServer):
+    """Serves a text document per path after DELAY_SECONDS, tracking concurrent requests"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _DelayedDocumentHandler)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.client_ports: List[int] = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _DelayedDocumentHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, so connection reuse can be observed
+    server: DelayedDocumentServer
+
+    def do_GET(self): # pylint: disable=invalid-name
+        """Answer after a delay, /large/... returns a body over the test download limit"""
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+            self.server.client_ports.append(self.client_address[1])
+        time.sleep(DELAY_SECONDS)
+        words = 5000 if self.path.startswith("/large/") else 200
+        body = synthetic_text(words, seed=hash(self.path) % 1000).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.in_flight -= 1
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        pass
+
+
+@pytest.fixture
+def document_server():
+    server = DelayedDocumentServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def url_ingest_store(offline_container, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_fetcher, "max_download_bytes", 10_000)
+    store = NumpyVectorStore(embedding_function=HashingEmbeddings(64),
+                             persist_directory=str(tmp_path / "store"))
+    offline_container.override(vector_store=store, vector_store_writer=None)
+    return store
+
+
+async def ingest_urls(client: httpx.AsyncClient, urls: List[str]) -> List[dict]:
+    responses = await asyncio.gather(*(client.post("/ingest", json={"url": url,
+                                                                    "document_type": "text"})
+                                       for url in urls))
+    return [response.json() for response in responses]
+
+
+def test_url_fetches_overlap_reuse_the_client_and_enforce_the_size_limit(document_server,
+                                                                         url_ingest_store):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                start = time.perf_counter()
+                parallel = await ingest_urls(client, [f"{document_server.url}/doc/{index}"
+                                                      for index in range(PARALLEL_REQUESTS)])
+                elapsed = time.perf_counter() - start
+                shared_client = http_fetcher.client
+                ports_before = len(document_server.client_ports)
+                sequential = [(await ingest_urls(client, [f"{document_server.url}/next/{index}"]))[0]
+                              for index in range(3)]
+                reused = http_fetcher.client is shared_client
+                oversized = (await ingest_urls(client, [f"{document_server.url}/large/0"]))[0]
+        finally:
+            await http_fetcher.aclose()
+        sequential_ports: Set[int] = set(document_server.client_ports[ports_before:])
+        return parallel, elapsed, sequential, reused, sequential_ports, oversized
+
+    parallel, elapsed, sequential, reused, sequential_ports, oversized = asyncio.run(run())
+
+    assert all(result["status"] == "success" for result in parallel + sequential)
+    # bounded by the per host limit of the fetcher
+    assert document_server.max_in_flight == min(PARALLEL_REQUESTS, http_fetcher.per_host_concurrency)
+    assert elapsed < 0.6 * PARALLEL_REQUESTS * DELAY_SECONDS
+    assert reused
+    # sequential downloads go over one kept-alive connection of the pooled client
+    assert len(sequential_ports) == 1
+    assert oversized["status"] == "error"
+    assert not url_ingest_store.get(where={"identifier": f"{document_server.url}/large/0"})["ids"]